@@ -0,0 +1,252 @@
+"""Алерти низького заряду: правила з гістерезисом і фонова доставка сповіщень."""
+import heapq
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+
+from .analytics import format_utc_timestamp
+from .metrics import ALERT_DELIVERIES, ALERTS
+from .push import dumps_compact
+
+logger = logging.getLogger(__name__)
+
+# Пороги кольорів дашбордів і алертів за замовчуванням: рівень <= порога
+# вже належить до гіршого стану (50 - жовтий, 20 - червоний)
+WARNING_LEVEL = 50
+CRITICAL_LEVEL = 20
+
+def level_status(level):
+    """Стан індикатора для рівня: 'success', 'warning', 'danger' (None - даних немає)."""
+    if level is None or level <= CRITICAL_LEVEL:
+        return 'danger'
+    if level <= WARNING_LEVEL:
+        return 'warning'
+    return 'success'
+
+# Правило: спрацьовує, коли рівень <= below, знімається, коли рівень >= clear_above
+# (гістерезис); sensors - множина id або None для всіх сенсорів
+AlertRule = namedtuple('AlertRule', ['name', 'below', 'clear_above', 'sensors'])
+
+DEFAULT_ALERT_RULES = [
+    {"name": "warning", "below": WARNING_LEVEL, "clear_above": WARNING_LEVEL + 5},
+    {"name": "critical", "below": CRITICAL_LEVEL, "clear_above": CRITICAL_LEVEL + 5},
+]
+
+def load_alert_rules(options, groups):
+    """Правила з опції alerts: [{name, below, clear_above?, group?}] (без clear_above - below + 5).
+
+    groups - група -> список id; правило з group стосується лише її сенсорів.
+    """
+    rules = []
+    for entry in options.get('alerts') or DEFAULT_ALERT_RULES:
+        try:
+            below = float(entry['below'])
+            clear_above = float(entry['clear_above']) if entry.get('clear_above') is not None else below + 5
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Skipping alert rule without a numeric 'below': {entry!r}")
+            continue
+        group = entry.get('group')
+        if group and group not in groups:
+            logger.warning(f"Alert rule {entry.get('name')!r} refers to unknown group {group!r}")
+        sensors = frozenset(groups.get(group, ())) if group else None
+        rules.append(AlertRule(str(entry.get('name') or f"below_{below:g}"), below, max(clear_above, below), sensors))
+    return rules
+
+def load_alert_targets(options):
+    """Цілі сповіщень: ('webhook', url) з alert_webhooks (або ALERT_WEBHOOKS через кому)
+    і ('notify', сервіс) з alert_notify."""
+    webhooks = os.environ.get('ALERT_WEBHOOKS')
+    webhooks = webhooks.split(',') if webhooks else options.get('alert_webhooks') or []
+    targets = [('webhook', url.strip()) for url in webhooks if url.strip()]
+    for service in options.get('alert_notify') or []:
+        targets.append(('notify', service.split('.', 1)[-1] if service.startswith('notify.') else service))
+    return targets
+
+class AlertEngine:
+    """Оцінює правила з гістерезисом для кожного нового рівня (O(правил) на оновлення).
+
+    Алерт спрацьовує один раз при переході через below і не повторюється,
+    доки рівень не підніметься до clear_above, тож коливання біля порога
+    не породжують потік сповіщень.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._active = set()  # (правило, id) - алерти, що зараз спрацювали
+        self._lock = threading.Lock()
+
+    def prime(self, sensor_id, level):
+        """Відновлює активні алерти зі стану після перезапуску, не надсилаючи їх повторно."""
+        with self._lock:
+            for rule in self.rules:
+                if (rule.sensors is None or sensor_id in rule.sensors) and level <= rule.below:
+                    self._active.add((rule.name, sensor_id))
+
+    def prime_from(self, snapshot):
+        """prime для кожного сенсора знімка, що має дані."""
+        for sensor_id, reading in snapshot.readings.items():
+            if reading.level is not None:
+                self.prime(sensor_id, reading.level)
+
+    def evaluate(self, sensor_id, level):
+        """Повертає список змін стану алертів [(правило, 'firing'|'resolved')]."""
+        transitions = []
+        with self._lock:
+            for rule in self.rules:
+                if rule.sensors is not None and sensor_id not in rule.sensors:
+                    continue
+                key = (rule.name, sensor_id)
+                if key in self._active:
+                    if level >= rule.clear_above:
+                        self._active.discard(key)
+                        transitions.append((rule, 'resolved'))
+                elif level <= rule.below:
+                    self._active.add(key)
+                    transitions.append((rule, 'firing'))
+        for rule, alert_state in transitions:
+            ALERTS.labels(rule.name, alert_state).inc()
+        return transitions
+
+    def check(self, update, names):
+        """Алерти для сенсорів StateUpdate зі зміненим рівнем, готові для AlertDispatcher.submit."""
+        alerts = []
+        readings = update.snapshot.readings
+        for sensor_id in update.changed:
+            reading = readings[sensor_id]
+            if reading.level is None:
+                continue
+            for rule, alert_state in self.evaluate(sensor_id, reading.level):
+                alerts.append(alert_payload(rule, alert_state, sensor_id, names[sensor_id], reading.level,
+                                            format_utc_timestamp(reading.timestamp)))
+        return alerts
+
+class AlertDispatcher:
+    """Фонова доставка сповіщень на webhook-и та сервіси notify Home Assistant.
+
+    submit лише кладе алерти в обмежену чергу і ніколи не блокує обробку
+    POST. Фоновий потік збирає алерти, що надійшли впродовж batch_window, в
+    один пакет (спрацювання й зняття того самого алерту в пакеті взаємно
+    скасовуються), надсилає його кожній цілі і повторює невдалі спроби з
+    експоненційною затримкою до max_attempts разів.
+    """
+
+    def __init__(self, targets, source, title, notify_url=None, token='',
+                 batch_window=2.0, max_attempts=5, timeout=5.0, maxsize=1000):
+        self.targets = targets
+        self.source = source  # slug аддона у тілі webhook-а
+        self.title = title  # заголовок сповіщення Home Assistant
+        self.notify_url = notify_url  # REST API Home Assistant, до якого додається /services/notify/<сервіс>
+        self.token = token
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._retries = []  # купа (час повтору, порядковий номер, ціль, алерти, спроба)
+        self._sequence = itertools.count()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def submit(self, alerts):
+        # Без цілей потік доставки не запущено, і черга лише переповнилася б
+        if not self.targets:
+            return
+        for alert in alerts:
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                ALERT_DELIVERIES.labels('queue', 'dropped').inc()
+
+    def depth(self):
+        return self._queue.qsize() + len(self._retries)
+
+    def start(self):
+        if self._thread is None and self.targets:
+            self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Надсилає вже зібрані алерти (без повторів) і зупиняє потік."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout * max(1, len(self.targets)) + self.batch_window + 1)
+
+    def _run(self):
+        while True:
+            stopping = self._stop_event.is_set()
+            wait = 0.5
+            if self._retries:
+                wait = min(wait, max(0.0, self._retries[0][0] - time.monotonic()))
+            batch = self._collect(0 if stopping else wait)
+            if batch:
+                for target in self.targets:
+                    self._deliver(target, batch, 1)
+            while self._retries and self._retries[0][0] <= time.monotonic() and not stopping:
+                _, _, target, alerts, attempt = heapq.heappop(self._retries)
+                self._deliver(target, alerts, attempt)
+            if stopping and self._queue.empty():
+                return
+
+    def _collect(self, wait):
+        """Чекає перший алерт до wait секунд, далі добирає решту впродовж batch_window."""
+        try:
+            batch = [self._queue.get(timeout=wait) if wait else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 and not self._stop_event.is_set()
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Дедуплікація: останній стан кожного (правило, id); пара спрацювання-зняття скасовується
+        latest = {}
+        for alert in batch:
+            key = (alert['rule'], alert['id'])
+            previous = latest.pop(key, None)
+            if previous is None or previous['state'] == alert['state']:
+                latest[key] = alert
+        return list(latest.values())
+
+    def _deliver(self, target, alerts, attempt):
+        kind, address = target
+        try:
+            self._send(kind, address, alerts)
+        except Exception as e:
+            if attempt >= self.max_attempts or self._stop_event.is_set():
+                ALERT_DELIVERIES.labels(kind, 'failed').inc()
+                logger.error(f"Giving up delivering {len(alerts)} alert(s) to {kind} {address}: {e}")
+                return
+            ALERT_DELIVERIES.labels(kind, 'retry').inc()
+            delay = min(2 ** (attempt - 1), 60)
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), target, alerts, attempt + 1))
+            return
+        ALERT_DELIVERIES.labels(kind, 'sent').inc()
+
+    def _send(self, kind, address, alerts):
+        headers = {'Content-Type': 'application/json'}
+        if kind == 'notify':
+            url = f"{self.notify_url}/services/notify/{address}"
+            headers['Authorization'] = f"Bearer {self.token}"
+            payload = {"title": self.title, "message": "\n".join(alert['message'] for alert in alerts)}
+        else:
+            url = address
+            payload = {"source": self.source, "alerts": alerts}
+        req = urllib.request.Request(url, data=dumps_compact(payload).encode('utf-8'), headers=headers, method='POST')
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+def alert_payload(rule, alert_state, sensor_id, name, level, timestamp):
+    """Алерт для черги доставки; message - готовий текст сповіщення."""
+    if alert_state == 'firing':
+        message = f"Батарея «{name}»: {level}% (поріг {rule.below:g}%)"
+    else:
+        message = f"Батарея «{name}» відновилась: {level}%"
+    return {"rule": rule.name, "state": alert_state, "id": sensor_id, "name": name, "level": level,
+            "threshold": rule.below, "timestamp": timestamp, "message": message}
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Супервізор аддона: запускає бекенд і тунель, стежить за їхнім здоров'ям і перезапускає.
+
+Кожен компонент - це команда й URL перевірки здоров'я (бекенд - /healthz,
+cloudflared - /ready його сервера метрик). Компонент перезапускається,
+якщо процес завершився або перевірка не проходить failures разів поспіль
+(після grace секунд на старт). Перезапуски йдуть з експоненційною затримкою
+до max_backoff; компонент, що пропрацював stable_after секунд, знову
+перезапускається швидко. Бекенд і тунель незалежні: тунель, що падає,
+не зупиняє локальний дашборд.
+
+Стан (час старту, кількість перезапусків, здоров'я) супервізор атомарно
+пише у JSON-файл status_file; бекенд віддає його в /healthz і в метриках.
+
+На SIGTERM усі компоненти отримують сигнал одночасно, а кожен чекає не
+довше за власний stop_timeout від того самого моменту, тож зупинка
+вкладається в timeout аддона в config.yaml (після нього Supervisor Home
+Assistant надсилає SIGKILL).
+
+Модуль не залежить ні від чого поза stdlib і запускається як скрипт, щоб
+не імпортувати Flask у довгоживучий процес:
+
+    python3 /app/battery_core/supervisor.py \\
+        --backend "gunicorn --config gunicorn.conf.py app:app" --backend-health http://127.0.0.1:8099/healthz \\
+        --tunnel "cloudflared tunnel --metrics 127.0.0.1:8098 run" --tunnel-health http://127.0.0.1:8098/ready
+"""
+import argparse
+import json
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger('supervisor')
+
+# Спільний для супервізора й бекенду (той читає його в /healthz і метриках)
+STATUS_FILE = os.environ.get('SUPERVISOR_STATUS_FILE', '/tmp/battery_supervisor.json')
+# Скільки чекати бекенд і тунель при зупинці аддона: менше за timeout: 10 у config.yaml.
+# Бекенд дописує журнал стану (graceful_timeout gunicorn коротший), cloudflared
+# лише закриває з'єднання (його --grace-period у run.sh коротший)
+BACKEND_STOP_TIMEOUT = 8.0
+TUNNEL_STOP_TIMEOUT = 3.0
+
+def read_supervisor_status(path=STATUS_FILE):
+    """Останній стан супервізора з файлу; None, якщо аддон запущено без нього."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class Component:
+    """Один керований процес: запуск, перевірка здоров'я, перезапуск із backoff."""
+
+    def __init__(self, name, command, health_url=None, grace=30.0, failures=3, check_timeout=2.0,
+                 min_backoff=1.0, max_backoff=30.0, stable_after=60.0, stop_timeout=BACKEND_STOP_TIMEOUT,
+                 hung_stop_timeout=2.0):
+        self.name = name
+        self.command = command
+        self.health_url = health_url
+        self.grace = grace
+        self.failures = failures
+        self.check_timeout = check_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.hung_stop_timeout = hung_stop_timeout
+        self.process = None
+        self.restarts = 0
+        self.started_at = None  # epoch-секунди поточного запуску
+        self.healthy = False
+        self.last_exit = None
+        self._started = None  # monotonic поточного запуску
+        self._failed_checks = 0
+        self._came_up = False  # поточний запуск хоч раз пройшов перевірку
+        self._backoff = min_backoff
+        self._next_start = 0.0
+
+    def start(self):
+        logger.info(f"Starting {self.name}: {' '.join(self.command)}")
+        try:
+            # Власна група процесів, щоб зупиняти компонент разом із його дочірніми
+            # (воркерами gunicorn), навіть якщо головний процес уже загинув
+            self.process = subprocess.Popen(self.command, start_new_session=True)
+        except OSError as e:
+            logger.error(f"Failed to start {self.name}: {e}")
+            self._schedule_restart(time.monotonic())
+            return
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self._failed_checks = 0
+        self._came_up = False
+        self.healthy = False
+
+    def _signal_group(self, process, signum):
+        try:
+            os.killpg(process.pid, signum)
+        except OSError:
+            pass
+
+    def stop(self, timeout=None):
+        """SIGTERM групі процесів, а якщо компонент не завершився за timeout (stop_timeout) - SIGKILL."""
+        timeout = self.stop_timeout if timeout is None else timeout
+        self.wait_stopped(self.terminate(), time.monotonic() + timeout)
+
+    def terminate(self):
+        """Надсилає SIGTERM групі процесів, не чекаючи. Повертає процес для wait_stopped (None - чекати нічого)."""
+        process, self.process = self.process, None
+        self.healthy = False
+        if process is None:
+            return None
+        if process.poll() is not None:
+            # Головний процес уже завершився - добиваємо осиротілих дочірніх
+            self._signal_group(process, signal.SIGKILL)
+            return None
+        self._signal_group(process, signal.SIGTERM)
+        return process
+
+    def wait_stopped(self, process, deadline):
+        """Чекає завершення процесу до deadline (monotonic), потім SIGKILL усій групі."""
+        if process is None:
+            return
+        try:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{self.name} did not stop in time, killing it")
+        # Воркери, що зависли, не завершаться від SIGTERM і триматимуть порт
+        self._signal_group(process, signal.SIGKILL)
+        process.wait()
+
+    def probe(self):
+        """True, якщо health_url відповідає 200 (без URL - достатньо живого процесу)."""
+        if self.health_url is None:
+            return True
+        try:
+            with urllib.request.urlopen(self.health_url, timeout=self.check_timeout) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def check(self):
+        """Один крок нагляду: старт за розкладом, виявлення падіння чи зависання."""
+        now = time.monotonic()
+        if self.process is None:
+            if now >= self._next_start:
+                self.start()
+            return
+        code = self.process.poll()
+        if code is not None:
+            logger.error(f"{self.name} exited with code {code}, restarting in {self._backoff:g} s")
+            self.last_exit = code
+            self.stop()
+            self._schedule_restart(now)
+            return
+        if self.probe():
+            self._failed_checks = 0
+            self._came_up = True
+            self.healthy = True
+            if now - self._started >= self.stable_after:
+                self._backoff = self.min_backoff
+            return
+        # Поки компонент стартує (ще жодної вдалої перевірки), невдачі не рахуються
+        if not self._came_up and now - self._started < self.grace:
+            return
+        self._failed_checks += 1
+        self.healthy = False
+        if self._failed_checks >= self.failures:
+            logger.error(f"{self.name} failed {self._failed_checks} health checks, restarting in {self._backoff:g} s")
+            # Компонент, що не відповідає, навряд чи завершиться коректно, тож
+            # довго не чекаємо (gunicorn інакше чекав би зависший воркер graceful_timeout)
+            self.stop(self.hung_stop_timeout)
+            self._schedule_restart(now)
+
+    def _schedule_restart(self, now):
+        self.restarts += 1
+        self._next_start = now + self._backoff
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    def status(self):
+        return {"running": self.process is not None, "healthy": self.healthy, "started_at": self.started_at,
+                "restarts": self.restarts, "last_exit": self.last_exit}
+
+class Supervisor:
+    """Тримає компоненти запущеними, доки не прийде SIGTERM/SIGINT."""
+
+    def __init__(self, components, status_file=STATUS_FILE, interval=2.0):
+        self.components = components
+        self.status_file = status_file
+        self.interval = interval
+        self.started_at = time.time()
+        self._stop_event = threading.Event()
+
+    def request_stop(self, signum=None, frame=None):
+        self._stop_event.set()
+
+    def write_status(self):
+        status = {"started_at": self.started_at, "updated_at": time.time(),
+                  "components": {c.name: c.status() for c in self.components}}
+        tmp = f"{self.status_file}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(status, f)
+            os.replace(tmp, self.status_file)
+        except OSError as e:
+            logger.warning(f"Failed to write {self.status_file}: {e}")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        try:
+            while not self._stop_event.is_set():
+                for component in self.components:
+                    component.check()
+                self.write_status()
+                self._stop_event.wait(self.interval)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Зупиняє всі компоненти разом: найдовше - max(stop_timeout), а не їхня сума."""
+        started = time.monotonic()
+        stopping = [(component, component.terminate()) for component in self.components]
+        for component, process in stopping:
+            component.wait_stopped(process, started + component.stop_timeout)
+        self.write_status()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', required=True, help='команда вебсервера')
+    parser.add_argument('--backend-health', help='URL перевірки здоров\'я бекенду (/healthz)')
+    parser.add_argument('--tunnel', help='команда тунелю (без неї - лише локальний доступ)')
+    parser.add_argument('--tunnel-health', help='URL готовності тунелю (/ready сервера метрик cloudflared)')
+    parser.add_argument('--interval', type=float, default=2.0, help='секунд між перевірками')
+    parser.add_argument('--failures', type=int, default=3, help='невдалих перевірок поспіль до перезапуску')
+    parser.add_argument('--grace', type=float, default=30.0, help='секунд на старт до першої обов\'язкової перевірки')
+    parser.add_argument('--max-backoff', type=float, default=30.0, help='найбільша затримка перед перезапуском, с')
+    parser.add_argument('--status-file', default=STATUS_FILE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    settings = dict(grace=args.grace, failures=args.failures, max_backoff=args.max_backoff)
+    components = [Component('backend', shlex.split(args.backend), args.backend_health, **settings)]
+    if args.tunnel:
+        components.append(Component('tunnel', shlex.split(args.tunnel), args.tunnel_health,
+                                    stop_timeout=TUNNEL_STOP_TIMEOUT, **settings))
+    Supervisor(components, args.status_file, args.interval).run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Реплікація стану між екземплярами: пір надсилає дельти агрегатору (last-writer-wins)."""
+import hmac
+import logging
+import threading
+import urllib.request
+
+from .metrics import SYNC_PUSHES
+from .push import dumps_compact
+from .validation import parse_level
+
+logger = logging.getLogger(__name__)
+
+def sync_authorized(request, token):
+    """True, якщо запит несе заголовок Authorization: Bearer <token>."""
+    header = request.headers.get('Authorization', '')
+    return hmac.compare_digest(header.encode('utf-8'), f"Bearer {token}".encode('utf-8'))
+
+def parse_sync_payload(payload, id_type):
+    """Розбирає тіло POST від піра: {instance, version, readings: [[id, level, timestamp], ...]}.
+
+    Повертає (назва піра, [(id, level, timestamp)], кількість відкинутих записів);
+    тіло не того формату - ValueError.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('readings'), list):
+        raise ValueError("Expected {\"instance\": ..., \"readings\": [[id, level, timestamp], ...]}")
+    readings, rejected = [], 0
+    for item in payload['readings']:
+        try:
+            raw_id, level, timestamp = item
+            readings.append((id_type(raw_id), parse_level(level, allow_missing=True), float(timestamp)))
+        except (TypeError, ValueError):
+            rejected += 1
+    return str(payload.get('instance') or 'unknown'), readings, rejected
+
+class PeerSync:
+    """Надсилає агрегатору зміни локального стану від останньої підтвердженої версії.
+
+    notify будить фоновий потік, який ще interval секунд збирає наступні
+    зміни й надсилає одним POST лише сенсори з новими значеннями - з їхнім
+    власним часом, за яким агрегатор вирішує, чиє значення новіше. Після
+    перезапуску (і поки агрегатор не підтвердив жодної версії) надсилається
+    весь стан. Невдала спроба повторюється з експоненційною затримкою до
+    max_backoff; зміни за цей час не губляться, бо дельта рахується від
+    підтвердженої версії.
+    """
+
+    def __init__(self, state, url, token, instance, interval=2.0, timeout=10.0, max_backoff=60):
+        self.state = state
+        self.url = url
+        self.token = token
+        self.instance = instance
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._acked_version = None
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def notify(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='peer-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Зупиняє потік, спробувавши востаннє надіслати ненадіслане."""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+
+    def push(self):
+        """Надсилає дельту від підтвердженої версії. True - агрегатор прийняв (або нічого надсилати)."""
+        snapshot = self.state.snapshot
+        readings = snapshot.readings
+        ids = snapshot.updated_since(self._acked_version)
+        if self._acked_version is not None and not ids:
+            return True
+        payload = {"instance": self.instance, "version": snapshot.version,
+                   "readings": [[i, readings[i].level, readings[i].timestamp]
+                                for i in ids if readings[i].timestamp is not None]}
+        req = urllib.request.Request(self.url, data=dumps_compact(payload).encode('utf-8'), method='POST',
+                                     headers={'Content-Type': 'application/json',
+                                              'Authorization': f"Bearer {self.token}"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            SYNC_PUSHES.labels('failed').inc()
+            logger.warning(f"Peer sync to {self.url} failed: {e}")
+            return False
+        SYNC_PUSHES.labels('sent').inc()
+        self._acked_version = snapshot.version
+        return True
+
+    def _run(self):
+        # Перший прохід надсилає весь стан, щоб агрегатор мав його одразу після старту
+        self._wake.set()
+        delay = 1
+        while True:
+            self._wake.wait()
+            if not self._stop_event.is_set():
+                # Збираємо зміни, що надійдуть упродовж interval, в одну дельту
+                self._stop_event.wait(self.interval)
+            self._wake.clear()
+            sent = self.push()
+            if self._stop_event.is_set():
+                return
+            if sent:
+                delay = 1
+            else:
+                self._wake.set()
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
@@ -1,252 +1,378 @@
-from flask import Flask, request, jsonify, render_template_string
-from flask_socketio import SocketIO
-import json
+from flask import Flask, Response, request, jsonify
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import os
 import logging
 import time
 
-app = Flask(__name__)
+from battery_core import (AddonRuntime, AddonSettings, COLUMNAR_FIELDS, CRITICAL_LEVEL, PrecompressedPage,
+                          StartupClock, WARNING_LEVEL, batch_status, health_report, install_history_route,
+                          install_rate_limit, install_request_metrics, install_sync_route, level_status,
+                          load_static_assets, parse_ha_level, parse_level, read_batch_readings, reading_row,
+                          split_by_group)
+from battery_core.metrics import BROADCAST_DURATION, PUSH_CLIENTS
+
+# Этапы холодного старта (отсчёт от запуска процесса) для /api/ready и метрик
+startup = StartupClock()
+
+# Статику отдаёт собственный маршрут /static с хэшированными именами (см. ниже)
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Замени на уникальный ключ
 socketio = SocketIO(app)
 logging.basicConfig(level=logging.DEBUG)
 
-DATA_FILE = '/app/data.json'
-SENSORS = {
-    "1": "Ліфт п1",
-    "2": "Ліфт п2",
-    "3": "Ліфт п3",
-    "4": "Вода",
-    "5": "Опалення"
-}
+# Снимок состояния и журнал - в постоянном каталоге /data: контейнер пересоздаётся при каждом старте
+DATA_FILE = os.environ.get('DATA_FILE', '/data/data.json')
+# Прежнее место внутри контейнера; оттуда состояние переносится один раз
+LEGACY_DATA_FILE = '/app/data.json'
+# История уровней заряда хранится в постоянном каталоге /data аддона
+HISTORY_FILE = os.environ.get('HISTORY_FILE', '/data/battery_history.db')
+# Опции аддона и реестр датчиков (файл в /share имеет приоритет над опциями)
+OPTIONS_FILE = os.environ.get('OPTIONS_FILE', '/data/options.json')
+SENSORS_FILE = os.environ.get('SENSORS_FILE', '/share/battery_sensors.json')
+DEFAULT_SENSORS = [
+    {"id": "1", "name": "Ліфт п1"},
+    {"id": "2", "name": "Ліфт п2"},
+    {"id": "3", "name": "Ліфт п3"},
+    {"id": "4", "name": "Вода"},
+    {"id": "5", "name": "Опалення"},
+]
+# Сколько индикаторов на одной странице дашборда
+PAGE_SIZE = max(1, int(os.environ.get('PAGE_SIZE', '24')))
+
+UNTIMED_ROUTES = {'/metrics', '/healthz'}
+
+# =================================================================
+# КОНФИГУРАЦИЯ И РЕЕСТР ДАТЧИКОВ
+# =================================================================
+
+# Фильтр входящих данных, rate limit, аналитика, компактизация, репликация и
+# приём из Home Assistant настраиваются одинаково в обоих аддонах (см. AddonSettings)
+SETTINGS = AddonSettings(OPTIONS_FILE)
+
+# sn датчиков в этом аддоне - строки
+SENSOR_REGISTRY = SETTINGS.load_sensors(SENSORS_FILE, DEFAULT_SENSORS, id_type=str)
+# sn -> название: проверка датчика при каждом обновлении за O(1)
+SENSORS = SENSOR_REGISTRY.names
+# группа -> список sn в порядке объявления, и обратная карта sn -> группа
+SENSOR_GROUPS = SENSOR_REGISTRY.groups
+SENSOR_GROUP_OF = SENSOR_REGISTRY.group_of
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    return {sn: None for sn in SENSORS}
+# =================================================================
+# РАССЫЛКА ИЗМЕНЕНИЙ ЧЕРЕЗ SOCKET.IO
+# =================================================================
 
-def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f)
+# Версионирование изменений для дельта-рассылки через Socket.IO.
+# epoch меняется при каждом перезапуске, чтобы клиент не применял дельты
+# к версии, которую сервер уже не помнит.
+EPOCH = str(int(time.time() * 1000))
 
-data = load_data()
+# Клиент без группы получает все изменения, клиент с группой - только её датчики.
+# Клиент, попросивший в resync format: 'columnar', сидит в парной комнате с
+# суффиксом #columnar и получает строки [sn, soc, epoch, аналитика...] вместо словарей.
+ALL_SENSORS_ROOM = 'sensors:*'
+COLUMNAR_SUFFIX = '#columnar'
+
+def group_room(group, columnar=False):
+    room = ALL_SENSORS_ROOM if group is None else f'sensors:{group}'
+    return room + COLUMNAR_SUFFIX if columnar else room
+
+def soc_values(snapshot, sensors):
+    """({sn: SOC}, {sn: аналитика}) датчиков sensors из снимка."""
+    readings = snapshot.readings
+    return ({sn: readings[sn].level for sn in sensors},
+            {sn: readings[sn].analytics() for sn in sensors})
+
+def soc_rows(snapshot, sensors):
+    """Строки колоночного формата датчиков sensors из снимка."""
+    readings = snapshot.readings
+    return [reading_row(sn, readings[sn]) for sn in sensors]
+
+def snapshot_since(client_epoch, client_version, sensors=None, columnar=False):
+    """Возвращает (событие, payload), которые нужно отправить клиенту при пересинхронизации.
+
+    sensors - список sn группы клиента (None - все датчики); columnar -
+    строки вместо словарей changes/data и analytics.
+    """
+    snapshot = state.snapshot
+    if client_epoch == EPOCH and isinstance(client_version, int) and 0 <= client_version <= snapshot.version:
+        changed = snapshot.changed_since(client_version, sensors)
+        payload = {"epoch": EPOCH, "base": client_version, "version": snapshot.version}
+        if columnar:
+            return 'soc_delta', {**payload, "rows": soc_rows(snapshot, changed)}
+        changes, analytics = soc_values(snapshot, changed)
+        return 'soc_delta', {**payload, "changes": changes, "analytics": analytics}
+    selected = snapshot.readings if sensors is None else sensors
+    if columnar:
+        # Названия полей - один раз в полном снимке, дальше только строки
+        return 'soc_snapshot', {"epoch": EPOCH, "version": snapshot.version, "fields": COLUMNAR_FIELDS,
+                                "rows": soc_rows(snapshot, selected)}
+    data, analytics = soc_values(snapshot, selected)
+    return 'soc_snapshot', {"epoch": EPOCH, "version": snapshot.version, "data": data, "analytics": analytics}
+
+def broadcast_changes(update):
+    """Рассылает дельту всем клиентам и отдельно каждой группе - только её датчики.
+
+    base дельты - версия последнего изменения SOC до этой (для группы - среди
+    её датчиков): версия снимка растёт и от значений без изменений, которые
+    не рассылаются, поэтому они и изменения других групп не выглядят для
+    клиента как пропуск. Каждая комната получает и колоночный вариант.
+    """
+    # Значения без изменений SOC (тот же уровень, новое время) не рассылаются
+    if not update.changed:
+        return
+    previous, snapshot = update.previous, update.snapshot
+    with BROADCAST_DURATION.time():
+        changes, analytics = soc_values(snapshot, update.changed)
+        rows = dict(zip(update.changed, soc_rows(snapshot, update.changed)))
+        header = {"epoch": EPOCH, "base": previous.changed, "version": snapshot.version}
+        socketio.emit('soc_delta', {**header, "changes": changes, "analytics": analytics}, to=ALL_SENSORS_ROOM)
+        socketio.emit('soc_delta', {**header, "rows": list(rows.values())}, to=group_room(None, columnar=True))
+        for group, group_sensors in split_by_group(update.changed, SENSOR_GROUP_OF).items():
+            header = {"epoch": EPOCH, "base": previous.last_changed(SENSOR_GROUPS[group]),
+                      "version": snapshot.version}
+            socketio.emit('soc_delta', {**header, "changes": {sn: changes[sn] for sn in group_sensors},
+                                        "analytics": {sn: analytics[sn] for sn in group_sensors}},
+                          to=group_room(group))
+            socketio.emit('soc_delta', {**header, "rows": [rows[sn] for sn in group_sensors]},
+                          to=group_room(group, columnar=True))
+
+# =================================================================
+# СОСТОЯНИЕ, ИСТОРИЯ, АЛЕРТЫ, ФИЛЬТРАЦИЯ ВХОДЯЩИХ ДАННЫХ
+# =================================================================
+
+# Состояние с журналом, история, алерты, репликация, IngestFilter и приём из
+# Home Assistant (unknown/unavailable здесь - нет данных (N/A), прочий текст
+# пропускается); фоновые потоки останавливаются через atexit
+runtime = AddonRuntime('battery_soc_page', 'Заряд батарей', SETTINGS, SENSOR_REGISTRY, DATA_FILE, HISTORY_FILE,
+                       broadcast_changes, id_type=str, legacy_data_file=LEGACY_DATA_FILE,
+                       parse_ha_value=lambda value: parse_ha_level(value, allow_missing=True))
+state = runtime.state
+history = runtime.history
+apply_updates = runtime.apply
+ingest_updates = runtime.ingest
+should_log_sample = runtime.should_log_sample
+# POST-эндпоинты, к которым применяется rate limit
+RATE_LIMITED_ROUTES = {'/api/battery_soc'}
+
+def error_body(message):
+    """Тело ответа с ошибкой в формате этого аддона."""
+    return {"status": "error", "message": message}
+
+# =================================================================
+# ПРИЁМ ДАННЫХ
+# =================================================================
 
 @app.route('/api/battery_soc', methods=['POST'])
 def update_battery_soc():
+    # Тот же пакетный формат, что в local_battery_viewer_tunnel: словарь {sn: soc}, массив
+    # [{"id": sn, "soc": soc}, ...] (или с полем "level"), {"readings": [...]} и NDJSON;
+    # {} - пустой пакет, ничего не меняет
     try:
-        new_data = request.get_json()
-        app.logger.debug(f"Received data: {new_data}")
-        for sn, soc in new_data.items():
-            if sn in SENSORS:
-                # Приведение значения к float, если возможно, иначе None
-                data[sn] = float(soc) if soc and soc != 'N/A' else None
-        save_data(data)
-        socketio.emit('update_soc', data)
-        return jsonify({"status": "ok"})
+        readings = read_batch_readings(request)
     except Exception as e:
         app.logger.error(f"Error: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 400
+    if should_log_sample() and app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug(f"Received data: {readings}")
 
-@app.route('/', methods=['GET'])
-def index():
-    html = """
-    <!DOCTYPE html>
-    <html lang="uk">
-    <head>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Індикатори Енергосистеми</title>
-        <style>
-            :root {
-                --primary-color: #007bff;
-                --success-color: #5cb85c;
-                --warning-color: #f0ad4e;
-                --danger-color: #d9534f;
-                --bg-color: #f8f9fa;
-                --card-bg: #ffffff;
-                --text-color: #333;
-            }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                display: flex; 
-                flex-direction: column; 
-                align-items: center; 
-                justify-content: flex-start; 
-                min-height: 100vh; 
-                margin: 0; 
-                padding: 20px 10px;
-                background-color: var(--bg-color); 
-                color: var(--text-color);
-            }
-            h1 { 
-                margin-bottom: 30px; 
-                font-size: 1.2em;
-                text-align: center;
-            }
-            .battery-grid { 
-                display: flex; 
-                gap: 20px; 
-                flex-wrap: wrap; 
-                justify-content: center;
-                width: 100%;
-                max-width: 1200px;
-            }
-            .indicator-unit { 
-                display: flex; 
-                flex-direction: column; 
-                align-items: center; 
-                padding: 20px; 
-                border: 1px solid #e0e0e0; 
-                border-radius: 12px; 
-                background: var(--card-bg); 
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08); 
-                transition: transform 0.2s;
-                width: calc(20% - 20px); 
-                min-width: 180px;
-                box-sizing: border-box;
-            }
-            .indicator-unit:hover {
-                transform: translateY(-3px);
-                box-shadow: 0 6px 15px rgba(0,0,0,0.1);
-            }
-            .system-title {
-                font-size: 1.2em;
-                margin-bottom: 15px;
-                font-weight: 600;
-            }
-            .battery-container { 
-                width: 100px; 
-                height: 60px; 
-                border: 3px solid var(--text-color); 
-                border-radius: 8px; 
-                position: relative; 
-                display: flex; 
-                align-items: center; 
-                justify-content: center; 
-                margin-top: 10px; 
-                background-color: #f0f0f0; 
-                overflow: hidden;
-            }
-            .battery-container::after { 
-                content: ''; 
-                position: absolute; 
-                right: -8px; 
-                top: 50%; 
-                transform: translateY(-50%); 
-                width: 6px; 
-                height: 15px; 
-                background-color: var(--text-color); 
-                border-radius: 0 3px 3px 0; 
-            }
-            .battery-segments {
-                display: flex;
-                height: 100%;
-                width: 100%;
-                position: absolute;
-                top: 0;
-                left: 0;
-            }
-            .segment {
-                flex: 1;
-                border-right: 1px solid #e0e0e0;
-            }
-            .segment:last-child {
-                border-right: none;
-            }
-            .battery-level { 
-                font-size: 2em;
-                font-weight: bold; 
-                color: var(--text-color); 
-                transition: color 0.3s;
-                position: relative;
-                z-index: 1;
-            }
-            .timestamp-text { 
-                margin-top: 15px; 
-                font-size: 0.8em; 
-                color: #777; 
-                text-align: center; 
-            }
-            /* Кольорові класи для сегментів */
-            .color-success { background-color: var(--success-color) !important; }
-            .color-warning { background-color: var(--warning-color) !important; }
-            .color-danger { background-color: var(--danger-color) !important; }
-            /* Адаптивність */
-            @media (max-width: 1024px) {
-                .indicator-unit {
-                    width: calc(33.33% - 20px);
-                }
-            }
-            @media (max-width: 768px) {
-                .indicator-unit {
-                    width: calc(50% - 15px);
-                }
-            }
-            @media (max-width: 500px) {
-                .indicator-unit {
-                    width: 100%;
-                    max-width: 300px;
-                }
-            }
-        </style>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
-        <script>
-            const socket = io();
-            socket.on('update_soc', (data) => {
-                const units = document.querySelectorAll('.indicator-unit');
-                units.forEach(unit => {
-                    const sn = unit.dataset.sn;
-                    const soc = data[sn] !== null ? data[sn] : 'N/A';
-                    const level = unit.querySelector('.battery-level');
-                    const segments = unit.querySelector('.battery-segments');
-                    level.textContent = `${soc}%`;
-                    // Приведение к числу для сравнения
-                    const socNum = (soc === 'N/A') ? -1 : parseFloat(soc);
-                    level.className = 'battery-level ' + (socNum >= 50 ? 'color-success' : (socNum >= 20 ? 'color-warning' : 'color-danger'));
-                    segments.innerHTML = '';
-                    for (let i = 0; i < 10; i++) {
-                        const segment = document.createElement('div');
-                        segment.className = 'segment';
-                        if (socNum >= 0 && (i * 10) < socNum) {
-                            segment.classList.add(socNum >= 50 ? 'color-success' : (socNum >= 20 ? 'color-warning' : 'color-danger'));
-                        }
-                        segments.appendChild(segment);
-                    }
-                });
-            });
-        </script>
-    </head>
-    <body>
-        <h1>Індикатори Енергосистеми</h1>
-        <div class="battery-grid">
-            {% for sn, name in sensors.items() %}
-            <div class="indicator-unit" data-sn="{{ sn }}">
-                <div class="system-title">{{ name }}</div>
-                <div class="battery-container">
-                    <div class="battery-level {% if data[sn] is not none and data[sn]|float >= 50 %}color-success{% elif data[sn] is not none and data[sn]|float >= 20 %}color-warning{% else %}color-danger{% endif %}">{{ data[sn] if data[sn] is not none else 'N/A' }}%</div>
-                    <div class="battery-segments">
-                        {% set soc = data[sn] if data[sn] is not none else 0 %}
-                        {% set soc_num = soc|float %}
-                        {% for i in range(10) %}
-                        <div class="segment {% if soc_num >= 50 and (i * 10) < soc_num %}color-success{% elif soc_num >= 20 and (i * 10) < soc_num %}color-warning{% elif (i * 10) < soc_num %}color-danger{% endif %}"></div>
-                        {% endfor %}
-                    </div>
+    # Сначала проверяем все значения и фильтруем их, затем применяем принятые одним изменением
+    results = []
+    valid = []
+    for index, reading in enumerate(readings):
+        sn = None
+        try:
+            if isinstance(reading, ValueError):
+                raise reading
+            sn, soc = str(reading[0]), reading[1]
+            if sn not in SENSORS:
+                raise ValueError(f"Unknown sensor {sn!r}")
+            valid.append((sn, parse_level(soc, allow_missing=True)))
+            results.append({"index": index, "id": sn, "status": "updated", "soc": valid[-1][1]})
+        except ValueError as e:
+            results.append({"index": index, "id": sn, "status": "error", "error": str(e)})
+
+    reasons, update = ingest_updates(valid)
+    # Отвечаем только после fsync журнала: подтверждённое значение переживёт сбой питания.
+    # Ждём версию этого запроса, а не последнюю: чужие более поздние записи нас не касаются
+    if update is not None and not state.wait_durable(update.snapshot.version):
+        return jsonify({"status": "error", "message": "State could not be persisted"}), 503
+    suppressed = iter(reasons)
+    for result in results:
+        if result['status'] == 'updated':
+            reason = next(suppressed)
+            if reason is not None:
+                result.update(status="suppressed", reason=reason)
+
+    status, code = batch_status(results)
+    applied = sum(1 for reason in reasons if reason is None)
+    return jsonify({"status": status, "applied": applied, "suppressed": len(reasons) - applied,
+                    "results": results}), code
+
+# =================================================================
+# СТРАНИЦА И СТАТИКА
+# =================================================================
+
+INDEX_HTML = """
+<!DOCTYPE html>
+<html lang="uk">
+<head>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Індикатори Енергосистеми</title>
+    <link rel="stylesheet" href="{{ assets['dashboard.css'] }}">
+</head>
+<body>
+    <h1>Індикатори Енергосистеми</h1>
+    {% if groups|length > 1 %}
+    <nav class="group-tabs">
+        {% for name in groups %}
+        <a href="?group={{ name|urlencode }}"{% if name == group %} class="active"{% endif %}>{{ name }}</a>
+        {% endfor %}
+    </nav>
+    {% endif %}
+    <div class="battery-grid">
+        {% for sn, name in sensors %}
+        {% set soc = readings[sn].level %}
+        {% set status = level_status(soc) %}
+        <div class="indicator-unit" data-sn="{{ sn }}">
+            <div class="system-title">{{ name }}</div>
+            <div class="battery-container">
+                <div class="battery-level color-{{ status }}">{{ soc if soc is not none else 'N/A' }}%</div>
+                <div class="battery-segments">
+                    {% for i in range(10) %}
+                    <div class="segment{% if soc is not none and (i * 10) < soc %} color-{{ status }}{% endif %}"></div>
+                    {% endfor %}
                 </div>
-                <div class="timestamp-text">Оновлено: {{ time.strftime('%H:%M:%S') }}</div>
             </div>
-            {% endfor %}
+            <div class="timestamp-text">Оновлено: {{ time.strftime('%H:%M:%S') }}</div>
+            <div class="forecast-text"></div>
         </div>
-    </body>
-    </html>
-    """
-    return render_template_string(html, sensors=SENSORS, data=data)
+        {% endfor %}
+    </div>
+    {% if pages > 1 %}
+    <nav class="pager">
+        {% if page > 1 %}<a href="?group={{ group|urlencode }}&amp;page={{ page - 1 }}">‹</a>{% endif %}
+        <span>{{ page }} / {{ pages }}</span>
+        {% if page < pages %}<a href="?group={{ group|urlencode }}&amp;page={{ page + 1 }}">›</a>{% endif %}
+    </nav>
+    {% endif %}
+    <script id="dashboard-config" type="application/json">{{ config|tojson }}</script>
+    <script src="{{ assets['vendor/socket.io.min.js'] }}"></script>
+    <script src="{{ assets['dashboard.js'] }}"></script>
+</body>
+</html>
+"""
+
+# Шаблон компилируется один раз при старте, а отрендеренная страница
+# кэшируется вместе со сжатыми вариантами до следующего изменения SOC.
+INDEX_TEMPLATE = app.jinja_env.from_string(INDEX_HTML)
+# (группа, номер страницы) -> (версия изменения, страница); значения заменяются
+# целиком, поэтому читаются без блокировки
+page_cache = {}
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Клиент Socket.IO лежит в static/vendor/ (хэш сверяется при сборке, см. vendor.sha256);
+# если файла нет, страница берёт клиент с CDN
+SOCKETIO_CLIENT = 'vendor/socket.io.min.js'
+SOCKETIO_CDN_URL = 'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.min.js'
+
+STATIC_ASSETS, STATIC_MANIFEST = load_static_assets(STATIC_DIR)
+if SOCKETIO_CLIENT not in STATIC_MANIFEST:
+    app.logger.warning(f"{SOCKETIO_CLIENT} is not bundled, the dashboard will load it from {SOCKETIO_CDN_URL}")
+    STATIC_MANIFEST[SOCKETIO_CLIENT] = SOCKETIO_CDN_URL
+
+def get_index_page(group, page_number):
+    """Страница page_number (с 1) группы group; рендерится заново только после изменений SOC."""
+    snapshot = state.snapshot
+    cached_version, page = page_cache.get((group, page_number), (None, None))
+    if cached_version != snapshot.changed:
+        # Гонка двух запросов даст лишь повторный рендер той же версии
+        group_sensors = SENSOR_GROUPS[group]
+        pages = max(1, -(-len(group_sensors) // PAGE_SIZE))
+        selected = group_sensors[(page_number - 1) * PAGE_SIZE:page_number * PAGE_SIZE]
+        html = INDEX_TEMPLATE.render(sensors=[(sn, SENSORS[sn]) for sn in selected], readings=snapshot.readings,
+                                     level_status=level_status, groups=list(SENSOR_GROUPS), group=group,
+                                     page=page_number, pages=pages, assets=STATIC_MANIFEST, time=time,
+                                     config={"epoch": EPOCH, "version": snapshot.version, "group": group,
+                                             "thresholds": {"warning": WARNING_LEVEL, "critical": CRITICAL_LEVEL},
+                                             "analytics": soc_values(snapshot, selected)[1]})
+        page = PrecompressedPage(html)
+        page_cache[(group, page_number)] = (snapshot.changed, page)
+    return page
+
+# =================================================================
+# ОБРАБОТЧИКИ FLASK И SOCKET.IO
+# =================================================================
+
+install_request_metrics(app, UNTIMED_ROUTES)
+startup.install(app)
+if runtime.rate_limiter is not None:
+    install_rate_limit(app, runtime.rate_limiter, RATE_LIMITED_ROUTES, error_body("Too many requests"))
+install_sync_route(app, runtime, error_body, '/api/sync')
+install_history_route(app, runtime, error_body)
+
+@app.route('/', methods=['GET'])
+def index():
+    # /?group=<название>&page=<номер>: в HTML только одна страница одной группы
+    group = request.args.get('group') or next(iter(SENSOR_GROUPS))
+    if group not in SENSOR_GROUPS:
+        return jsonify({"error": f"Unknown group {group!r}"}), 404
+    pages = max(1, -(-len(SENSOR_GROUPS[group]) // PAGE_SIZE))
+    page_number = min(max(request.args.get('page', 1, type=int), 1), pages)
+    return get_index_page(group, page_number).response()
+
+@app.route('/static/<path:filename>')
+def static_asset(filename):
+    # CSS/JS с хэшем содержимого в имени: браузер кэширует их как immutable
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return jsonify({"error": "Not found"}), 404
+    return asset.response()
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Метрики в формате Prometheus
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    # Готовность и этапы старта: секунды от запуска процесса до импорта, готовности и первого запроса
+    return startup.report()
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Здоровье бэкенда для супервизора (503 - пора перезапускать) и состояние компонентов под ним
+    return health_report(startup, {'state_journal': state.healthy()})
+
+@socketio.on('connect')
+def handle_connect():
+    PUSH_CLIENTS.inc()
+    # До resync с группой клиент получает все изменения
+    join_room(ALL_SENSORS_ROOM)
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    PUSH_CLIENTS.dec()
+
+@socketio.on('resync')
+def handle_resync(message):
+    # Клиент присылает последнюю версию, которую видел; отвечаем только ему
+    # и группу страницы: переводим его в комнату этой группы (и формата)
+    message = message if isinstance(message, dict) else {}
+    group = message.get('group')
+    group = group if isinstance(group, str) and group in SENSOR_GROUPS else None
+    columnar = message.get('format') == 'columnar'
+    target = group_room(group, columnar)
+    for room in rooms():
+        if room.startswith('sensors:') and room != target:
+            leave_room(room)
+    join_room(target)
+    event, payload = snapshot_since(message.get('epoch'), message.get('version'),
+                                    None if group is None else SENSOR_GROUPS[group], columnar)
+    emit(event, payload)
 
-def send_updates():
-    while True:
-        socketio.emit('update_soc', data)
-        time.sleep(5)
+# Состояние загружено, фоновые потоки и обработчики зарегистрированы
+startup.mark_ready()
 
 if __name__ == '__main__':
-    import threading
-    update_thread = threading.Thread(target=send_updates, daemon=True)
-    update_thread.start()
-    socketio.run(app, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1,32 @@
+"""Спільне ядро аддонів local_battery_viewer_tunnel і battery_soc_page.
+
+Модель стану (знімки із записами на __slots__), валідація, запис на диск,
+розсилка змін (JSON або компактний колонковий формат), реплікація між
+екземплярами, фільтрація вхідних даних, історія, алерти, інжест із Home
+Assistant, метрики і спільні маршрути (історія, приймання від пірів) живуть
+тут в одному екземплярі, а кожен аддон лишає собі лише сенсори, шляхи,
+транспорт розсилки й сторінку.
+
+Канонічна копія лежить у корені репозиторію. Supervisor збирає образ
+кожного аддона з його власної теки, тож scripts/sync_core.py копіює пакет
+у теки аддонів; правки вносяться лише тут.
+"""
+from .addon import AddonRuntime, LogSampler
+from .alerts import (AlertDispatcher, AlertEngine, AlertRule, CRITICAL_LEVEL, WARNING_LEVEL, alert_payload,
+                     level_status, load_alert_rules, load_alert_targets)
+from .analytics import DischargeEstimator, format_utc_timestamp, parse_utc_timestamp
+from .history import HistoryStore
+from .homeassistant import HomeAssistantIngest, parse_ha_level
+from .ingest import IngestFilter, RateLimiter
+from .metrics import SensorAgeCollector, SupervisorCollector, install_request_metrics
+from .options import (AddonSettings, DEFAULT_GROUP, Sensor, SensorRegistry, addon_option, load_sensor_registry,
+                      read_addon_options)
+from .push import EventBroadcaster, dumps_compact, split_by_group
+from .routes import install_history_route, install_sync_route
+from .state import Reading, SensorState, Snapshot, StateUpdate, move_legacy_state
+from .startup import StartupClock, health_report, process_uptime
+from .supervisor import read_supervisor_status
+from .sync import PeerSync, parse_sync_payload, sync_authorized
+from .validation import batch_status, parse_level, parse_time_arg, read_batch_readings, read_json_items
+from .web import IMMUTABLE_CACHE, PrecompressedPage, client_ip, install_rate_limit, load_static_assets, script_json
+from .wire import COLUMNAR_FIELDS, COLUMNAR_MIMETYPE, encode_columnar, reading_row, wants_columnar
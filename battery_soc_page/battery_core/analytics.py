@@ -0,0 +1,76 @@
+"""Інкрементальна аналітика розряду та робота з мітками часу."""
+import math
+from datetime import datetime, timezone
+
+class DischargeEstimator:
+    """Інкрементальна оцінка швидкості розряду/заряду кожного сенсора.
+
+    Швидкість (%/год) - EWMA миттєвих швидкостей між сусідніми значеннями з
+    вагою, що залежить від проміжку: alpha = 1 - exp(-dt / tau). Тож часті
+    й рідкі оновлення важать пропорційно часу, а кожне оновлення - O(1)
+    без перечитування історії. З швидкості виводяться час до розряду й до
+    повного заряду та прапорці аномалій.
+    """
+
+    # Поля аналітики сенсора до першої оцінки
+    EMPTY = {"rate": None, "time_to_empty": None, "time_to_full": None, "anomalies": []}
+
+    def __init__(self, tau=900.0, sudden_change=10.0, sudden_window=600.0, fast_rate=20.0, idle_rate=0.5):
+        self.tau = tau
+        self.sudden_change = sudden_change  # стрибок рівня за sudden_window секунд
+        self.sudden_window = sudden_window
+        self.fast_rate = fast_rate  # %/год, швидше - аномально швидкий розряд
+        self.idle_rate = idle_rate  # %/год, повільніше - батарея в спокої, прогноз не даємо
+        self._sensors = {}  # id -> [рівень, час, швидкість]
+
+    def seed(self, sensor_id, level, ts, rate=None):
+        """Відновлює стан після перезапуску з останнього збереженого значення."""
+        self._sensors[sensor_id] = [level, ts, rate or 0.0]
+
+    def forget(self, sensor_id):
+        """Скидає оцінку, коли сенсор перестав надсилати дані (N/A)."""
+        self._sensors.pop(sensor_id, None)
+
+    def observe(self, sensor_id, level, ts):
+        """Враховує нове значення (час - epoch-секунди). Повертає поля аналітики."""
+        entry = self._sensors.get(sensor_id)
+        if entry is None:
+            self._sensors[sensor_id] = [level, ts, 0.0]
+            return self.summary(level, None, [])
+        last_level, last_ts, rate = entry
+        dt = ts - last_ts
+        anomalies = []
+        if dt > 0:
+            delta = level - last_level
+            alpha = 1 - math.exp(-dt / self.tau)
+            rate += alpha * (delta / dt * 3600 - rate)
+            if dt <= self.sudden_window and abs(delta) >= self.sudden_change:
+                anomalies.append('sudden_drop' if delta < 0 else 'sudden_rise')
+            entry[1], entry[2] = ts, rate
+        entry[0] = level
+        if rate <= -self.fast_rate:
+            anomalies.append('fast_drain')
+        return self.summary(level, rate, anomalies)
+
+    def summary(self, level, rate, anomalies):
+        """Поля аналітики: швидкість (%/год), секунди до розряду/повного заряду, аномалії."""
+        result = dict(self.EMPTY, anomalies=anomalies)
+        if rate is None:
+            return result
+        result['rate'] = round(rate, 2)
+        if rate < -self.idle_rate:
+            result['time_to_empty'] = int(max(level, 0) / -rate * 3600)
+        elif rate > self.idle_rate and level < 100:
+            result['time_to_full'] = int((100 - level) / rate * 3600)
+        return result
+
+def parse_utc_timestamp(value):
+    """Epoch-секунди з ISO-мітки; мітка без часового поясу вважається UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def format_utc_timestamp(ts):
+    """ISO-мітка UTC з явним поясом (+00:00), яку браузер розбирає однозначно."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
@@ -0,0 +1,190 @@
+"""Інжест рівнів заряду з WebSocket API Home Assistant."""
+import json
+import logging
+import random
+import threading
+import time
+
+from .metrics import HA_INGEST_BATCHES, HA_INGEST_CONNECTED, HA_INGEST_EVENTS, HA_INGEST_RECONNECTS
+from .validation import parse_level
+
+# websocket-client імпортується лише під час старту інжесту: без ha_ingest
+# він не потрібен, а його імпорт помітно подовжує холодний старт на armv7
+websocket = None
+
+logger = logging.getLogger(__name__)
+
+# Стани сутностей, коли інтеграція не знає значення
+UNAVAILABLE_STATES = ('unknown', 'unavailable')
+
+def parse_ha_level(value, allow_missing=False):
+    """Рівень заряду зі стану сутності HA.
+
+    unknown/unavailable - None з allow_missing (сенсор без даних), інакше
+    ValueError, як і для будь-якого нечислового стану: такі стани пропускаються.
+    """
+    if value in UNAVAILABLE_STATES:
+        if allow_missing:
+            return None
+        raise ValueError(f"Battery level is {value}")
+    return parse_level(value)
+
+def _import_websocket():
+    """Імпортує websocket-client при першому старті інжесту. False, якщо його не встановлено."""
+    global websocket
+    if websocket is None:
+        try:
+            import websocket as module
+        except ImportError:  # потрібен лише для інжесту з Home Assistant
+            return False
+        websocket = module
+    return True
+
+class HomeAssistantIngest:
+    """Одне постійне з'єднання з WebSocket API Home Assistant.
+
+    Підписується на зміни станів (state_changed) лише потрібних сутностей
+    і одразу запитує їхні поточні стани. parse_level перетворює стан на
+    значення або кидає ValueError - такі стани пропускаються. Зміни
+    накопичуються впродовж batch_interval, для кожної батареї лишається
+    останнє значення, і пакет застосовується однією мутацією через apply.
+    Після розриву з'єднання перепідключається з експоненційною затримкою
+    (з джитером) до max_backoff.
+    """
+
+    SUBSCRIBE_ID = 1
+    GET_STATES_ID = 2
+
+    def __init__(self, url, token, entities, apply, parse_level,
+                 batch_interval=0.5, max_backoff=60):
+        self.url = url
+        self.token = token
+        self.entities = entities
+        self.apply = apply
+        self.parse_level = parse_level
+        self.batch_interval = batch_interval
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+        self._subscribed = False
+        self._thread = None
+        self._ws = None
+
+    def start(self):
+        """Запускає фоновий потік. Повертає False, якщо інжест неможливий (причина - у лозі)."""
+        if not _import_websocket():
+            logger.error("Home Assistant ingest is enabled but websocket-client is not installed")
+            return False
+        if not self.entities:
+            logger.error("Home Assistant ingest is enabled but no sensor has an 'entity'")
+            return False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ha-ingest', daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """Закриває з'єднання; накопичений пакет встигає застосуватися."""
+        self._stop_event.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        delay = 1
+        while not self._stop_event.is_set():
+            try:
+                self._session()
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning(f"Home Assistant connection to {self.url} lost: {e}")
+            HA_INGEST_CONNECTED.set(0)
+            if self._subscribed:
+                # З'єднання працювало: відлік затримки починаємо спочатку
+                delay = 1
+                self._subscribed = False
+            if self._stop_event.wait(delay * random.uniform(0.5, 1.0)):
+                break
+            HA_INGEST_RECONNECTS.inc()
+            delay = min(delay * 2, self.max_backoff)
+
+    def _session(self):
+        ws = websocket.create_connection(self.url, timeout=10)
+        self._ws = ws
+        try:
+            self._authenticate(ws)
+            ws.send(json.dumps({"id": self.SUBSCRIBE_ID, "type": "subscribe_trigger",
+                                "trigger": {"platform": "state", "entity_id": list(self.entities)}}))
+            ws.send(json.dumps({"id": self.GET_STATES_ID, "type": "get_states"}))
+            self._receive(ws)
+        finally:
+            self._ws = None
+            ws.close()
+
+    def _authenticate(self, ws):
+        message = json.loads(ws.recv())
+        if message.get('type') == 'auth_required':
+            ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+            message = json.loads(ws.recv())
+        if message.get('type') != 'auth_ok':
+            raise ConnectionError(f"Home Assistant authentication failed: {message.get('message', message.get('type'))}")
+
+    def _receive(self, ws):
+        pending = {}
+        deadline = None
+        ws.settimeout(self.batch_interval)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    raw = ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    raw = None
+                if raw:
+                    self._handle(json.loads(raw), pending)
+                    if pending and deadline is None:
+                        deadline = time.monotonic() + self.batch_interval
+                if pending and (raw is None or time.monotonic() >= deadline):
+                    self._flush(pending)
+                    pending, deadline = {}, None
+        finally:
+            if pending:
+                self._flush(pending)
+
+    def _handle(self, message, pending):
+        kind = message.get('type')
+        if kind == 'event':
+            trigger = (message.get('event') or {}).get('variables', {}).get('trigger', {})
+            self._collect(trigger.get('entity_id'), (trigger.get('to_state') or {}).get('state'), pending)
+        elif kind == 'result':
+            if not message.get('success'):
+                raise ConnectionError(f"Home Assistant request {message.get('id')} failed: {message.get('error')}")
+            if message.get('id') == self.SUBSCRIBE_ID:
+                self._subscribed = True
+                HA_INGEST_CONNECTED.set(1)
+                logger.info(f"Subscribed to {len(self.entities)} Home Assistant entities at {self.url}")
+            elif message.get('id') == self.GET_STATES_ID:
+                for entity in message.get('result') or []:
+                    self._collect(entity.get('entity_id'), entity.get('state'), pending)
+
+    def _collect(self, entity_id, raw_state, pending):
+        sensor_id = self.entities.get(entity_id)
+        if sensor_id is None:
+            return
+        HA_INGEST_EVENTS.inc()
+        try:
+            pending[sensor_id] = self.parse_level(raw_state)
+        except ValueError:
+            pass
+
+    def _flush(self, pending):
+        try:
+            self.apply(list(pending.items()))
+        except Exception:
+            logger.exception("Failed to apply a batch of Home Assistant updates")
+            return
+        HA_INGEST_BATCHES.inc()
@@ -0,0 +1,122 @@
+"""Фільтрація та обмеження частоти вхідних даних."""
+import logging
+import threading
+import time
+
+from .metrics import INGEST_SUPPRESSED
+
+logger = logging.getLogger(__name__)
+
+class IngestFilter:
+    """Deadband і мінімальний інтервал оновлень для кожного сенсора.
+
+    Значення, що відрізняється від останнього прийнятого менше ніж на
+    deadband, відкидається. Значення, що прийшло раніше за min_interval після
+    останнього прийнятого, відкладається: фоновий потік застосує останнє
+    відкладене, щойно інтервал мине, тож фінальний рівень не губиться.
+    Кожне придушення рахується в battery_ingest_suppressed_total.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings  # id -> (deadband, min_interval)
+        self._accepted = {}  # id -> (значення, monotonic-час прийняття)
+        self._deferred = {}  # id -> останнє відкладене значення
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def admit(self, readings):
+        """Повертає для кожної пари (id, value) None (прийнято) або причину придушення."""
+        now = time.monotonic()
+        reasons = []
+        with self._lock:
+            for sensor_id, value in readings:
+                deadband, min_interval = self.settings.get(sensor_id, (0, 0))
+                last = self._accepted.get(sensor_id)
+                reason = None
+                if last is not None:
+                    last_value, last_at = last
+                    if (deadband and value is not None and last_value is not None
+                            and abs(value - last_value) < deadband):
+                        reason = 'deadband'
+                        # Рівень повернувся до прийнятого: відкладене значення застаріло
+                        self._deferred.pop(sensor_id, None)
+                    elif min_interval and now - last_at < min_interval:
+                        reason = 'interval'
+                        self._deferred[sensor_id] = value
+                if reason is None:
+                    self._accepted[sensor_id] = (value, now)
+                    self._deferred.pop(sensor_id, None)
+                reasons.append(reason)
+        for reason in reasons:
+            if reason is not None:
+                INGEST_SUPPRESSED.labels(reason).inc()
+        return reasons
+
+    def due(self):
+        """Забирає відкладені значення, чий інтервал уже минув, і позначає їх прийнятими."""
+        now = time.monotonic()
+        readings = []
+        with self._lock:
+            for sensor_id, value in list(self._deferred.items()):
+                _, last_at = self._accepted[sensor_id]
+                if now - last_at >= self.settings[sensor_id][1]:
+                    del self._deferred[sensor_id]
+                    self._accepted[sensor_id] = (value, now)
+                    readings.append((sensor_id, value))
+        return readings
+
+    def _flush_loop(self, apply, tick):
+        while not self._stop_event.wait(tick):
+            readings = self.due()
+            if readings:
+                try:
+                    apply(readings)
+                except Exception:
+                    logger.exception("Failed to apply deferred readings")
+
+    def start(self, apply, tick=1.0):
+        """Запускає фоновий потік, що застосовує відкладені значення через apply."""
+        if self._thread is None and any(interval for _, interval in self.settings.values()):
+            self._thread = threading.Thread(target=self._flush_loop, args=(apply, tick),
+                                            name='ingest-deferred', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+class RateLimiter:
+    """Token bucket на кожен ключ (IP клієнта): rate запитів за секунду з запасом burst."""
+
+    # Скільки ключів тримати в пам'яті, перш ніж прибрати повністю поповнені корзини
+    MAX_BUCKETS = 10000
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {}  # ключ -> (токени, monotonic-час оновлення)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Знімає токен. Повертає 0, якщо запит дозволено, інакше секунди до наступного токена."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        full = [key for key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
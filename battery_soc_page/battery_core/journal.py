@@ -0,0 +1,119 @@
+"""Журнал оновлень стану (append-only NDJSON) із груповим fsync."""
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+def run_blocking(func, *args):
+    """Викликає func(*args) у справжньому потоці ОС, якщо threading підмінено eventlet.
+
+    Під eventlet-воркером gunicorn threading.Thread - це green-потік, і
+    блокуючий виклик (fsync, rename) у ньому зупиняє весь цикл подій: SSE,
+    Socket.IO і запити, що чекають на wait_durable. tpool виконує такий
+    виклик в окремому потоці, а поточний green-потік лише чекає результату.
+    """
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher is not None and patcher.is_monkey_patched('thread'):
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
+
+def fsync_directory(path):
+    """fsync каталогу файлу path, щоб rename/створення файлу пережили збій живлення."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class Journal:
+    """Файл, у який лише дописуються рядки {"v": версія, "t": час, "r": [[id, рівень], ...]}.
+
+    Один запис - одна публікація знімка SensorState; значення з власним
+    часом (отримане від піра) має третій елемент [id, рівень, час]. append
+    пише пакет рядків і робить один fsync на весь пакет; якщо запис не
+    вдався, файл обрізається до останнього цілого рядка, щоб хвіст не
+    зіпсував наступні записи. reset очищає журнал після компактизації.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+        self._file = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        created = not os.path.exists(self.path)
+        self._file = open(self.path, 'ab')
+        self.size = self._file.tell()
+        if self.size:
+            # Обірваний збоєм останній рядок відрізаємо, інакше з ним злипся б наступний запис
+            with open(self.path, 'rb') as f:
+                complete = f.read().rfind(b'\n') + 1
+            if complete < self.size:
+                self._truncate(complete)
+        if created:
+            fsync_directory(self.path)
+
+    def read(self):
+        """Записи журналу по порядку. Пошкоджений рядок (обірваний збоєм запис) пропускається."""
+        records, skipped = [], 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        records.append((int(record['v']), float(record['t']), record['r']))
+                    except (ValueError, KeyError, TypeError):
+                        skipped += 1
+        except FileNotFoundError:
+            return records
+        if skipped:
+            logger.warning(f"Skipped {skipped} damaged record(s) in {self.path}")
+        return records
+
+    def append(self, lines):
+        """Дописує рядки (bytes із \\n у кінці) і чекає fsync. Повертає кількість записаних байт."""
+        data = b''.join(lines)
+        try:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            self._truncate(self.size)
+            raise
+        self.size += len(data)
+        return len(data)
+
+    def reset(self):
+        """Очищає журнал: усе в ньому вже є у файлі знімка."""
+        self._truncate(0)
+        os.fsync(self._file.fileno())
+
+    def _truncate(self, size):
+        try:
+            self._file.truncate(size)
+            self._file.seek(size)
+        except (OSError, ValueError):
+            logger.exception(f"Failed to truncate {self.path}")
+            return
+        self.size = size
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def encode_record(version, timestamp, readings):
+    """Рядок журналу для однієї публікації знімка."""
+    return json.dumps({"v": version, "t": timestamp, "r": readings},
+                      separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
@@ -0,0 +1,183 @@
+"""Опції аддона (options.json), спільні налаштування і реєстр сенсорів."""
+import json
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = "Усі"
+
+def read_addon_options(path):
+    """Повертає опції аддона з options.json (або порожній словник)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def addon_option(options, name, default):
+    """Опція аддона: змінна середовища NAME > options.json > default (тип - як у default)."""
+    value = os.environ.get(name.upper(), options.get(name, default))
+    if isinstance(default, bool):
+        return str(value).lower() in ('1', 'true', 'yes')
+    return type(default)(value)
+
+class AddonSettings:
+    """Налаштування, спільні для обох аддонів: options.json, перекриті змінними середовища.
+
+    Аддон читає їх один раз при старті; власні опції бере через option().
+    """
+
+    def __init__(self, options_file):
+        self.options = read_addon_options(options_file)
+        option = self.option
+        # Фільтрація вхідних даних (значення за замовчуванням; сенсор може перевизначити):
+        # зміни, менші за deadband відсоткових пунктів, ігноруються, а частіші за
+        # min_interval секунд відкладаються й застосовуються, коли інтервал мине
+        self.deadband = option('deadband', 0.0)
+        self.min_interval = option('min_interval', 0.0)
+        # Token bucket на IP клієнта для POST-ендпоінтів: запитів за секунду (0 - вимкнено) і запас
+        self.rate_limit = option('rate_limit', 0.0)
+        self.rate_burst = option('rate_burst', 20)
+        # Аналітика розряду: постійна часу EWMA швидкості (секунди) і стрибок рівня
+        # (відсоткових пунктів між сусідніми значеннями), що вважається аномалією
+        self.rate_window = option('rate_window', 900.0)
+        self.sudden_change = option('sudden_change', 10.0)
+        # Кожне оновлення дописується в журнал; повний знімок стану у файл пишеться
+        # не частіше ніж раз на compact_interval секунд (або коли журнал виріс)
+        self.compact_interval = option('compact_interval', 300.0)
+        # Реплікація: sync_upstream - URL агрегатора, куди надсилати власні зміни;
+        # sync_token - спільний секрет пірів і агрегатора (на агрегаторі вмикає приймання)
+        self.sync_upstream = option('sync_upstream', '')
+        self.sync_token = option('sync_token', '')
+        self.sync_instance = option('sync_instance', '') or socket.gethostname()
+        # Скільки секунд збирати зміни в одну дельту для агрегатора
+        self.sync_interval = option('sync_interval', 2.0)
+        # Supervisor передає токен, якщо в config.yaml увімкнено homeassistant_api
+        self.ha_token = os.environ.get('HA_TOKEN') or os.environ.get('SUPERVISOR_TOKEN', '')
+        # REST API Home Assistant (через проксі Supervisor) для сервісів notify.*
+        self.ha_api_url = os.environ.get('HA_API_URL', 'http://supervisor/core/api')
+        # Інжест із Home Assistant: опція ha_ingest або змінна HA_INGEST (зручно для локального стабу)
+        self.ha_ingest = option('ha_ingest', False)
+        self.ha_ws_url = os.environ.get('HA_WS_URL') or self.options.get('ha_url') or 'ws://supervisor/core/websocket'
+        # Скільки секунд накопичувати зміни з Home Assistant перед застосуванням одним пакетом
+        self.ha_batch_interval = float(os.environ.get('HA_BATCH_INTERVAL', '0.5'))
+        # Скільки секунд збирати алерти, що спрацювали разом, в одне сповіщення
+        self.alert_batch_window = float(os.environ.get('ALERT_BATCH_WINDOW', '2'))
+        # Логуємо подробиці лише кожного N-го запиту, а не кожного
+        self.log_sample_every = max(1, int(os.environ.get('LOG_SAMPLE_EVERY', '100')))
+
+    def option(self, name, default):
+        """Опція аддона: змінна середовища NAME > options.json > default."""
+        return addon_option(self.options, name, default)
+
+    def load_sensors(self, path, defaults, id_type=str):
+        """load_sensor_registry з глобальними deadband і min_interval цих налаштувань."""
+        return load_sensor_registry(path, self.options, defaults, id_type=id_type,
+                                    deadband=self.deadband, min_interval=self.min_interval)
+
+class Sensor:
+    """Запис реєстру: id, назва, група, теги, entity_id у Home Assistant
+    та налаштування фільтра вхідних даних."""
+
+    __slots__ = ('id', 'name', 'group', 'tags', 'entity', 'deadband', 'min_interval')
+
+    def __init__(self, id, name, group=DEFAULT_GROUP, tags=(), entity=None, deadband=0.0, min_interval=0.0):
+        self.id = id
+        self.name = name
+        self.group = group
+        self.tags = list(tags)
+        self.entity = entity
+        self.deadband = deadband
+        self.min_interval = min_interval
+
+    def __repr__(self):
+        return f"Sensor({self.id!r}, {self.name!r}, group={self.group!r})"
+
+class SensorRegistry:
+    """Сенсори в порядку оголошення з готовими індексами для гарячих шляхів."""
+
+    def __init__(self, sensors, source):
+        self.source = source
+        self.sensors = {sensor.id: sensor for sensor in sensors}
+        # id -> назва: O(1) перевірка id при кожному оновленні
+        self.names = {sensor.id: sensor.name for sensor in self.sensors.values()}
+        # група -> список id у порядку оголошення, і зворотна карта id -> група
+        self.groups = {}
+        for sensor in self.sensors.values():
+            self.groups.setdefault(sensor.group, []).append(sensor.id)
+        self.groups = self.groups or {DEFAULT_GROUP: []}
+        self.group_of = {sensor.id: sensor.group for sensor in self.sensors.values()}
+
+    def __contains__(self, sensor_id):
+        return sensor_id in self.sensors
+
+    def __iter__(self):
+        return iter(self.sensors.values())
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def filter_settings(self):
+        """id -> (deadband, min_interval) для IngestFilter."""
+        return {sensor.id: (sensor.deadband, sensor.min_interval) for sensor in self.sensors.values()}
+
+    def entities(self):
+        """entity_id у Home Assistant -> id сенсора."""
+        return {sensor.entity: sensor.id for sensor in self.sensors.values() if sensor.entity}
+
+def load_sensor_registry(path, options, defaults, id_type=str, deadband=0.0, min_interval=0.0):
+    """Завантажує реєстр сенсорів: файл path, опції аддона або вбудований набір.
+
+    Кожен запис - {id, name, group?, tags?, entity?, deadband?, min_interval?};
+    tags - список або рядок через кому, entity - entity_id сенсора в Home
+    Assistant для інжесту, deadband і min_interval перевизначають глобальні.
+    id приводиться до id_type (int у тунельному переглядачі, str - у
+    battery_soc_page), записи з некоректним id пропускаються.
+    """
+    entries, source = None, None
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                loaded = json.load(f)
+            entries = loaded.get('sensors') if isinstance(loaded, dict) else loaded
+            source = path
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading sensor registry from {path}: {e}")
+    if not entries:
+        entries, source = options.get('sensors'), 'add-on options'
+    if not entries:
+        entries, source = defaults, 'built-in defaults'
+
+    sensors = []
+    for entry in entries:
+        raw_id = entry.get('id') if isinstance(entry, dict) else None
+        try:
+            if raw_id in (None, ''):
+                raise ValueError(raw_id)
+            sensor_id = id_type(raw_id)
+        except (TypeError, ValueError):
+            logger.warning(f"Skipping sensor without a valid id: {entry!r}")
+            continue
+        tags = entry.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        try:
+            sensor_deadband = float(entry['deadband']) if entry.get('deadband') is not None else deadband
+            sensor_interval = float(entry['min_interval']) if entry.get('min_interval') is not None else min_interval
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid deadband/min_interval for sensor {sensor_id}, using defaults")
+            sensor_deadband, sensor_interval = deadband, min_interval
+        sensors.append(Sensor(
+            sensor_id,
+            str(entry.get('name') or sensor_id),
+            group=str(entry.get('group') or DEFAULT_GROUP),
+            tags=tags,
+            entity=str(entry['entity']) if entry.get('entity') else None,
+            deadband=sensor_deadband,
+            min_interval=sensor_interval,
+        ))
+    registry = SensorRegistry(sensors, source)
+    logger.info(f"Loaded {len(registry)} sensors from {source}")
+    return registry
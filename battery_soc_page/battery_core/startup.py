@@ -0,0 +1,83 @@
+"""Життєвий цикл аддона: етапи холодного старту й перевірка здоров'я для супервізора."""
+import os
+import time
+
+from flask import jsonify
+
+from .metrics import STARTUP_SECONDS
+from .supervisor import read_supervisor_status
+
+def process_uptime(pid='self'):
+    """Секунд від запуску процесу pid за /proc; None поза Linux або коли процесу вже немає."""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            # Ім'я процесу в дужках може містити пробіли, тож поля рахуємо після нього
+            fields = f.read().rsplit(b')', 1)[1].split()
+        # starttime - 22-ге поле stat (20-те після імені), у тактах від завантаження системи;
+        # той самий відлік має CLOCK_BOOTTIME, тож годинник системи на результат не впливає
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, AttributeError, IndexError, ValueError):
+        return None
+
+class StartupClock:
+    """Етапи старту аддона відносно запуску процесу.
+
+    Відлік іде від старту master-процесу gunicorn (його pid gunicorn.conf.py
+    кладе в STARTUP_PID), тож у час входять і запуск інтерпретатора, й
+    імпорти; без gunicorn - від старту власного процесу. ready - застосунок
+    імпортовано, стан завантажено; first_request - обслуговано перший запит.
+    """
+
+    def __init__(self):
+        self.imported_at = time.monotonic()
+        uptime = process_uptime(os.environ.get('STARTUP_PID', 'self')) or process_uptime() or 0.0
+        self.started_at = self.imported_at - uptime
+        self.ready_at = None
+        self.first_request_at = None
+
+    def _phase(self, at):
+        return None if at is None else round(at - self.started_at, 3)
+
+    def mark_ready(self):
+        self.ready_at = time.monotonic()
+        STARTUP_SECONDS.labels('ready').set(self.ready_at - self.started_at)
+
+    def install(self, app):
+        """Запам'ятовує момент першого запиту застосунку app."""
+
+        @app.before_request
+        def record_first_request():
+            if self.first_request_at is None:
+                self.first_request_at = time.monotonic()
+                STARTUP_SECONDS.labels('first_request').set(self.first_request_at - self.started_at)
+
+    def report(self):
+        """Тіло відповіді ендпоінта готовності (503, поки застосунок не готовий)."""
+        body = {"status": "ready" if self.ready_at is not None else "starting",
+                "import_seconds": self._phase(self.imported_at), "ready_seconds": self._phase(self.ready_at),
+                "first_request_seconds": self._phase(self.first_request_at),
+                "uptime_seconds": round(time.monotonic() - self.started_at, 3)}
+        return jsonify(body), 200 if self.ready_at is not None else 503
+
+def health_report(startup, checks):
+    """Тіло й код відповіді /healthz.
+
+    200, якщо застосунок готовий і всі checks (назва -> bool) пройдено,
+    інакше 503 - супервізор після кількох таких відповідей перезапускає
+    бекенд. Якщо аддон працює під супервізором, у відповідь додається
+    аптайм і кількість перезапусків кожного компонента.
+    """
+    failed = ([] if startup.ready_at is not None else ['startup']) + [name for name, ok in checks.items() if not ok]
+    body = {"status": "unhealthy" if failed else "ok", "failed": failed,
+            "uptime_seconds": round(time.monotonic() - startup.started_at, 3)}
+    supervisor = read_supervisor_status()
+    if supervisor is not None:
+        now = time.time()
+        body["supervisor"] = {
+            "uptime_seconds": round(now - supervisor['started_at'], 3),
+            "components": {name: {"healthy": c['healthy'], "restarts": c['restarts'], "last_exit": c['last_exit'],
+                                  "uptime_seconds": round(now - c['started_at'], 3)
+                                  if c['running'] and c['started_at'] is not None else None}
+                           for name, c in supervisor['components'].items()},
+        }
+    return jsonify(body), 503 if failed else 200
@@ -0,0 +1,96 @@
+"""HTTP-складова: заздалегідь стиснуті відповіді, статика з хешем вмісту, IP клієнта, rate limit."""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, jsonify, request
+
+from .metrics import INGEST_SUPPRESSED
+from .push import dumps_compact
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий: без нього віддаємо gzip
+    brotli = None
+
+# Ім'я файлу змінюється разом із вмістом, тож кешувати можна без перевірок
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Типи власної статики; mimetypes.guess_type при першому виклику читає
+# системні mime.types, що помітно на старті, тож лише для решти файлів
+STATIC_MIMETYPES = {'.css': 'text/css', '.js': 'application/javascript', '.map': 'application/json',
+                    '.svg': 'image/svg+xml', '.png': 'image/png', '.ico': 'image/vnd.microsoft.icon'}
+
+class PrecompressedPage:
+    """Відповідь (HTML-сторінка чи статичний файл), зібрана один раз,
+    із сильним ETag та заздалегідь стиснутими варіантами."""
+
+    def __init__(self, body, mimetype='text/html', cache_control='no-cache'):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {'gzip': gzip.compress(self.body, 9)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(self.body)
+
+    def response(self):
+        """Віддає найкращий прийнятний варіант або 304 Not Modified."""
+        accepted = request.accept_encodings
+        encoding = next((e for e in ('br', 'gzip') if e in self.variants and accepted[e]), None)
+        response = Response(self.variants[encoding] if encoding else self.body, mimetype=self.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        # Кожен варіант має власне тіло, отже й власний сильний ETag
+        response.set_etag(f"{self.etag}-{encoding}" if encoding else self.etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response.make_conditional(request)
+
+def load_static_assets(directory):
+    """Читає static/ один раз при старті.
+
+    Повертає (файли, маніфест): файли - хешоване ім'я -> PrecompressedPage,
+    маніфест - вихідне ім'я -> URL з хешем вмісту (dashboard.3f2a9c1b.js).
+    """
+    assets, manifest = {}, {}
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, directory).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                body = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+            mimetype = (STATIC_MIMETYPES.get(ext) or mimetypes.guess_type(filename)[0]
+                        or 'application/octet-stream')
+            assets[hashed] = PrecompressedPage(body, mimetype, IMMUTABLE_CACHE)
+            manifest[name] = f"/static/{hashed}"
+    return assets, manifest
+
+def script_json(obj):
+    """JSON для вбудовування у <script>: "</" екрануємо, щоб назва не закрила тег."""
+    return dumps_compact(obj).replace('</', '<\\/')
+
+def client_ip():
+    """IP клієнта; за cloudflared (з'єднання з loopback) - із заголовка CF-Connecting-IP."""
+    remote = request.remote_addr or ''
+    if remote in ('127.0.0.1', '::1'):
+        return request.headers.get('CF-Connecting-IP', remote)
+    return remote
+
+def install_rate_limit(app, rate_limiter, routes, error_body):
+    """429 з Retry-After для клієнта, що вичерпав свій token bucket на POST-маршрутах routes."""
+
+    @app.before_request
+    def enforce_rate_limit():
+        if request.method != 'POST' or request.url_rule is None or request.url_rule.rule not in routes:
+            return None
+        wait = rate_limiter.acquire(client_ip())
+        if wait:
+            INGEST_SUPPRESSED.labels('rate_limited').inc()
+            response = jsonify(error_body)
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+            return response
+        return None
@@ -0,0 +1,35 @@
+"""Компактний колонковий формат відповідей і push-подій.
+
+Замість словника на кожну батарею - рядок [id, рівень, epoch-секунди,
+rate, time_to_empty, time_to_full, anomalies], у якого порожній хвіст
+аналітики відкинуто, тож типовий рядок - просто [id, рівень, час]. Назви
+полів (і назви сенсорів, де вони потрібні) надсилаються один раз - у
+повній відповіді, а не в кожному записі. Клієнт обирає формат заголовком
+Accept або параметром ?format=columnar (EventSource заголовків не задає);
+за замовчуванням лишається звичайний JSON.
+"""
+from .push import dumps_compact
+
+COLUMNAR_MIMETYPE = 'application/vnd.battery.columnar+json'
+COLUMNAR_FIELDS = ('id', 'level', 'timestamp', 'rate', 'time_to_empty', 'time_to_full', 'anomalies')
+
+def wants_columnar(request):
+    """True, якщо клієнт просить колонковий формат (?format=columnar або Accept)."""
+    requested = request.args.get('format')
+    if requested:
+        return requested == 'columnar'
+    return request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+def reading_row(sensor_id, reading, missing_level=None):
+    """Рядок колонкового формату для Reading (missing_level - рівень, коли даних немає)."""
+    row = [sensor_id, reading.level if reading.level is not None else missing_level,
+           round(reading.timestamp, 3) if reading.timestamp is not None else None,
+           reading.rate, reading.time_to_empty, reading.time_to_full, reading.anomalies]
+    # Нульовий rate - значення, тож відкидаємо лише None і порожній список аномалій
+    while len(row) > 3 and (row[-1] is None or row[-1] == []):
+        row.pop()
+    return row
+
+def encode_columnar(rows, **fields):
+    """Тіло колонкової відповіді: {"fields": [...], "rows": [...], ...fields}."""
+    return dumps_compact({"fields": COLUMNAR_FIELDS, "rows": rows, **fields})
@@ -0,0 +1,41 @@
+# Конфигурация gunicorn для production-режима аддона (вместо socketio.run)
+import json
+import os
+
+OPTIONS_FILE = '/data/options.json'
+
+def _option(name, default):
+    """Возвращает опцию аддона из options.json, переменной окружения или значение по умолчанию."""
+    try:
+        with open(OPTIONS_FILE) as f:
+            value = json.load(f).get(name)
+    except (OSError, ValueError):
+        value = None
+    if value is None:
+        value = os.environ.get(name.upper(), default)
+    return value
+
+# pid master-процесса: воркер считает от его запуска этапы холодного старта (см. /api/ready)
+os.environ['STARTUP_PID'] = str(os.getpid())
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Состояние датчиков живёт в памяти процесса, а Socket.IO без брокера
+# сообщений работает только с одним воркером. Параллельность дают
+# green-потоки eventlet: каждое websocket-соединение - это green-поток.
+workers = 1
+worker_class = 'eventlet'
+# Сколько одновременных соединений (включая websocket) держит воркер
+worker_connections = int(_option('worker_connections', 1000))
+
+# Для async-воркера timeout - это только heartbeat, долгие websocket его не затрагивают
+timeout = 60
+# Меньше, чем супервизор ждёт бэкенд при остановке (BACKEND_STOP_TIMEOUT = 8 с)
+graceful_timeout = 6
+# Дольше keepalive cloudflared, чтобы туннель переиспользовал соединения
+keepalive = 75
+
+accesslog = None
+# log_level аддона (или LOG_LEVEL), как в local_battery_viewer_tunnel; уровня fatal
+# в gunicorn нет, ближайший - critical
+loglevel = {'fatal': 'critical'}.get(_option('log_level', 'info'), _option('log_level', 'info'))
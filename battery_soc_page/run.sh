@@ -1,7 +1,26 @@
 #!/bin/sh
 
-# Start Cloudflare Tunnel in background
-cloudflared tunnel run --url http://localhost:5000 ${tunnel_id} &
+# Токен тунеля из настроек аддона (jq в образе нет, читаем через python)
+TUNNEL_TOKEN=$(python3 -c "import json; print(json.load(open('/data/options.json')).get('tunnel_token', ''))" 2>/dev/null)
+# Сервер метрик cloudflared: его /ready - проверка здоровья туннеля
+TUNNEL_METRICS=127.0.0.1:8098
 
-# Start Flask server
-python app.py
+set -- --backend "gunicorn --config /app/gunicorn.conf.py --chdir /app app:app" \
+    --backend-health http://127.0.0.1:5000/healthz
+
+if [ -z "$TUNNEL_TOKEN" ]; then
+    # Без туннеля страница остаётся доступной в локальной сети
+    echo "WARNING: tunnel_token is not set, serving locally on port 5000 only."
+elif ! command -v cloudflared >/dev/null; then
+    echo "WARNING: cloudflared is not installed, serving locally on port 5000 only."
+else
+    # Токен передаётся через окружение, а не в командной строке (её видно в ps)
+    export TUNNEL_TOKEN
+    # --grace-period: при остановке аддона cloudflared ждёт незавершённые запросы 2 с вместо 30
+    set -- "$@" --tunnel "cloudflared tunnel --no-autoupdate --grace-period 2s --metrics $TUNNEL_METRICS run" \
+        --tunnel-health "http://$TUNNEL_METRICS/ready"
+fi
+
+# Супервизор - главный процесс: перезапускает gunicorn, если /healthz не отвечает,
+# и cloudflared, если туннель не готов; падение туннеля не останавливает страницу
+exec python3 /app/battery_core/supervisor.py "$@"
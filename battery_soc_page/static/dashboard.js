@@ -0,0 +1,131 @@
+// Данные страницы приходят JSON-блоком, поэтому сам скрипт статичен
+// и кэшируется браузером навсегда (в имени файла - хэш содержимого).
+const CONFIG = JSON.parse(document.getElementById('dashboard-config').textContent);
+const EPOCH = CONFIG.epoch;
+// Группа страницы: сервер присылает изменения только её датчиков
+const GROUP = CONFIG.group;
+let currentEpoch = EPOCH;
+let currentVersion = CONFIG.version;
+// Пороги цвета индикатора (SOC <= порога), те же, что у сервера
+const THRESHOLDS = CONFIG.thresholds;
+
+function levelClass(socNum) {
+    if (socNum <= THRESHOLDS.critical) return 'color-danger';
+    return socNum <= THRESHOLDS.warning ? 'color-warning' : 'color-success';
+}
+
+function renderUnit(unit, value) {
+    const soc = (value !== null && value !== undefined) ? value : 'N/A';
+    const level = unit.querySelector('.battery-level');
+    const segments = unit.querySelector('.battery-segments');
+    level.textContent = `${soc}%`;
+    // Приведение к числу для сравнения
+    const socNum = (soc === 'N/A') ? -1 : parseFloat(soc);
+    level.className = 'battery-level ' + levelClass(socNum);
+    segments.innerHTML = '';
+    for (let i = 0; i < 10; i++) {
+        const segment = document.createElement('div');
+        segment.className = 'segment';
+        if (socNum >= 0 && (i * 10) < socNum) {
+            segment.classList.add(levelClass(socNum));
+        }
+        segments.appendChild(segment);
+    }
+}
+
+const ANOMALY_LABELS = {
+    sudden_drop: 'Різке падіння',
+    sudden_rise: 'Різке зростання',
+    fast_drain: 'Швидкий розряд',
+};
+
+function formatDuration(seconds) {
+    const minutes = Math.round(seconds / 60);
+    if (minutes < 60) return `${minutes} хв`;
+    const hours = Math.floor(minutes / 60);
+    if (hours >= 48) return `${Math.round(hours / 24)} дн`;
+    return `${hours} год ${minutes % 60} хв`;
+}
+
+// Прогноз и аномалии сервер считает инкрементально при каждом изменении
+function renderForecast(unit, analytics) {
+    const el = unit.querySelector('.forecast-text');
+    const { rate, time_to_empty, time_to_full, anomalies } = analytics || {};
+    const parts = [];
+    if (time_to_empty !== null && time_to_empty !== undefined) {
+        parts.push(`≈ ${formatDuration(time_to_empty)} до розряду (${rate}%/год)`);
+    } else if (time_to_full !== null && time_to_full !== undefined) {
+        parts.push(`≈ ${formatDuration(time_to_full)} до повного заряду (+${rate}%/год)`);
+    }
+    (anomalies || []).forEach(flag => parts.push(`⚠ ${ANOMALY_LABELS[flag] || flag}`));
+    el.textContent = parts.join(' · ');
+    el.classList.toggle('anomaly', (anomalies || []).length > 0);
+}
+
+function applyValues(values, analytics) {
+    for (const sn in values) {
+        const unit = document.querySelector(`.indicator-unit[data-sn="${sn}"]`);
+        if (unit) {
+            renderUnit(unit, values[sn]);
+            if (analytics) renderForecast(unit, analytics[sn]);
+        }
+    }
+}
+
+function applyAnalytics(analytics) {
+    document.querySelectorAll('.indicator-unit').forEach(unit => renderForecast(unit, analytics[unit.dataset.sn]));
+}
+
+// Сервер шлёт датчики компактными строками [sn, soc, epoch, rate, time_to_empty,
+// time_to_full, anomalies] без пустого хвоста; разворачиваем их в прежние словари
+function decodeRows(rows) {
+    const values = {};
+    const analytics = {};
+    const updated = {};
+    for (const [sn, soc, epoch, rate = null, time_to_empty = null, time_to_full = null, anomalies = []] of rows) {
+        values[sn] = soc;
+        analytics[sn] = { rate, time_to_empty, time_to_full, anomalies };
+        updated[sn] = epoch;
+    }
+    return { values, analytics, updated };
+}
+
+function applyUpdated(updated) {
+    for (const sn in updated) {
+        const unit = document.querySelector(`.indicator-unit[data-sn="${sn}"]`);
+        if (unit && updated[sn] !== null) {
+            unit.querySelector('.timestamp-text').textContent =
+                `Оновлено: ${new Date(updated[sn] * 1000).toLocaleTimeString('uk-UA')}`;
+        }
+    }
+}
+
+applyAnalytics(CONFIG.analytics || {});
+
+const socket = io();
+// Просим колоночный формат: меньше трафика через туннель
+function resync() {
+    socket.emit('resync', {epoch: currentEpoch, version: currentVersion, group: GROUP, format: 'columnar'});
+}
+// При (пере)подключении сообщаем последнюю известную версию и получаем только пропущенное
+socket.on('connect', resync);
+socket.on('soc_snapshot', (msg) => {
+    const { values, analytics, updated } = msg.rows ? decodeRows(msg.rows) : { values: msg.data, analytics: msg.analytics };
+    document.querySelectorAll('.indicator-unit').forEach(unit => renderUnit(unit, values[unit.dataset.sn]));
+    applyAnalytics(analytics || {});
+    applyUpdated(updated || {});
+    currentEpoch = msg.epoch;
+    currentVersion = msg.version;
+});
+socket.on('soc_delta', (msg) => {
+    if (msg.version <= currentVersion && msg.epoch === currentEpoch) return;
+    if (msg.epoch !== currentEpoch || msg.base > currentVersion) {
+        // Пропущены изменения: запрашиваем недостающее
+        resync();
+        return;
+    }
+    const { values, analytics, updated } = msg.rows ? decodeRows(msg.rows) : { values: msg.changes, analytics: msg.analytics };
+    applyValues(values, analytics);
+    applyUpdated(updated || {});
+    currentVersion = msg.version;
+});
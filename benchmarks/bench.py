@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""Навантажувальні бенчмарки обох аддонів локально, без Cloudflare-тунелю.
+
+Кожен сценарій запускає app.py аддона під gunicorn із тією ж конфігурацією,
+що й у контейнері (gunicorn.conf.py), на тимчасових файлах даних, і вимірює:
+пропускну здатність, p50/p99 латентності, помилки та RSS процесів сервера.
+
+Сценарії:
+    tunnel-poll    - багато одночасних опитувачів GET /data
+    tunnel-ingest  - постійний потік POST /data від сенсорів
+    tunnel-sse     - розсилка змін N SSE-клієнтам (/events)
+    tunnel-page    - холодне завантаження сторінки тунельного переглядача
+    soc-ingest     - постійний потік POST /api/battery_soc
+    soc-fanout     - розсилка змін N клієнтам Socket.IO
+    soc-page       - холодне завантаження сторінки battery_soc_page
+
+Результати пишуться у JSON (за замовчуванням benchmarks/results/), щоб два
+прогони можна було порівняти через compare.py.
+
+    pip install -r battery_soc_page/requirements.txt -r benchmarks/requirements.txt
+    python3 benchmarks/bench.py                              # усі сценарії
+    python3 benchmarks/bench.py tunnel-poll --clients 200 --duration 10
+    python3 benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+
+Клієнти працюють потоками в одному процесі, тож абсолютні числа обмежені
+й самим генератором навантаження; для пошуку регресій важливе порівняння
+прогонів на одній машині.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+# =================================================================
+# ЗАПУСК СЕРВЕРА АДДОНА
+# =================================================================
+
+class AddonServer:
+    """Запускає аддон під gunicorn на вільному порту з тимчасовими даними."""
+
+    def __init__(self, addon, ready_path, env=None, poll_interval=0.1):
+        self.addon = addon
+        self.ready_path = ready_path
+        self.extra_env = env or {}
+        self.poll_interval = poll_interval
+        self.port = free_port()
+        self.workdir = tempfile.TemporaryDirectory(prefix=f'bench-{addon}-')
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def start(self):
+        env = dict(os.environ)
+        env.update({
+            'PORT': str(self.port),
+            'DATA_FILE': os.path.join(self.workdir.name, 'data.json'),
+            'HISTORY_FILE': os.path.join(self.workdir.name, 'history.db'),
+            'WORKER_CONNECTIONS': '5000',
+            # Логи на кожен запит спотворили б вимірювання
+            'LOG_SAMPLE_EVERY': '1000000',
+            'LOG_LEVEL': 'warning',
+        })
+        if sys.version_info < (3, 12):
+            # Як у Dockerfile: distutils зі stdlib замість копії з setuptools (див. startup.py)
+            env.setdefault('SETUPTOOLS_USE_DISTUTILS', 'stdlib')
+        env.update(self.extra_env)
+        self.log = open(os.path.join(self.workdir.name, 'server.log'), 'a')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+            cwd=os.path.join(REPO_ROOT, self.addon), env=env,
+            stdout=self.log, stderr=subprocess.STDOUT)
+        self._wait_ready()
+
+    def _wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.addon} exited with code {self.process.returncode}, "
+                                   f"see {self.log.name}")
+            try:
+                status, _, _ = http_request(self.port, 'GET', self.ready_path)
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(self.poll_interval)
+        raise RuntimeError(f"{self.addon} did not become ready within {timeout} s")
+
+    def rss_bytes(self):
+        """Сумарний RSS майстра gunicorn і всіх його нащадків (Linux /proc)."""
+        pids = descendants(self.process.pid) | {self.process.pid}
+        total = 0
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            total += int(line.split()[1]) * 1024
+            except OSError:
+                continue
+        return total
+
+    def stop(self):
+        """Зупиняє сервер, зберігаючи порт і файли даних для повторного start()."""
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+    def __exit__(self, *exc):
+        if self.process.poll() is None:
+            self.stop()
+        self.workdir.cleanup()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def descendants(root):
+    """Усі нащадки процесу root (за полем ppid у /proc/<pid>/stat)."""
+    parents = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # Ім'я процесу в дужках може містити пробіли
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(name))
+    found, stack = set(), [root]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.add(child)
+            stack.append(child)
+    return found
+
+class RssSampler:
+    """Фоново знімає RSS сервера, щоб звітувати пік за сценарій."""
+
+    def __init__(self, server, interval=0.25):
+        self.server = server
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(self.server.rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(self.server.rss_bytes())
+
+    def summary(self):
+        return {
+            'rss_max_mb': round(max(self.samples) / 2 ** 20, 1),
+            'rss_end_mb': round(self.samples[-1] / 2 ** 20, 1),
+        }
+
+# =================================================================
+# ГЕНЕРАЦІЯ НАВАНТАЖЕННЯ
+# =================================================================
+
+def http_request(port, method, path, body=None, headers=None, conn=None):
+    """Один запит; повертає (статус, тіло, заголовки). Без conn - нове з'єднання."""
+    own = conn is None
+    if own:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.read(), dict(response.getheaders())
+    finally:
+        if own:
+            conn.close()
+
+def run_http_load(port, clients, duration, make_request, rate=None, keepalive=True):
+    """Запускає clients потоків, що протягом duration надсилають запити.
+
+    make_request(client, seq) повертає (method, path, body, headers). Без rate
+    кожен клієнт шле запити впритул (closed loop); з rate - з фіксованою
+    частотою rate запитів/с на клієнта, як справжні сенсори.
+    """
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    response_bytes = [0] * clients
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(client):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10) if keepalive else None
+        barrier.wait()
+        started = time.perf_counter()
+        deadline = started + duration
+        seq = 0
+        while True:
+            if rate:
+                next_at = started + seq / rate
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if time.perf_counter() >= deadline:
+                break
+            method, path, body, headers = make_request(client, seq)
+            seq += 1
+            t0 = time.perf_counter()
+            try:
+                status, payload, _ = http_request(port, method, path, body, headers, conn)
+            except (OSError, http.client.HTTPException):
+                errors[client] += 1
+                if conn is not None:
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                continue
+            latencies[client].append(time.perf_counter() - t0)
+            response_bytes[client] += len(payload)
+            if status >= 400:
+                errors[client] += 1
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    flat = [x for per_client in latencies for x in per_client]
+    result = latency_summary(flat, elapsed)
+    result['errors'] = sum(errors)
+    result['bytes_per_response'] = round(sum(response_bytes) / len(flat), 1) if flat else 0
+    return result
+
+def latency_summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def json_request(method, path, payload):
+    return method, path, json.dumps(payload), {'Content-Type': 'application/json'}
+
+# =================================================================
+# СЦЕНАРІЇ
+# =================================================================
+
+def scenario_tunnel_poll(server, args):
+    return run_http_load(server.port, args.clients, args.duration,
+                         lambda client, seq: ('GET', '/data', None, {}))
+
+def scenario_tunnel_ingest(server, args):
+    return run_http_load(server.port, args.senders, args.duration,
+                         lambda client, seq: json_request('POST', '/data', {'id': client % 3 + 1, 'level': seq % 101}),
+                         rate=args.rate)
+
+def scenario_soc_ingest(server, args):
+    return run_http_load(server.port, args.senders, args.duration,
+                         lambda client, seq: json_request('POST', '/api/battery_soc', {str(client % 5 + 1): seq % 101}),
+                         rate=args.rate)
+
+def scenario_page(server, args):
+    # Нове з'єднання і жодного If-None-Match - як перше відкриття дашборда
+    return run_http_load(server.port, args.page_clients, args.duration,
+                         lambda client, seq: ('GET', '/', None, {'Accept-Encoding': 'gzip, br'}),
+                         keepalive=False)
+
+def run_fanout(server, args, connect_clients, post_change):
+    """Спільна частина fan-out сценаріїв: зміна рівня -> час доставки кожному клієнту.
+
+    Кожна зміна несе унікальний рівень (seq % 101), тож затримку доставки
+    рахуємо від моменту відправки POST з цим рівнем.
+    """
+    sent_at = {}
+    deliveries = []
+    lock = threading.Lock()
+
+    def on_level(level):
+        received = time.perf_counter()
+        with lock:
+            if level in sent_at:
+                deliveries.append(received - sent_at[level])
+
+    stop = connect_clients(on_level)
+    try:
+        time.sleep(1)
+        interval = 1 / args.rate
+        started = time.perf_counter()
+        seq = 0
+        while time.perf_counter() - started < args.duration:
+            level = seq % 101
+            with lock:
+                sent_at[level] = time.perf_counter()
+            post_change(level)
+            seq += 1
+            time.sleep(max(0, started + seq * interval - time.perf_counter()))
+        # Даємо останнім подіям дійти до клієнтів
+        time.sleep(1)
+        elapsed = time.perf_counter() - started
+    finally:
+        stop()
+    result = latency_summary(deliveries, elapsed)
+    result['changes'] = seq
+    result['expected_deliveries'] = seq * args.clients
+    return result
+
+def scenario_tunnel_sse(server, args):
+    def connect_clients(on_level):
+        connections = []
+        readers = []
+
+        def reader(conn):
+            try:
+                for line in conn.getresponse():
+                    if line.startswith(b'data: '):
+                        for battery in json.loads(line[6:]):
+                            on_level(battery['level'])
+            except (OSError, ValueError, AttributeError, http.client.HTTPException):
+                # Сокет закрито під час читання - клієнт зупиняється
+                pass
+            finally:
+                conn.close()
+
+        for _ in range(args.clients):
+            conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+            conn.request('GET', '/events')
+            connections.append(conn)
+            readers.append(threading.Thread(target=reader, args=(conn,), daemon=True))
+            readers[-1].start()
+
+        def stop():
+            for conn in connections:
+                try:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+                except (OSError, AttributeError):
+                    pass
+            for thread in readers:
+                thread.join(timeout=5)
+        return stop
+
+    def post_change(level):
+        http_request(server.port, 'POST', '/data', json.dumps({'id': 1, 'level': level}),
+                     {'Content-Type': 'application/json'})
+
+    return run_fanout(server, args, connect_clients, post_change)
+
+def scenario_soc_fanout(server, args):
+    import socketio
+
+    def connect_clients(on_level):
+        clients = []
+        for _ in range(args.clients):
+            client = socketio.Client(reconnection=False)
+            client.on('soc_delta', lambda msg: [on_level(int(v)) for v in msg['changes'].values() if v is not None])
+            client.connect(f'http://127.0.0.1:{server.port}', transports=['websocket'])
+            clients.append(client)
+
+        def stop():
+            for client in clients:
+                client.disconnect()
+        return stop
+
+    def post_change(level):
+        http_request(server.port, 'POST', '/api/battery_soc', json.dumps({'1': level}),
+                     {'Content-Type': 'application/json'})
+
+    return run_fanout(server, args, connect_clients, post_change)
+
+# назва -> (каталог аддона, шлях перевірки готовності, функція, параметри для звіту)
+SCENARIOS = {
+    'tunnel-poll': ('local_battery_viewer_tunnel', '/data', scenario_tunnel_poll, ('clients',)),
+    'tunnel-ingest': ('local_battery_viewer_tunnel', '/data', scenario_tunnel_ingest, ('senders', 'rate')),
+    'tunnel-sse': ('local_battery_viewer_tunnel', '/data', scenario_tunnel_sse, ('clients', 'rate')),
+    'tunnel-page': ('local_battery_viewer_tunnel', '/data', scenario_page, ('page_clients',)),
+    'soc-ingest': ('battery_soc_page', '/', scenario_soc_ingest, ('senders', 'rate')),
+    'soc-fanout': ('battery_soc_page', '/', scenario_soc_fanout, ('clients', 'rate')),
+    'soc-page': ('battery_soc_page', '/', scenario_page, ('page_clients',)),
+}
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f"сценарії для запуску (за замовчуванням усі): {', '.join(SCENARIOS)}")
+    parser.add_argument('--duration', type=float, default=10, help='тривалість кожного сценарію, с')
+    parser.add_argument('--clients', type=int, default=200, help='опитувачі / push-клієнти')
+    parser.add_argument('--senders', type=int, default=20, help='кількість сенсорів для ingest')
+    parser.add_argument('--rate', type=float, default=10, help='частота POST на сенсор, Гц')
+    parser.add_argument('--page-clients', type=int, default=4, help='паралельні холодні завантаження сторінки')
+    parser.add_argument('--output', help='файл результатів (JSON)')
+    args = parser.parse_args()
+    unknown = sorted(set(args.scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'host': {'machine': platform.machine(), 'python': platform.python_version(),
+                 'cpus': os.cpu_count()},
+        'duration': args.duration,
+        'scenarios': {},
+    }
+    for name in args.scenarios or list(SCENARIOS):
+        addon, ready_path, run, params = SCENARIOS[name]
+        print(f"{name}: running for {args.duration:g} s...", file=sys.stderr)
+        with AddonServer(addon, ready_path) as server:
+            with RssSampler(server) as rss:
+                result = run(server, args)
+        result.update(rss.summary())
+        result.update({param: getattr(args, param) for param in params})
+        report['scenarios'][name] = result
+        print(f"  {result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.3f} ms  "
+              f"p99 {result['p99_ms']:>8.3f} ms  errors {result.get('errors', 0)}  "
+              f"RSS max {result['rss_max_mb']} MB", file=sys.stderr)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['git'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+if __name__ == '__main__':
+    main()
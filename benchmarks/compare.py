@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Порівнює два файли результатів bench.py (або startup.py) і підсвічує регресії.
+
+    python3 benchmarks/compare.py base.json new.json [--threshold 10]
+
+Регресією вважається падіння пропускної здатності або зростання p50/p99
+латентності, піку RSS, часу холодного старту чи RSS у простої більше ніж
+на threshold відсотків. Код виходу 1, якщо знайдено хоча б одну регресію
+(зручно для CI). Старт порівнюйте лише між прогонами на одній архітектурі.
+"""
+import argparse
+import json
+import sys
+
+# метрика -> True, якщо більше значення краще
+METRICS = {
+    'throughput_rps': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'rss_max_mb': False,
+    # startup.py
+    'cold_start_ms': False,
+    'ready_ms': False,
+    'idle_rss_mb': False,
+}
+
+def compare(base, new, threshold):
+    """Повертає рядки звіту та кількість регресій."""
+    lines = []
+    regressions = 0
+    for scenario in sorted(set(base['scenarios']) & set(new['scenarios'])):
+        old_result, new_result = base['scenarios'][scenario], new['scenarios'][scenario]
+        lines.append(scenario)
+        for metric, higher_is_better in METRICS.items():
+            old_value, new_value = old_result.get(metric), new_result.get(metric)
+            if old_value is None or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            elif -worse > threshold:
+                flag = '  improved'
+            lines.append(f"  {metric:<15} {old_value:>10} -> {new_value:>10}  ({change:+.1f}%){flag}")
+    return lines, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10, help='допустима зміна, %%')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base: {base.get('git')} {base.get('timestamp')}  new: {new.get('git')} {new.get('timestamp')}")
+    if base.get('host') != new.get('host'):
+        print(f"warning: different hosts {base.get('host')} vs {new.get('host')}")
+    lines, regressions = compare(base, new, args.threshold)
+    print('\n'.join(lines))
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
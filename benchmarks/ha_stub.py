@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Локальний стаб WebSocket API Home Assistant для перевірки інжесту аддонів.
+
+Реалізує підмножину протоколу, яку використовують аддони: auth_required /
+auth / auth_ok, subscribe_trigger (platform: state) і get_states. Для
+підписаних сутностей генерує зміни станів із заданою частотою; з --drop-every
+періодично розриває з'єднання, щоб перевірити перепідключення з затримкою.
+
+    pip install -r benchmarks/requirements.txt
+    python3 benchmarks/ha_stub.py --port 8123 --rate 20 sensor.battery_1 sensor.battery_2
+
+    # аддон (сенсори з полем entity у /share/battery_sensors.json або SENSORS_FILE)
+    HA_INGEST=1 HA_WS_URL=ws://127.0.0.1:8123/api/websocket HA_TOKEN=stub-token \\
+        gunicorn --config gunicorn.conf.py app:app
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timezone
+
+import websockets
+
+def state_object(entity_id, state):
+    now = datetime.now(timezone.utc).isoformat()
+    return {"entity_id": entity_id, "state": state, "attributes": {"unit_of_measurement": "%"},
+            "last_changed": now, "last_updated": now}
+
+class StubHomeAssistant:
+    def __init__(self, entities, token, rate, unavailable_ratio):
+        self.token = token
+        self.rate = rate
+        self.unavailable_ratio = unavailable_ratio
+        self.levels = {entity_id: random.randint(20, 100) for entity_id in entities}
+        self.connections = set()
+
+    def next_state(self, entity_id):
+        if random.random() < self.unavailable_ratio:
+            return 'unavailable'
+        level = self.levels[entity_id] = max(0, min(100, self.levels[entity_id] + random.choice((-1, 1))))
+        return str(level)
+
+    async def handle(self, ws):
+        await ws.send(json.dumps({"type": "auth_required", "ha_version": "stub"}))
+        auth = json.loads(await ws.recv())
+        if auth.get('type') != 'auth' or auth.get('access_token') != self.token:
+            await ws.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+            return
+        await ws.send(json.dumps({"type": "auth_ok", "ha_version": "stub"}))
+        self.connections.add(ws)
+        emitters = []
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                kind, message_id = message.get('type'), message.get('id')
+                if kind == 'subscribe_trigger':
+                    entities = message.get('trigger', {}).get('entity_id') or []
+                    entities = [e for e in ([entities] if isinstance(entities, str) else entities) if e in self.levels]
+                    await ws.send(json.dumps({"id": message_id, "type": "result", "success": True, "result": None}))
+                    emitters.append(asyncio.ensure_future(self.emit_changes(ws, message_id, entities)))
+                elif kind == 'get_states':
+                    states = [state_object(e, str(level)) for e, level in self.levels.items()]
+                    await ws.send(json.dumps({"id": message_id, "type": "result", "success": True, "result": states}))
+                else:
+                    await ws.send(json.dumps({"id": message_id, "type": "result", "success": False,
+                                              "error": {"code": "unknown_command", "message": "Unknown command."}}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+            for emitter in emitters:
+                emitter.cancel()
+
+    async def emit_changes(self, ws, subscription_id, entities):
+        if not entities:
+            return
+        while True:
+            await asyncio.sleep(1 / self.rate)
+            entity_id = random.choice(entities)
+            previous = state_object(entity_id, str(self.levels[entity_id]))
+            trigger = {"platform": "state", "entity_id": entity_id,
+                       "from_state": previous, "to_state": state_object(entity_id, self.next_state(entity_id))}
+            await ws.send(json.dumps({"id": subscription_id, "type": "event",
+                                      "event": {"variables": {"trigger": trigger}, "context": None}}))
+
+    async def drop_connections(self, every):
+        while True:
+            await asyncio.sleep(every)
+            for ws in list(self.connections):
+                await ws.close()
+            if self.connections:
+                print(f"dropped {len(self.connections)} connection(s)")
+
+async def serve(args):
+    stub = StubHomeAssistant(args.entities, args.token, args.rate, args.unavailable)
+    async with websockets.serve(stub.handle, args.host, args.port):
+        print(f"stub Home Assistant on ws://{args.host}:{args.port}/api/websocket, entities: {', '.join(args.entities)}")
+        if args.drop_every:
+            await stub.drop_connections(args.drop_every)
+        else:
+            await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('entities', nargs='*', default=['sensor.battery_1', 'sensor.battery_2', 'sensor.battery_3'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--token', default='stub-token', help='очікуваний access_token')
+    parser.add_argument('--rate', type=float, default=5, help='змін станів на секунду на підписку')
+    parser.add_argument('--unavailable', type=float, default=0.0, help="частка станів 'unavailable'")
+    parser.add_argument('--drop-every', type=float, default=0, help='розривати з\'єднання кожні N секунд')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
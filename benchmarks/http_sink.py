@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Локальний приймач webhook-ів для перевірки доставки алертів аддонів.
+
+Друкує тіло кожного POST і відповідає 200. З --fail-rate частина запитів
+отримує 503 (перевірка повторів з затримкою), з --delay відповідь
+затримується (перевірка, що повільна ціль не гальмує обробку POST /data).
+
+    python3 benchmarks/http_sink.py --port 9000 --fail-rate 0.3
+
+    # аддон
+    ALERT_WEBHOOKS=http://127.0.0.1:9000/alerts gunicorn --config gunicorn.conf.py app:app
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_handler(fail_rate, delay):
+    class SinkHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if delay:
+                time.sleep(delay)
+            if random.random() < fail_rate:
+                print(f"{self.path} -> 503 (simulated failure)", flush=True)
+                self.send_response(503)
+                self.end_headers()
+                return
+            try:
+                payload = json.dumps(json.loads(body), ensure_ascii=False)
+            except ValueError:
+                payload = body.decode('utf-8', 'replace')
+            print(f"{self.path} {payload}", flush=True)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"status":"ok"}')
+
+        def log_message(self, format, *args):
+            pass
+
+    return SinkHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='частка запитів, що отримують 503')
+    parser.add_argument('--delay', type=float, default=0.0, help='затримка відповіді, с')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.fail_rate, args.delay))
+    print(f"webhook sink on http://{args.host}:{args.port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
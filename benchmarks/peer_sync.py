@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Перевірка реплікації між екземплярами на кількох локальних процесах.
+
+Запускає агрегатор (local_battery_viewer_tunnel) і N пірів під gunicorn з
+тією ж конфігурацією, що й у контейнері, на тимчасових файлах даних. Кожен
+пір має власні сенсори й надсилає зміни агрегатору через POST /sync (пір
+battery_soc_page шле на той самий /sync). Скрипт пише значення в
+пірів, чекає, поки агрегатор побачить усе в GET /data, і перевіряє:
+
+- збіжність: агрегатор віддає останні значення всіх пірів;
+- last-writer-wins: два піри пишуть той самий сенсор, перемагає пізніший запис;
+- перезапуск агрегатора: після рестарту стан відновлюється з його журналу,
+  а зміни, зроблені поки він лежав, доходять після повторних спроб пірів.
+
+    python3 benchmarks/peer_sync.py --peers 3 --writes 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench import AddonServer, http_request  # noqa: E402
+
+TOKEN = 'peer-sync-check'
+SENSORS_PER_PEER = 3
+# Сенсор, який пишуть усі піри, - для перевірки last-writer-wins
+SHARED_ID = 1000
+
+def write_sensors(path, ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([{"id": i, "name": f"Сенсор {i}", "group": f"Будинок {i // 100}"} for i in ids], f)
+
+def aggregator_levels(port):
+    status, body, _ = http_request(port, 'GET', '/data')
+    if status != 200:
+        raise RuntimeError(f"GET /data on the aggregator returned {status}")
+    return {b['id']: b['level'] for b in json.loads(body) if b['timestamp'] is not None}
+
+def wait_for(port, expected, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        levels = aggregator_levels(port)
+        if all(levels.get(i) == level for i, level in expected.items()):
+            return time.monotonic()
+        time.sleep(0.05)
+    levels = aggregator_levels(port)
+    missing = {i: (level, levels.get(i)) for i, level in expected.items() if levels.get(i) != level}
+    raise RuntimeError(f"aggregator did not converge, (expected, actual): {missing}")
+
+def post_level(port, battery_id, level):
+    status, body, _ = http_request(port, 'POST', '/data', json.dumps({"id": battery_id, "level": level}),
+                                   {'Content-Type': 'application/json'})
+    if status != 200:
+        raise RuntimeError(f"POST /data returned {status}: {body!r}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--peers', type=int, default=2)
+    parser.add_argument('--writes', type=int, default=100, help='записів у кожного піра')
+    parser.add_argument('--interval', type=float, default=0.2, help='sync_interval пірів, секунди')
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix='peer-sync-')
+    peer_ids = [[(p + 1) * 100 + i for i in range(SENSORS_PER_PEER)] + [SHARED_ID] for p in range(args.peers)]
+    aggregator_sensors = os.path.join(workdir.name, 'aggregator.json')
+    write_sensors(aggregator_sensors, sorted({i for ids in peer_ids for i in ids}))
+
+    # Той самий порт і файли даних агрегатора переживають його перезапуск
+    aggregator = AddonServer('local_battery_viewer_tunnel', '/data', env={
+        'SENSORS_FILE': aggregator_sensors, 'SYNC_TOKEN': TOKEN})
+    aggregator.__enter__()
+    peers = []
+    try:
+        for p, ids in enumerate(peer_ids):
+            sensors = os.path.join(workdir.name, f'peer{p}.json')
+            write_sensors(sensors, ids)
+            peer = AddonServer('local_battery_viewer_tunnel', '/data', env={
+                'SENSORS_FILE': sensors, 'SYNC_TOKEN': TOKEN, 'SYNC_INSTANCE': f'peer{p}',
+                'SYNC_INTERVAL': str(args.interval),
+                'SYNC_UPSTREAM': f'http://127.0.0.1:{aggregator.port}/sync'})
+            peers.append(peer.__enter__())
+
+        # 1. Збіжність: кожен пір пише свої сенсори паралельно з іншими
+        expected = {}
+        def writer(peer, ids):
+            for n in range(args.writes):
+                post_level(peer.port, ids[n % SENSORS_PER_PEER], n % 101)
+        threads = [threading.Thread(target=writer, args=(peer, ids)) for peer, ids in zip(peers, peer_ids)]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        written = time.monotonic()
+        for ids in peer_ids:
+            for n in range(args.writes):
+                expected[ids[n % SENSORS_PER_PEER]] = n % 101
+        converged = wait_for(aggregator.port, expected, args.timeout)
+        print(f"converged: {args.peers} peers x {args.writes} writes in {written - started:.2f} s, "
+              f"aggregator caught up {converged - written:.2f} s after the last write")
+
+        # 2. Last-writer-wins: пізніший запис спільного сенсора перемагає незалежно від порядку доставки
+        for p, peer in enumerate(peers):
+            post_level(peer.port, SHARED_ID, 10 + p)
+            time.sleep(0.01)
+        expected[SHARED_ID] = 10 + len(peers) - 1
+        wait_for(aggregator.port, expected, args.timeout)
+        print(f"last-writer-wins: shared sensor settled on the latest write ({expected[SHARED_ID]}%)")
+
+        # 3. Агрегатор недоступний: піри накопичують зміни й досилають їх після рестарту
+        aggregator.stop()
+        for ids, peer in zip(peer_ids, peers):
+            post_level(peer.port, ids[0], 42)
+            expected[ids[0]] = 42
+        aggregator.start()
+        wait_for(aggregator.port, expected, args.timeout)
+        print("aggregator restart: state recovered from its journal and missed deltas were delivered")
+    finally:
+        for peer in peers:
+            peer.__exit__(None, None, None)
+        aggregator.__exit__(None, None, None)
+        workdir.cleanup()
+
+if __name__ == '__main__':
+    try:
+        main()
+    except RuntimeError as e:
+        print(f"FAILED: {e}", file=sys.stderr)
+        sys.exit(1)
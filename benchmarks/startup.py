@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Холодний старт і RSS у простої обох аддонів.
+
+Кожен аддон запускається --runs разів під gunicorn із тією ж конфігурацією,
+що й у контейнері, на нових тимчасових даних. Для кожного запуску міряємо:
+
+- cold_start_ms - від запуску процесу до першої відповіді 200 ендпоінта
+  готовності (/ready, /api/ready);
+- ready_ms / import_ms - етапи, які звітує сам аддон (від старту master-
+  процесу до кінця імпортів і до готовності застосунку);
+- idle_rss_mb - сумарний RSS master-процесу й воркера через --idle секунд.
+
+Звіт (медіани й максимум cold start) пишеться у той самий формат, що й
+bench.py, з архітектурою хоста в host.machine та в імені файлу, тож
+прогони на armv7, aarch64 і amd64 порівнюються окремо через compare.py:
+
+    python3 benchmarks/startup.py --runs 10
+    python3 benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench import RESULTS_DIR, AddonServer, git_revision, http_request  # noqa: E402
+
+# назва сценарію -> (каталог аддона, ендпоінт готовності)
+ADDONS = {
+    'tunnel-startup': ('local_battery_viewer_tunnel', '/ready'),
+    'soc-startup': ('battery_soc_page', '/api/ready'),
+}
+
+def measure(addon, ready_path, idle):
+    """Один холодний старт: (cold start, звіт ендпоінта готовності, RSS у простої)."""
+    server = AddonServer(addon, ready_path, poll_interval=0.005)
+    started = time.monotonic()
+    server.__enter__()
+    try:
+        cold_start = time.monotonic() - started
+        status, body, _ = http_request(server.port, 'GET', ready_path)
+        if status != 200:
+            raise RuntimeError(f"{addon} {ready_path} returned {status}")
+        time.sleep(idle)
+        return cold_start, json.loads(body), server.rss_bytes()
+    finally:
+        server.__exit__(None, None, None)
+
+def summarize(runs):
+    cold = [cold_start * 1000 for cold_start, _, _ in runs]
+    return {
+        'runs': len(runs),
+        'cold_start_ms': round(statistics.median(cold), 1),
+        'cold_start_max_ms': round(max(cold), 1),
+        'import_ms': round(statistics.median(report['import_seconds'] for _, report, _ in runs) * 1000, 1),
+        'ready_ms': round(statistics.median(report['ready_seconds'] for _, report, _ in runs) * 1000, 1),
+        'idle_rss_mb': round(statistics.median(rss for _, _, rss in runs) / 2 ** 20, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f"аддони для запуску (за замовчуванням усі): {', '.join(ADDONS)}")
+    parser.add_argument('--runs', type=int, default=5, help='холодних стартів на аддон')
+    parser.add_argument('--idle', type=float, default=2, help='секунд простою перед виміром RSS')
+    parser.add_argument('--output', help='файл результатів (JSON)')
+    args = parser.parse_args()
+    unknown = sorted(set(args.scenarios) - set(ADDONS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'host': {'machine': platform.machine(), 'python': platform.python_version(),
+                 'cpus': os.cpu_count()},
+        'scenarios': {},
+    }
+    for name in args.scenarios or list(ADDONS):
+        addon, ready_path = ADDONS[name]
+        print(f"{name}: {args.runs} cold starts...", file=sys.stderr)
+        result = summarize([measure(addon, ready_path, args.idle) for _ in range(args.runs)])
+        report['scenarios'][name] = result
+        print(f"  cold start {result['cold_start_ms']:>7.1f} ms (max {result['cold_start_max_ms']:.1f})  "
+              f"imports {result['import_ms']:>7.1f} ms  ready {result['ready_ms']:>7.1f} ms  "
+              f"idle RSS {result['idle_rss_mb']} MB", file=sys.stderr)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-startup-{report['host']['machine']}-{report['git'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+if __name__ == '__main__':
+    try:
+        main()
+    except RuntimeError as e:
+        print(f"FAILED: {e}", file=sys.stderr)
+        sys.exit(1)
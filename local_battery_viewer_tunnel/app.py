@@ -1,341 +1,368 @@
-from flask import Flask, request, jsonify
-import json
+from flask import Flask, Response, request, jsonify, stream_with_context
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import os
-from datetime import datetime
-import threading
 import logging
+import signal
+import sys
+
+from battery_core import (AddonRuntime, AddonSettings, COLUMNAR_MIMETYPE, CRITICAL_LEVEL, EventBroadcaster,
+                          PrecompressedPage, StartupClock, WARNING_LEVEL, batch_status, dumps_compact,
+                          encode_columnar, format_utc_timestamp, health_report, install_history_route,
+                          install_rate_limit, install_request_metrics, install_sync_route, load_static_assets,
+                          parse_level, read_batch_readings, reading_row, script_json, wants_columnar)
+from battery_core.metrics import PUSH_CLIENTS
 
 # Налаштування логування для кращої діагностики в Supervisor
 logging.basicConfig(level=logging.INFO)
 
-app = Flask(__name__)
+# Етапи холодного старту (відлік від запуску процесу) для /ready і метрик
+startup = StartupClock()
+
+# Статику віддає власний маршрут /static з хешованими іменами (див. нижче)
+app = Flask(__name__, static_folder=None)
+# Компактні JSON-відповіді: кирилиця як UTF-8, без сортування ключів
+app.json.ensure_ascii = False
+app.json.sort_keys = False
 
 # Шлях до файлу даних, визначений у run.sh (зазвичай /share/battery_data.json)
 DATA_FILE = os.environ.get('DATA_FILE', '/share/battery_data.json')
 HOST_PORT = 8099
 
-# Назви систем
-BATTERY_NAMES = {
-    1: "Ліфти п2",
-    2: "Вода",
-    3: "Опалення"
-}
-
-# М'ютекс для безпечного доступу до файлу
-file_lock = threading.Lock()
-
-def get_initial_data():
-    """Повертає початковий масив даних."""
-    return [
-        {"id": 1, "name": BATTERY_NAMES[1], "level": 0, "timestamp": None},
-        {"id": 2, "name": BATTERY_NAMES[2], "level": 0, "timestamp": None},
-        {"id": 3, "name": BATTERY_NAMES[3], "level": 0, "timestamp": None},
-    ]
-
-def load_data():
-    """Завантажує дані з JSON-файлу."""
-    with file_lock:
-        if not os.path.exists(DATA_FILE):
-            data = get_initial_data()
-            save_data(data)
-            return data
-        
-        try:
-            with open(DATA_FILE, 'r') as f:
-                content = f.read()
-                return json.loads(content) if content else get_initial_data()
-        except Exception as e:
-            app.logger.error(f"Error loading data from {DATA_FILE}: {e}")
-            return get_initial_data()
-
-def save_data(data):
-    """Зберігає дані в JSON-файл."""
-    with file_lock:
-        try:
-            os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-            with open(DATA_FILE, 'w') as f:
-                json.dump(data, f, indent=4)
-        except IOError as e:
-            app.logger.error(f"Помилка запису даних у файл: {e}")
+# Опції аддона, які Supervisor передає у контейнер
+OPTIONS_FILE = os.environ.get('OPTIONS_FILE', '/data/options.json')
+# Необов'язковий файл реєстру сенсорів (має пріоритет над опціями аддона)
+SENSORS_FILE = os.environ.get('SENSORS_FILE', '/share/battery_sensors.json')
+
+# Вбудований набір систем, якщо ні файл реєстру, ні опції їх не задають
+DEFAULT_SENSORS = [
+    {"id": 1, "name": "Ліфти п2"},
+    {"id": 2, "name": "Вода"},
+    {"id": 3, "name": "Опалення"},
+]
+# Скільки індикаторів показує одна сторінка дашборда
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '24'))
+
+# База історії рівнів заряду (SQLite)
+HISTORY_FILE = os.environ.get('HISTORY_FILE', '/share/battery_history.db')
+
+# Як часто надсилати keepalive-коментар у відкриті SSE-з'єднання (секунди)
+SSE_KEEPALIVE = 25
+
+# Потокові відповіді живуть довго, а /healthz опитує супервізор - у гістограму латентності не потрапляють
+UNTIMED_ROUTES = {'/events', '/metrics', '/healthz'}
 
 # =================================================================
-# HTML/CSS/JS КОНТЕНТ (Вбудований)
+# КОНФІГУРАЦІЯ ТА РЕЄСТР СЕНСОРІВ
 # =================================================================
-# Тут використовується адаптивний HTML, який ми розробили раніше.
-# Ми передаємо BATTERY_NAMES та URL API через JavaScript.
 
-HTML_CONTENT = lambda api_url, names: f"""
-<!DOCTYPE html>
+# Фільтр вхідних даних, rate limit, аналітика, компактизація, реплікація й
+# інжест із Home Assistant налаштовуються однаково в обох аддонах (див. AddonSettings)
+SETTINGS = AddonSettings(OPTIONS_FILE)
+
+# id батарей у цьому аддоні - цілі числа
+SENSORS = SETTINGS.load_sensors(SENSORS_FILE, DEFAULT_SENSORS, id_type=int)
+# id -> назва: O(1) перевірка id при кожному оновленні
+BATTERY_NAMES = SENSORS.names
+# група -> список id у порядку оголошення
+SENSOR_GROUPS = SENSORS.groups
+
+# =================================================================
+# РОЗСИЛКА ЗМІН (SSE)
+# =================================================================
+
+def battery_record(battery_id, reading):
+    """Запис батареї для API та SSE: {id, name, level, timestamp, rate, time_to_empty, time_to_full, anomalies}.
+
+    Батарея без даних має level 0 і timestamp null, як і до спільного ядра.
+    """
+    return {"id": battery_id, "name": BATTERY_NAMES[battery_id],
+            "level": reading.level if reading.level is not None else 0,
+            "timestamp": format_utc_timestamp(reading.timestamp) if reading.timestamp is not None else None,
+            **reading.analytics()}
+
+def battery_row(battery_id, reading):
+    """Та сама батарея в колонковому форматі: [id, level, epoch, аналітика...] без назви."""
+    return reading_row(battery_id, reading, missing_level=0)
+
+def encode_records(items):
+    """SSE-повідомлення у звичайному JSON: список записів battery_record."""
+    return dumps_compact([battery_record(i, reading) for i, reading in items])
+
+def encode_rows(items):
+    """SSE-повідомлення в колонковому форматі: список рядків battery_row."""
+    return dumps_compact([battery_row(i, reading) for i, reading in items])
+
+# Повідомлення серіалізуються один раз на кожен фільтр групи і формат
+events = EventBroadcaster(keepalive=SSE_KEEPALIVE, encode=encode_records)
+PUSH_CLIENTS.set_function(events.client_count)
+
+def broadcast_update(update):
+    """Розсилає SSE-клієнтам батареї з новими значеннями."""
+    events.publish([(i, update.snapshot.readings[i]) for i in update.updated])
+
+# =================================================================
+# СТАН, ІСТОРІЯ, АЛЕРТИ, ФІЛЬТРАЦІЯ ВХІДНИХ ДАНИХ
+# =================================================================
+
+# Стан із журналом, історія, алерти, реплікація, IngestFilter та інжест із
+# Home Assistant (стани unknown/unavailable пропускаються: на дашборді
+# лишається останній рівень); фонові потоки зупиняються через atexit
+runtime = AddonRuntime('local_battery_viewer_tunnel', 'Рівень заряду батарей', SETTINGS, SENSORS, DATA_FILE,
+                       HISTORY_FILE, broadcast_update, id_type=int)
+state = runtime.state
+history = runtime.history
+should_log_sample = runtime.should_log_sample
+# POST-ендпоінти, до яких застосовується rate limit
+RATE_LIMITED_ROUTES = {'/data', '/data/batch'}
+
+def error_body(message):
+    """Тіло відповіді з помилкою у форматі цього аддона."""
+    return {"error": message}
+
+# =================================================================
+# HTML-ОБОЛОНКА ТА СТАТИЧНІ ФАЙЛИ
+# =================================================================
+# CSS і JS лежать у static/ і віддаються з хешем вмісту в імені, тож
+# браузер кешує їх назавжди; сторінка - лише маленька HTML-оболонка з
+# реєстром сенсорів, групами та URL API у JSON-блоці.
+
+HTML_CONTENT = lambda css_url, js_url, config_json: f"""<!DOCTYPE html>
 <html lang="uk">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Індикатори Енергосистеми</title>
-    <style>
-        :root {{
-            --primary-color: #007bff;
-            --success-color: #5cb85c;
-            --warning-color: #f0ad4e;
-            --danger-color: #d9534f;
-            --bg-color: #f8f9fa;
-            --card-bg: #ffffff;
-            --text-color: #333;
-        }}
-        body {{ 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-            display: flex; 
-            flex-direction: column; 
-            align-items: center; 
-            justify-content: flex-start; 
-            min-height: 100vh; 
-            margin: 0; 
-            padding: 20px 10px;
-            background-color: var(--bg-color); 
-            color: var(--text-color);
-        }}
-        h1 {{ 
-            margin-bottom: 30px; 
-            font-size: 1.8em;
-            text-align: center;
-        }}
-        .battery-grid {{ 
-            display: flex; 
-            gap: 20px; 
-            flex-wrap: wrap; 
-            justify-content: center;
-            width: 100%;
-            max-width: 1000px;
-        }}
-        .indicator-unit {{ 
-            display: flex; 
-            flex-direction: column; 
-            align-items: center; 
-            padding: 20px; 
-            border: 1px solid #e0e0e0; 
-            border-radius: 12px; 
-            background: var(--card-bg); 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08); 
-            transition: transform 0.2s;
-            width: calc(33.33% - 20px);
-            box-sizing: border-box;
-        }}
-        .indicator-unit:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 6px 15px rgba(0,0,0,0.1);
-        }}
-        .system-title {{
-            font-size: 1.3em;
-            margin-bottom: 15px;
-            font-weight: 600;
-        }}
-        .battery-container {{ 
-            width: 160px; 
-            height: 80px; 
-            border: 3px solid var(--text-color); 
-            border-radius: 10px; 
-            position: relative; 
-            display: flex; 
-            align-items: center; 
-            justify-content: center; 
-            margin-top: 10px; 
-            background-color: #f0f0f0; 
-        }}
-        .battery-container::after {{ 
-            content: ''; 
-            position: absolute; 
-            right: -10px; 
-            top: 50%; 
-            transform: translateY(-50%); 
-            width: 8px; 
-            height: 20px; 
-            background-color: var(--text-color); 
-            border-radius: 0 4px 4px 0; 
-        }}
-        .battery-level {{ 
-            font-size: 2.8em; 
-            font-weight: bold; 
-            color: var(--text-color); 
-            transition: color 0.3s;
-        }}
-        .timestamp-text {{ 
-            margin-top: 15px; 
-            font-size: 0.85em; 
-            color: #777; 
-            text-align: center; 
-        }}
-        .color-success {{ color: var(--success-color) !important; }}
-        .color-warning {{ color: var(--warning-color) !important; }}
-        .color-danger {{ color: var(--danger-color) !important; }}
-        
-        @media (max-width: 768px) {{
-            .indicator-unit {{
-                width: calc(50% - 15px);
-            }}
-        }}
-        @media (max-width: 500px) {{
-            .indicator-unit {{
-                width: 100%;
-                max-width: 300px;
-            }}
-            .battery-container {{
-                width: 100%;
-            }}
-        }}
-    </style>
+    <link rel="stylesheet" href="{css_url}">
 </head>
 <body>
     <h1>Рівні заряду систем:</h1>
-    <div class="battery-grid" id="battery-grid">
-        </div>
-
-    <script>
-        const BATTERY_NAMES = {json.dumps(names)}; 
-        const API_URL = '{api_url}'; 
-        const grid = document.getElementById('battery-grid');
-
-        // Створення HTML-елементів
-        for (const id in BATTERY_NAMES) {{
-            const name = BATTERY_NAMES[id];
-            const unit = document.createElement('div');
-            unit.className = 'indicator-unit';
-            unit.innerHTML = `
-                <h2 class="system-title">${{name}}</h2>
-                <div class="battery-container" id="container-${{id}}">
-                    <div class="battery-level" id="level-${{id}}">--%</div>
-                </div>
-                <div class="timestamp-text" id="time-${{id}}">Останнє оновлення: Н/Д</div>
-            `;
-            grid.appendChild(unit);
-        }}
-
-        function formatTimestamp(isoString) {{
-            if (!isoString) return 'Н/Д';
-            try {{
-                const date = new Date(isoString);
-                return date.toLocaleDateString('uk-UA') 
-                    + ' ' 
-                    + date.toLocaleTimeString('uk-UA');
-            }} catch (e) {{
-                return 'Невірний формат часу';
-            }}
-        }}
-
-        async function updateBatteryStatus() {{
-            try {{
-                const response = await fetch(API_URL);
-                if (!response.ok) {{
-                    throw new Error(`Помилка HTTP! Статус: ${{response.status}}`);
-                }}
-                const batteries = await response.json(); 
-
-                batteries.forEach(data => {{
-                    const {{ id, level, timestamp }} = data; 
-                    const levelEl = document.getElementById(`level-${{id}}`);
-                    const timeEl = document.getElementById(`time-${{id}}`);
-
-                    if (levelEl) {{
-                        levelEl.textContent = `${{level}}%`;
-                        timeEl.textContent = `Оновлено: ${{formatTimestamp(timestamp)}}`;
-
-                        // Кольорова індикація
-                        levelEl.classList.remove('color-success', 'color-warning', 'color-danger');
-                        if (level <= 20) {{
-                            levelEl.classList.add('color-danger'); 
-                        }} else if (level <= 50) {{
-                            levelEl.classList.add('color-warning'); 
-                        }} else {{
-                            levelEl.classList.add('color-success'); 
-                        }}
-                    }}
-                }});
-
-            }} catch (error) {{
-                console.error('Помилка при отриманні даних:', error);
-                // Оновлення всіх статусів у разі помилки
-                for (const id in BATTERY_NAMES) {{
-                    const levelEl = document.getElementById(`level-${{id}}`);
-                    const timeEl = document.getElementById(`time-${{id}}`);
-                    if (levelEl) {{
-                        levelEl.textContent = 'Пом.';
-                        levelEl.classList.remove('color-success', 'color-warning');
-                        levelEl.classList.add('color-danger'); 
-                    }}
-                    if (timeEl) {{
-                         timeEl.textContent = 'Помилка мережі';
-                    }}
-                }}
-            }}
-        }}
-
-        updateBatteryStatus(); 
-        setInterval(updateBatteryStatus, 5000); 
-    </script>
+    <div class="group-tabs" id="group-tabs"></div>
+    <div class="battery-grid" id="battery-grid"></div>
+    <div class="pager" id="pager"></div>
+    <script id="dashboard-config" type="application/json">{config_json}</script>
+    <script src="{js_url}"></script>
 </body>
 </html>
 """
 
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+STATIC_ASSETS, STATIC_MANIFEST = load_static_assets(STATIC_DIR)
+
+# Сторінка не залежить від стану батарей, тож збираємо її лише при старті
+INDEX_PAGE = PrecompressedPage(HTML_CONTENT(
+    STATIC_MANIFEST['dashboard.css'], STATIC_MANIFEST['dashboard.js'],
+    script_json({
+        "sensors": [{"id": s.id, "name": s.name, "group": s.group} for s in SENSORS],
+        "groups": list(SENSOR_GROUPS),
+        "pageSize": PAGE_SIZE,
+        "apiUrl": "/data",
+        "eventsUrl": "/events",
+        "thresholds": {"warning": WARNING_LEVEL, "critical": CRITICAL_LEVEL},
+    }),
+))
+
+# =================================================================
+# ВАЛІДАЦІЯ ВХІДНИХ ДАНИХ
+# =================================================================
+
+def validate_reading(raw_id, level):
+    """Перевіряє одне значення батареї. Повертає (id, level) або кидає ValueError."""
+    try:
+        battery_id = int(raw_id)
+    except (ValueError, TypeError):
+        raise ValueError("ID must be an integer")
+    if battery_id not in BATTERY_NAMES:
+        raise ValueError(f"Unknown battery 'id' {battery_id}")
+    return battery_id, parse_level(level)
+
+def requested_group_ids():
+    """Множина id групи з ?group= (None - без фільтра). Невідома група - ValueError."""
+    group = request.args.get('group')
+    if not group:
+        return None
+    if group not in SENSOR_GROUPS:
+        raise ValueError(f"Unknown group {group!r}")
+    return SENSOR_GROUPS[group]
+
 # =================================================================
 # ОБРОБНИКИ FLASK
 # =================================================================
 
+install_request_metrics(app, UNTIMED_ROUTES)
+startup.install(app)
+if runtime.rate_limiter is not None:
+    install_rate_limit(app, runtime.rate_limiter, RATE_LIMITED_ROUTES, error_body("Too many requests"))
+install_sync_route(app, runtime, error_body)
+install_history_route(app, runtime, error_body)
+
 @app.route('/')
 def index():
-    """Віддає адаптивну HTML-сторінку з індикаторами."""
-    # API_URL - це шлях до ендпоінту даних, відносний до кореня
-    api_url = "/data" 
-    
-    return HTML_CONTENT(api_url, BATTERY_NAMES)
+    """Віддає адаптивну HTML-сторінку з індикаторами (зібрану при старті)."""
+    return INDEX_PAGE.response()
+
+@app.route('/static/<path:filename>')
+def static_asset(filename):
+    """CSS/JS з хешем вмісту в імені: кешуються браузером як immutable."""
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return jsonify({"error": "Not found"}), 404
+    return asset.response()
+
+@app.route('/events')
+def battery_events():
+    """Потік Server-Sent Events зі зміненими батареями (?group= - лише однієї групи,
+    ?format=columnar - рядками колонкового формату замість записів)."""
+    try:
+        ids = requested_group_ids()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    subscriber = events.subscribe(ids, encode_rows if wants_columnar(request) else None)
+    response = Response(stream_with_context(events.stream(subscriber)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Вимикаємо буферизацію на проксі, щоб події доходили одразу
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/data', methods=['GET'])
 def get_battery_data():
-    """Віддає JSON-дані про стан батарей для фронтенду."""
-    data = load_data()
-    return jsonify(data)
+    """Віддає JSON-дані про стан батарей для фронтенду (з пам'яті).
+
+    ETag/Last-Modified відповідають версії стану, тож повторне опитування
+    без змін отримує 304. З ?since=<версія> повертаються лише батареї,
+    змінені після цієї версії, з ?group=<назва> - лише батареї групи.
+    Accept: application/vnd.battery.columnar+json (або ?format=columnar)
+    віддає колонковий формат: {fields, rows} і назви лише в повній відповіді.
+    """
+    since = request.args.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({"error": "Expected integer 'since' (state version)"}), 400
+    try:
+        ids = requested_group_ids()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    snapshot = state.snapshot
+    updated = sorted(snapshot.updated_since(since, ids))
+    if wants_columnar(request):
+        rows = [battery_row(i, snapshot.readings[i]) for i in updated]
+        # Назви потрібні лише тому, хто бачить батареї вперше
+        names = {} if since is not None else {"names": {i: BATTERY_NAMES[i] for i in updated}}
+        response = Response(encode_columnar(rows, version=snapshot.version, **names), mimetype=COLUMNAR_MIMETYPE)
+        response.set_etag(f"{snapshot.version}-columnar")
+    else:
+        batteries = [battery_record(i, snapshot.readings[i]) for i in updated]
+        response = Response(dumps_compact(batteries), mimetype='application/json')
+        response.set_etag(str(snapshot.version))
+    response.vary.add('Accept')
+    response.last_modified = snapshot.modified_at
+    response.headers['X-State-Version'] = str(snapshot.version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/data', methods=['POST'])
 def update_battery_data():
-    """Приймає POST-запит (id, level) і оновлює JSON-файл."""
+    """Приймає POST-запит (id, level) і оновлює стан у пам'яті."""
     if not request.is_json:
         app.logger.warning("POST request received without JSON content.")
         return jsonify({"error": "Missing JSON in request"}), 400
-    
-    update_data = request.get_json()
-    battery_id = update_data.get('id')
-    level = update_data.get('level')
 
+    payload = request.get_json(silent=True)
     try:
-        battery_id = int(battery_id)
-        level = int(level)
-    except (ValueError, TypeError):
-        return jsonify({"error": "ID and Level must be integers"}), 400
-
-    if battery_id not in BATTERY_NAMES or level is None:
-        return jsonify({"error": "Invalid or missing 'id' (1, 2, or 3) or 'level'."}), 400
-
-    batteries = load_data()
-    
-    found = False
-    for battery in batteries:
-        if battery['id'] == battery_id:
-            battery['level'] = level
-            battery['timestamp'] = datetime.utcnow().isoformat()
-            found = True
-            break
-            
-    if found:
-        save_data(batteries)
+        if not isinstance(payload, dict):
+            raise ValueError("Reading must be a JSON object with 'id' and 'level'")
+        battery_id, level = validate_reading(payload.get('id'), payload.get('level'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    (reason,), update = runtime.ingest([(battery_id, level)])
+    if reason is not None:
+        return jsonify({"status": "suppressed", "reason": reason, "id": battery_id,
+                        "name": BATTERY_NAMES[battery_id]}), 200
+
+    # Відповідаємо лише після fsync журналу: підтверджене значення переживе збій живлення
+    if not state.wait_durable(update.snapshot.version):
+        return jsonify({"error": "State could not be persisted"}), 503
+    if should_log_sample():
         app.logger.info(f"Battery {BATTERY_NAMES[battery_id]} updated to {level}%")
-        return jsonify({"status": "updated", "id": battery_id, "name": BATTERY_NAMES[battery_id]}), 200
-    else:
-        return jsonify({"error": f"Battery with ID {battery_id} not found."}), 404
+    return jsonify({"status": "updated", "id": battery_id, "name": BATTERY_NAMES[battery_id]}), 200
+
+@app.route('/data/batch', methods=['POST'])
+def update_battery_data_batch():
+    """Приймає пакет значень і застосовує їх разом.
+
+    Формат той самий, що в battery_soc_page: масив записів {id, level},
+    {"readings": [...]}, NDJSON-потік або словник {id: level}; порожній
+    пакет нічого не змінює.
+
+    Усі записи валідуються й проходять фільтр (deadband, мінімальний
+    інтервал), прийняті застосовуються однією публікацією знімка (а отже й
+    одним записом на диск), а у відповіді є результат для кожного.
+    """
+    try:
+        items = read_batch_readings(request)
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    results = []
+    readings = []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, ValueError):
+                raise item
+            readings.append(validate_reading(*item))
+            results.append({"index": index, "status": "updated"})
+        except ValueError as e:
+            results.append({"index": index, "status": "error", "error": str(e)})
+
+    reasons, update = runtime.ingest(readings)
+    # Відповідаємо лише після fsync журналу, чекаючи версію саме цього запиту
+    if update is not None and not state.wait_durable(update.snapshot.version):
+        return jsonify({"status": "error", "error": "State could not be persisted"}), 503
+    valid = iter(zip(readings, reasons))
+    for result in results:
+        if result['status'] == 'updated':
+            (battery_id, level), reason = next(valid)
+            if reason is None:
+                result.update(id=battery_id, name=BATTERY_NAMES[battery_id], level=level)
+            else:
+                result.update(status="suppressed", reason=reason, id=battery_id, level=level)
+
+    status, code = batch_status(results)
+    applied = sum(1 for reason in reasons if reason is None)
+    if should_log_sample():
+        app.logger.info(f"Batch update: {applied} of {len(results)} readings applied")
+    return jsonify({"status": status, "applied": applied, "suppressed": len(readings) - applied,
+                    "results": results}), code
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Метрики у форматі Prometheus."""
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
+@app.route('/ready', methods=['GET'])
+def readiness():
+    """Готовність і етапи старту: секунди від запуску процесу до імпорту, готовності й першого запиту."""
+    return startup.report()
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Здоров'я бекенду для супервізора (503 - час перезапускати) і стан компонентів під ним."""
+    return health_report(startup, {'state_journal': state.healthy()})
 
 # Додаємо обробку CORS (хоча тунель зазвичай робить це непотрібним)
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, X-State-Version'
     return response
 
+# Стан завантажено, фонові потоки й маршрути зареєстровано
+startup.mark_ready()
+
 if __name__ == '__main__':
+    # SIGTERM від Supervisor перетворюємо на штатне завершення, щоб спрацював atexit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     # Запускаємо сервер на визначеному порту 0.0.0.0
     app.run(host='0.0.0.0', port=HOST_PORT)
@@ -0,0 +1,117 @@
+"""Обв'язка аддона: стан, історія, алерти, реплікація й фільтр вхідних даних разом."""
+import atexit
+import itertools
+
+from prometheus_client import REGISTRY
+
+from .alerts import AlertDispatcher, AlertEngine, load_alert_rules, load_alert_targets
+from .analytics import DischargeEstimator
+from .history import HistoryStore
+from .homeassistant import HomeAssistantIngest, parse_ha_level
+from .ingest import IngestFilter, RateLimiter
+from .metrics import ALERT_QUEUE, SensorAgeCollector, SupervisorCollector
+from .state import SensorState, move_legacy_state
+from .sync import PeerSync
+
+class LogSampler:
+    """Виклик повертає True для кожного every-го разу (перший - завжди)."""
+
+    def __init__(self, every):
+        self.every = max(1, int(every))
+        self._counter = itertools.count()
+
+    def __call__(self):
+        return next(self._counter) % self.every == 0
+
+class AddonRuntime:
+    """Усе, що аддони мають спільного між прийманням значення і його розсилкою.
+
+    Аддон задає реєстр сенсорів, шляхи до файлів і власну розсилку змін
+    (SSE чи Socket.IO): publish викликає broadcast(update) для кожного
+    StateUpdate з новими значеннями, а також пише історію, оцінює правила
+    алертів і будить реплікацію на агрегатор. Фонові потоки стартують у
+    конструкторі й зупиняються через atexit.
+    """
+
+    def __init__(self, name, title, settings, sensors, data_file, history_file, broadcast, id_type=str,
+                 legacy_data_file=None, parse_ha_value=parse_ha_level):
+        self.settings = settings
+        self.sensors = sensors
+        # id -> назва: O(1) перевірка id при кожному оновленні
+        self.names = sensors.names
+        self.id_type = id_type
+        self.broadcast = broadcast
+        self.should_log_sample = LogSampler(settings.log_sample_every)
+
+        self.state = SensorState(data_file, self.names, id_type=id_type,
+                                 analytics=DischargeEstimator(settings.rate_window, settings.sudden_change),
+                                 compact_interval=settings.compact_interval)
+        if legacy_data_file:
+            move_legacy_state(legacy_data_file, data_file)
+        self.state.load()
+        self.state.start()
+        atexit.register(self.state.stop)
+        self.history = HistoryStore(history_file)
+        self.history.open()
+        atexit.register(self.history.stop)
+
+        self.alert_engine = AlertEngine(load_alert_rules(settings.options, sensors.groups))
+        self.alert_engine.prime_from(self.state.snapshot)
+        self.alert_dispatcher = AlertDispatcher(load_alert_targets(settings.options), name, title,
+                                                settings.ha_api_url, settings.ha_token,
+                                                batch_window=settings.alert_batch_window)
+        self.alert_dispatcher.start()
+        atexit.register(self.alert_dispatcher.stop)
+        ALERT_QUEUE.set_function(self.alert_dispatcher.depth)
+
+        # Пір надсилає агрегатору свої зміни (значення з власним часом, last-writer-wins)
+        self.peer_sync = None
+        if settings.sync_upstream:
+            self.peer_sync = PeerSync(self.state, settings.sync_upstream, settings.sync_token,
+                                      settings.sync_instance, settings.sync_interval)
+            self.peer_sync.start()
+            atexit.register(self.peer_sync.stop)
+        REGISTRY.register(SensorAgeCollector(self.state, self.names))
+        REGISTRY.register(SupervisorCollector())
+
+        self.ingest_filter = IngestFilter(sensors.filter_settings())
+        self.rate_limiter = RateLimiter(settings.rate_limit, settings.rate_burst) if settings.rate_limit > 0 else None
+        self.ingest_filter.start(self.apply)
+        atexit.register(self.ingest_filter.stop)
+
+        self.ha_ingest = HomeAssistantIngest(settings.ha_ws_url, settings.ha_token, sensors.entities(), self.ingest,
+                                             parse_ha_value, batch_interval=settings.ha_batch_interval)
+        if settings.ha_ingest and self.ha_ingest.start():
+            atexit.register(self.ha_ingest.stop)
+
+    def publish(self, update):
+        """Розсилає нові значення StateUpdate, пише історію, оцінює правила алертів
+        і будить реплікацію на агрегатор. Повертає update."""
+        if not update.updated:
+            return update
+        self.broadcast(update)
+        self.history.record_update(update)
+        alerts = self.alert_engine.check(update, self.names)
+        if alerts:
+            self.alert_dispatcher.submit(alerts)
+        if self.peer_sync is not None:
+            self.peer_sync.notify()
+        return update
+
+    def apply(self, readings):
+        """Застосовує пари (id, level) однією публікацією знімка. Повертає StateUpdate."""
+        return self.publish(self.state.apply(readings))
+
+    def ingest(self, readings):
+        """Пропускає пари (id, level) через IngestFilter і застосовує прийняті.
+
+        Повертає (причини придушення, вирівняні з readings (None - застосовано),
+        StateUpdate прийнятих значень або None, якщо прийнятих немає).
+        """
+        reasons = self.ingest_filter.admit(readings)
+        accepted = [reading for reading, reason in zip(readings, reasons) if reason is None]
+        return reasons, self.apply(accepted) if accepted else None
+
+    def merge(self, readings):
+        """Застосовує трійки (id, level, timestamp) від пірів (last-writer-wins). Повертає StateUpdate."""
+        return self.publish(self.state.merge(readings))
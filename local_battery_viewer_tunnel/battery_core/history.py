@@ -0,0 +1,202 @@
+"""Історія рівнів заряду (SQLite у режимі WAL) з автоматичним проріджуванням."""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .journal import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Рівні зберігання: (назва, таблиця, роздільність у секундах, скільки зберігати)
+HISTORY_TIERS = (
+    ('raw', 'samples', 1, 7 * 86400),
+    ('1m', 'rollup_1m', 60, 90 * 86400),
+    ('1h', 'rollup_1h', 3600, None),
+)
+# Скільки точок максимум повертає /history, якщо step не задано
+HISTORY_MAX_POINTS = 1000
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    sensor TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    level REAL NOT NULL,
+    PRIMARY KEY (sensor, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    sensor TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    lo REAL NOT NULL,
+    hi REAL NOT NULL,
+    total REAL NOT NULL,
+    n INTEGER NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (sensor, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1h (
+    sensor TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    lo REAL NOT NULL,
+    hi REAL NOT NULL,
+    total REAL NOT NULL,
+    n INTEGER NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (sensor, bucket)
+) WITHOUT ROWID;
+"""
+
+HISTORY_ROLLUP_UPSERT = """
+INSERT INTO {table} (sensor, bucket, lo, hi, total, n, last) VALUES (?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT (sensor, bucket) DO UPDATE SET
+    lo = MIN(lo, excluded.lo),
+    hi = MAX(hi, excluded.hi),
+    total = total + excluded.total,
+    n = n + 1,
+    last = excluded.last
+"""
+
+class HistoryStore:
+    """Append-only історія рівнів заряду з автоматичним проріджуванням.
+
+    Кожен вимір пишеться у сирі дані і одразу агрегується у хвилинні та
+    годинні корзини (O(1) на вимір). Запис іде пакетами з фонового потоку,
+    тож обробники POST лише ставлять вимір у чергу.
+    """
+
+    def __init__(self, path, commit_interval=2.0):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._queue = queue.Queue()
+        self._reader = None
+        self._read_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._writer = None
+
+    def _connect(self):
+        # Запити йдуть через run_blocking, тобто з різних потоків ОС, але по одному
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def open(self):
+        """Створює файл бази та таблиці, запускає фоновий потік запису."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(HISTORY_SCHEMA)
+        finally:
+            conn.close()
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+            self._writer.start()
+
+    def record(self, sensor_id, level, ts=None):
+        """Ставить вимір у чергу на запис (не блокує виклик)."""
+        if level is None:
+            return
+        self._queue.put((str(sensor_id), time.time() if ts is None else ts, float(level)))
+
+    def record_update(self, update):
+        """Ставить у чергу всі нові значення StateUpdate з їхнім часом."""
+        readings = update.snapshot.readings
+        for sensor_id in update.updated:
+            self.record(sensor_id, readings[sensor_id].level, readings[sensor_id].timestamp)
+
+    def _drain(self):
+        samples = []
+        while True:
+            try:
+                samples.append(self._queue.get_nowait())
+            except queue.Empty:
+                return samples
+
+    def _write(self, conn, samples):
+        with conn:
+            # Повтор уже записаного виміру (дограний журнал, повторений POST) у корзини
+            # не потрапляє, інакше n і total порахували б його двічі
+            inserted = [(sensor, ts, level) for sensor, ts, level in samples
+                        if conn.execute('INSERT OR IGNORE INTO samples (sensor, ts, level) VALUES (?, ?, ?)',
+                                        (sensor, int(ts * 1000), level)).rowcount]
+            for name, table, resolution, retention in HISTORY_TIERS[1:]:
+                conn.executemany(
+                    HISTORY_ROLLUP_UPSERT.format(table=table),
+                    [(sensor, int(ts // resolution) * resolution, level, level, level, level)
+                     for sensor, ts, level in inserted])
+
+    def _prune(self, conn):
+        now = time.time()
+        with conn:
+            for name, table, resolution, retention in HISTORY_TIERS:
+                if retention is None:
+                    continue
+                if table == 'samples':
+                    conn.execute('DELETE FROM samples WHERE ts < ?', (int((now - retention) * 1000),))
+                else:
+                    conn.execute(f'DELETE FROM {table} WHERE bucket < ?', (int(now - retention),))
+
+    def _write_loop(self):
+        conn = self._connect()
+        last_prune = 0
+        while True:
+            stopping = self._stop_event.wait(self.commit_interval)
+            samples = self._drain()
+            try:
+                # Вставки, корзини й DELETE блокують: під eventlet - у потоці ОС, а не в циклі подій
+                if samples:
+                    run_blocking(self._write, conn, samples)
+                if time.time() - last_prune > 3600:
+                    run_blocking(self._prune, conn)
+                    last_prune = time.time()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing history to {self.path}: {e}")
+            if stopping:
+                break
+        conn.close()
+
+    def stop(self):
+        """Дописує чергу на диск і зупиняє фоновий потік."""
+        self._stop_event.set()
+        if self._writer is not None:
+            self._writer.join(timeout=10)
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    @staticmethod
+    def _fetch(conn, sql, params):
+        return conn.execute(sql, params).fetchall()
+
+    def query(self, sensor_id, start, end, step=None):
+        """Повертає (рівень, крок, точки [t, avg, min, max]) за проміжок [start, end).
+
+        Обирає найгрубіший рівень, роздільність якого не перевищує крок і який
+        ще зберігає дані за весь проміжок - так читається найменше рядків.
+        """
+        if not step:
+            step = max(1, int(end - start) // HISTORY_MAX_POINTS)
+        now = time.time()
+        covering = [t for t in HISTORY_TIERS if t[3] is None or start >= now - t[3]]
+        suitable = [t for t in covering if t[2] <= step]
+        name, table, resolution, retention = suitable[-1] if suitable else covering[0]
+        # Крок - ціле число корзин рівня, інакше точки зсуваються відносно корзин
+        step = -(-max(int(step), 1) // resolution) * resolution
+        if table == 'samples':
+            sql = ('SELECT (ts / ?) * ? AS t, AVG(level), MIN(level), MAX(level) FROM samples '
+                   'WHERE sensor = ? AND ts >= ? AND ts < ? GROUP BY t ORDER BY t')
+            params = (step * 1000, step, str(sensor_id), int(start * 1000), int(end * 1000))
+        else:
+            sql = (f'SELECT (bucket / ?) * ? AS t, SUM(total) / SUM(n), MIN(lo), MAX(hi) FROM {table} '
+                   'WHERE sensor = ? AND bucket >= ? AND bucket < ? GROUP BY t ORDER BY t')
+            params = (step, step, str(sensor_id), int(start), int(end))
+        # Одне з'єднання для читання на весь процес (а не на кожен green-потік);
+        # замок береться в циклі подій, а сам запит іде через run_blocking
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            rows = run_blocking(self._fetch, self._reader, sql, params)
+        return name, step, [[t, round(avg, 2), lo, hi] for t, avg, lo, hi in rows]
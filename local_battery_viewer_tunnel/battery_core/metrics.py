@@ -0,0 +1,103 @@
+"""Метрики Prometheus, спільні для обох аддонів.
+
+Метрики реєструються в глобальному REGISTRY при імпорті модуля, тож
+кожна визначена рівно один раз і має однакові назви в обох аддонах.
+"""
+import time
+
+from flask import g, request
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .supervisor import read_supervisor_status
+
+LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+
+REQUEST_COUNT = Counter('battery_http_requests_total', 'Кількість HTTP-запитів',
+                        ['route', 'method', 'status'])
+REQUEST_LATENCY = Histogram('battery_http_request_duration_seconds', 'Тривалість обробки HTTP-запиту',
+                            ['route', 'method'], buckets=LATENCY_BUCKETS)
+FLUSH_DURATION = Histogram('battery_state_flush_duration_seconds', 'Тривалість запису стану на диск',
+                           buckets=LATENCY_BUCKETS)
+FLUSH_BYTES = Counter('battery_state_flush_bytes_total', 'Скільки байт стану записано на диск')
+JOURNAL_SYNC_DURATION = Histogram('battery_journal_sync_duration_seconds', 'Тривалість дозапису журналу з fsync',
+                                  buckets=LATENCY_BUCKETS)
+JOURNAL_BYTES = Counter('battery_journal_bytes_total', 'Скільки байт дописано в журнал стану')
+JOURNAL_BATCH_SIZE = Histogram('battery_journal_batch_records', 'Записів журналу на один fsync',
+                               buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+PUSH_CLIENTS = Gauge('battery_push_clients', 'Кількість підключених push-клієнтів (SSE чи Socket.IO)')
+BROADCAST_DURATION = Histogram('battery_broadcast_duration_seconds', 'Час розсилки змін усім клієнтам',
+                               buckets=LATENCY_BUCKETS)
+
+HA_INGEST_EVENTS = Counter('battery_ha_ingest_events_total', 'Зміни станів, отримані з Home Assistant')
+HA_INGEST_BATCHES = Counter('battery_ha_ingest_batches_total', 'Пакети змін із Home Assistant, застосовані до стану')
+HA_INGEST_RECONNECTS = Counter('battery_ha_ingest_reconnects_total', 'Перепідключення до WebSocket API Home Assistant')
+HA_INGEST_CONNECTED = Gauge('battery_ha_ingest_connected', '1, якщо підписка на Home Assistant активна')
+INGEST_SUPPRESSED = Counter('battery_ingest_suppressed_total', 'Відкинуті або відкладені вхідні оновлення',
+                            ['reason'])
+ALERTS = Counter('battery_alerts_total', 'Спрацювання та зняття алертів', ['rule', 'state'])
+ALERT_DELIVERIES = Counter('battery_alert_deliveries_total', 'Результати доставки сповіщень',
+                           ['target', 'result'])
+SYNC_PUSHES = Counter('battery_sync_pushes_total', 'Надсилання дельт стану агрегатору', ['result'])
+SYNC_READINGS = Counter('battery_sync_readings_total', 'Значення від пірів, отримані агрегатором', ['result'])
+ALERT_QUEUE = Gauge('battery_alert_queue_depth', 'Алерти, що очікують доставки')
+STARTUP_SECONDS = Gauge('battery_startup_seconds', 'Секунд від запуску процесу до етапу старту', ['phase'])
+
+def install_request_metrics(app, untimed_routes=()):
+    """Рахує запити й латентність застосунку за шаблоном маршруту (а не за повним URL).
+
+    Маршрути з untimed_routes (довгі потоки, /metrics) у гістограму латентності не потрапляють.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_COUNT.labels(route, request.method, response.status_code).inc()
+        if route not in untimed_routes and 'request_started' in g:
+            REQUEST_LATENCY.labels(route, request.method).observe(time.perf_counter() - g.request_started)
+        return response
+
+class SensorAgeCollector:
+    """Віддає вік останнього значення кожного сенсора на момент збору метрик."""
+
+    def __init__(self, state, names):
+        self.state = state
+        self.names = names
+
+    def collect(self):
+        family = GaugeMetricFamily('battery_last_update_age_seconds',
+                                   'Секунд від останнього значення сенсора', labels=['id', 'name'])
+        now = time.time()
+        for sensor_id, reading in self.state.snapshot.readings.items():
+            if reading.timestamp is not None:
+                family.add_metric([str(sensor_id), self.names.get(sensor_id, str(sensor_id))], now - reading.timestamp)
+        yield family
+
+class SupervisorCollector:
+    """Стан супервізора (перезапуски, аптайм і здоров'я компонентів) із його файлу стану."""
+
+    def collect(self):
+        status = read_supervisor_status()
+        if status is None:
+            return
+        now = time.time()
+        restarts = CounterMetricFamily('battery_supervisor_restarts', 'Перезапуски компонента супервізором',
+                                       labels=['component'])
+        uptime = GaugeMetricFamily('battery_component_uptime_seconds', 'Секунд від останнього запуску компонента',
+                                   labels=['component'])
+        healthy = GaugeMetricFamily('battery_component_healthy', '1, якщо остання перевірка здоров\'я пройшла',
+                                    labels=['component'])
+        for name, component in status['components'].items():
+            restarts.add_metric([name], component['restarts'])
+            healthy.add_metric([name], 1 if component['healthy'] else 0)
+            if component['running'] and component['started_at'] is not None:
+                uptime.add_metric([name], now - component['started_at'])
+        yield restarts
+        yield uptime
+        yield healthy
+        yield GaugeMetricFamily('battery_supervisor_uptime_seconds', 'Секунд від запуску супервізора',
+                                value=now - status['started_at'])
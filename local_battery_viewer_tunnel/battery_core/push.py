@@ -0,0 +1,89 @@
+"""Розсилка змін підписникам (Server-Sent Events)."""
+import json
+import queue
+import threading
+
+from .metrics import BROADCAST_DURATION
+
+def dumps_compact(obj):
+    """Компактна серіалізація JSON: без пробілів і без \\u-екранування кирилиці."""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+def split_by_group(ids, group_of):
+    """Розкладає id за групами: група -> список id у вихідному порядку."""
+    groups = {}
+    for sensor_id in ids:
+        groups.setdefault(group_of[sensor_id], []).append(sensor_id)
+    return groups
+
+class EventBroadcaster:
+    """Розсилає змінені значення (пари (id, значення)) усім підписникам SSE.
+
+    Підписник може обмежити себе набором id (наприклад, однією групою) і
+    обрати власну серіалізацію (encode - функція списку пар у рядок, як-от
+    колонковий формат). Кожна різна пара (фільтр, encode) серіалізується
+    один раз на публікацію, а клієнта, що не встигає читати (черга
+    переповнена), відключаємо - браузер перепідключиться й отримає повний стан.
+    """
+
+    def __init__(self, max_pending=100, keepalive=15, encode=dumps_compact):
+        self.max_pending = max_pending
+        self.keepalive = keepalive
+        self.encode = encode
+        self._lock = threading.Lock()
+        self._subscribers = {}  # черга -> (множина id, які цікавлять клієнта (None - усі), encode)
+
+    def subscribe(self, ids=None, encode=None):
+        q = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._subscribers[q] = (None if ids is None else frozenset(ids), encode or self.encode)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.pop(q, None)
+
+    def publish(self, items):
+        """Надсилає кожному клієнту лише змінені значення його фільтра; повільних відключає."""
+        if not items:
+            return
+        with BROADCAST_DURATION.time():
+            with self._lock:
+                subscribers = list(self._subscribers.items())
+            # Одне серіалізоване повідомлення на кожен різний фільтр і формат
+            messages = {}
+            for q, key in subscribers:
+                if key not in messages:
+                    ids, encode = key
+                    selected = items if ids is None else [item for item in items if item[0] in ids]
+                    messages[key] = encode(selected) if selected else None
+                message = messages[key]
+                if message is None:
+                    continue
+                try:
+                    q.put_nowait(message)
+                except queue.Full:
+                    self.unsubscribe(q)
+                    with q.mutex:
+                        q.queue.clear()
+                    q.put_nowait(None)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def stream(self, q):
+        """Генератор тіла text/event-stream для одного клієнта."""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = q.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield f"data: {message}\n\n"
+        finally:
+            self.unsubscribe(q)
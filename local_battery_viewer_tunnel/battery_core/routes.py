@@ -0,0 +1,65 @@
+"""Маршрути, однакові в обох аддонах: історія рівнів і приймання дельт від пірів.
+
+Кожен аддон має власний формат помилки, тож error_body(message) будує її тіло.
+"""
+import time
+
+from flask import jsonify, request
+
+from .metrics import SYNC_READINGS
+from .sync import parse_sync_payload, sync_authorized
+from .validation import parse_time_arg
+
+def install_history_route(app, runtime, error_body, rule='/history'):
+    """GET rule?id=&from=&to=&step= - історія рівня сенсора (час - epoch-секунди або ISO 8601)."""
+
+    @app.route(rule, methods=['GET'])
+    def get_history():
+        try:
+            sensor_id = runtime.id_type(request.args['id'])
+            end = parse_time_arg(request.args.get('to'), time.time())
+            start = parse_time_arg(request.args.get('from'), end - 86400)
+            # type=int мовчки перетворив би некоректний step на None
+            step = int(request.args['step']) if 'step' in request.args else None
+        except (KeyError, ValueError, TypeError):
+            return jsonify(error_body("Expected sensor 'id', 'from'/'to' as epoch seconds or ISO 8601 "
+                                      "and integer 'step'")), 400
+        if sensor_id not in runtime.names:
+            return jsonify(error_body(f"Unknown sensor {sensor_id!r}")), 404
+        if start >= end or (step is not None and step <= 0):
+            return jsonify(error_body("'from' must be before 'to' and 'step' must be positive")), 400
+
+        tier, step, points = runtime.history.query(sensor_id, start, end, step)
+        return jsonify({"id": sensor_id, "tier": tier, "step": step, "from": start, "to": end, "points": points})
+
+def install_sync_route(app, runtime, error_body, rule='/sync'):
+    """POST rule - дельта від іншого екземпляра: {instance, version, readings: [[id, level, timestamp], ...]}.
+
+    Значення застосовується, лише якщо воно новіше за те, що вже є
+    (last-writer-wins за часом значення), тож повтори й дельти, що прийшли
+    не по порядку, безпечні. Без sync_token маршрут відповідає 404.
+    """
+    token = runtime.settings.sync_token
+
+    @app.route(rule, methods=['POST'])
+    def receive_peer_sync():
+        if not token:
+            return jsonify(error_body("Peer sync is disabled")), 404
+        if not sync_authorized(request, token):
+            return jsonify(error_body("Invalid sync token")), 401
+        try:
+            instance, readings, rejected = parse_sync_payload(request.get_json(silent=True), runtime.id_type)
+        except ValueError as e:
+            return jsonify(error_body(str(e))), 400
+        known = [reading for reading in readings if reading[0] in runtime.names]
+        update = runtime.merge(known)
+        if not runtime.state.wait_durable(update.snapshot.version):
+            return jsonify(error_body("State could not be persisted")), 503
+        counts = {"applied": len(update.updated), "stale": len(known) - len(update.updated),
+                  "unknown": len(readings) - len(known), "rejected": rejected}
+        for result, count in counts.items():
+            if count:
+                SYNC_READINGS.labels(result).inc(count)
+        if runtime.should_log_sample():
+            app.logger.info(f"Peer sync from {instance}: {counts}")
+        return jsonify({"status": "ok", **counts})
@@ -0,0 +1,398 @@
+"""Модель стану сенсорів: незмінні знімки із записами на __slots__, журнал оновлень і знімок на диску."""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from .analytics import DischargeEstimator, format_utc_timestamp, parse_utc_timestamp
+from .journal import Journal, encode_record, fsync_directory, run_blocking
+from .metrics import FLUSH_BYTES, FLUSH_DURATION, JOURNAL_BATCH_SIZE, JOURNAL_BYTES, JOURNAL_SYNC_DURATION
+
+logger = logging.getLogger(__name__)
+
+def move_legacy_state(legacy_path, path):
+    """Одноразово переносить файл знімка й журнал зі старого шляху legacy_path у path.
+
+    Нічого не робить, якщо в path уже є стан або на старому місці немає ні
+    знімка, ні журналу. shutil.move, бо старий шлях може бути на іншій
+    файловій системі (записуваний шар контейнера), ніж новий (/data).
+    """
+    moves = [(old, new) for old, new in ((f"{legacy_path}.journal", f"{path}.journal"), (legacy_path, path))
+             if os.path.exists(old)]
+    if (os.path.abspath(legacy_path) == os.path.abspath(path) or not moves
+            or os.path.exists(path) or os.path.exists(f"{path}.journal")):
+        return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Журнал першим: знімок без свого журналу втратив би підтверджені записи
+    for old, new in moves:
+        shutil.move(old, new)
+    fsync_directory(path)
+    logger.info(f"Moved state from {legacy_path} to {path}")
+    return True
+
+class Reading:
+    """Останнє значення одного сенсора.
+
+    Після публікації в знімку запис не змінюється, тож сусідні знімки
+    ділять записи незмінених сенсорів без копіювання, а __slots__ тримає
+    кожен запис компактним.
+    """
+
+    __slots__ = ('level', 'timestamp', 'changed', 'updated', 'rate', 'time_to_empty', 'time_to_full', 'anomalies')
+
+    def __init__(self, level=None, timestamp=None, changed=0, updated=0, analytics=DischargeEstimator.EMPTY):
+        self.level = level  # відсотки; None - даних немає
+        self.timestamp = timestamp  # epoch-секунди останнього значення
+        self.changed = changed  # версія стану, у якій змінився рівень
+        self.updated = updated  # версія стану, у якій прийшло останнє значення (навіть те саме)
+        self.rate = analytics['rate']
+        self.time_to_empty = analytics['time_to_empty']
+        self.time_to_full = analytics['time_to_full']
+        self.anomalies = analytics['anomalies']
+
+    def analytics(self):
+        """Поля аналітики у форматі DischargeEstimator.summary."""
+        return {"rate": self.rate, "time_to_empty": self.time_to_empty,
+                "time_to_full": self.time_to_full, "anomalies": self.anomalies}
+
+class Snapshot(namedtuple('Snapshot', ['version', 'changed', 'modified_at', 'readings'])):
+    """Незмінний знімок стану: версія, версія останньої зміни рівня, час
+    останнього значення (epoch-секунди) та id -> Reading у порядку реєстру."""
+
+    __slots__ = ()
+
+    def updated_since(self, version, ids=None):
+        """id (з ids або всі), для яких після version прийшло нове значення."""
+        readings = self.readings
+        candidates = readings if ids is None else [i for i in ids if i in readings]
+        if version is None or version > self.version:
+            return list(candidates)
+        return [i for i in candidates if readings[i].updated > version]
+
+    def changed_since(self, version, ids=None):
+        """id (з ids або всі), рівень яких змінився після version."""
+        readings = self.readings
+        candidates = readings if ids is None else [i for i in ids if i in readings]
+        return [i for i in candidates if readings[i].changed > version]
+
+    def last_changed(self, ids):
+        """Версія останньої зміни рівня серед сенсорів ids."""
+        return max((self.readings[i].changed for i in ids if i in self.readings), default=0)
+
+# Результат SensorState.apply: попередній і новий знімки, id з новими
+# значеннями та id, рівень яких змінився
+StateUpdate = namedtuple('StateUpdate', ['previous', 'snapshot', 'updated', 'changed'])
+
+class SensorState:
+    """Стан сенсорів у пам'яті з copy-on-write знімками, журналом оновлень і компактизацією.
+
+    Писачі (серіалізовані між собою) будують новий знімок і публікують його
+    однією атомарною заміною посилання, а читачі - API, розсилка, метрики -
+    беруть state.snapshot без блокувань і бачать узгоджену версію. Версія
+    стартує з поточного часу в мс, тож не повторюється після перезапуску.
+
+    Кожне застосування дописується рядком у журнал <path>.journal. Фоновий
+    потік пише всі рядки, що накопичилися, одним fsync (груповий commit), а
+    wait_durable дозволяє обробнику POST відповісти лише після нього.
+    Щойно журнал перевищить compact_bytes або мине compact_interval, знімок
+    атомарно записується у path (тимчасовий файл + fsync + rename), а
+    журнал очищається. Після збою load читає знімок і дограє хвіст журналу.
+    """
+
+    def __init__(self, path, sensor_ids, id_type=str, analytics=None, compact_interval=300.0,
+                 compact_bytes=1 << 20):
+        self.path = path
+        self.sensor_ids = list(sensor_ids)
+        self.id_type = id_type
+        # DischargeEstimator; викликається під тим самим блокуванням, що й публікація знімка
+        self.analytics = analytics
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self.journal = Journal(f"{path}.journal")
+        version = int(time.time() * 1000)
+        self.snapshot = Snapshot(version, version, time.time(), MappingProxyType(
+            {sensor_id: Reading(changed=version, updated=version) for sensor_id in self.sensor_ids}))
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        # Рядки журналу, що чекають на запис, і остання версія, яка вже на диску
+        self._journal_cond = threading.Condition()
+        self._pending = []
+        self._durable_version = version
+        # Знімок на диску застарів (старий формат файлу, дограний журнал)
+        self._compact_needed = False
+        self._last_compact = time.monotonic()
+        self._stopping = False
+        self._writer = None
+
+    def load(self):
+        """Завантажує стан: файл знімка, потім записи журналу, новіші за нього.
+
+        Знімок - {version, readings: [{id, level, timestamp, rate}]}; також
+        розуміє список записів попередньої версії та словник {id: level}
+        старих версій battery_soc_page. Сенсори, яких немає в реєстрі,
+        пропускаються; нові починають без даних.
+        """
+        stored, base_version = [], None
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    content = f.read()
+                stored = json.loads(content) if content.strip() else []
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading state from {self.path}: {e}")
+        if isinstance(stored, dict) and 'readings' in stored:
+            base_version = stored.get('version')
+            stored = stored['readings']
+        elif stored:
+            # Файл попереднього формату перепишемо при першій компактизації
+            self._compact_needed = True
+        if isinstance(stored, dict):
+            stored = [{"id": sensor_id, "level": level} for sensor_id, level in stored.items()]
+
+        readings = {sensor_id: None for sensor_id in self.sensor_ids}
+        for record in stored:
+            try:
+                sensor_id = self.id_type(record['id'])
+                level = record.get('level')
+                timestamp = record.get('timestamp')
+                if isinstance(timestamp, str):
+                    timestamp = parse_utc_timestamp(timestamp)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            if sensor_id not in readings or level is None:
+                continue
+            if 'timestamp' in record and timestamp is None:
+                # Заглушка старого формату тунельного переглядача (level 0, timestamp null)
+                continue
+            analytics = DischargeEstimator.EMPTY
+            if self.analytics is not None and timestamp is not None:
+                self.analytics.seed(sensor_id, level, timestamp, record.get('rate'))
+                analytics = self.analytics.summary(level, record.get('rate'), [])
+            readings[sensor_id] = (level, timestamp, analytics)
+
+        last_version, replayed = base_version or 0, 0
+        for version, timestamp, entries in self.journal.read():
+            if base_version is not None and version <= base_version:
+                continue
+            for entry in entries:
+                try:
+                    sensor_id, level = self.id_type(entry[0]), entry[1]
+                    reading_time = float(entry[2]) if len(entry) > 2 else timestamp
+                except (IndexError, TypeError, ValueError):
+                    continue
+                if sensor_id not in readings:
+                    continue
+                analytics = DischargeEstimator.EMPTY
+                if self.analytics is not None:
+                    if level is None:
+                        self.analytics.forget(sensor_id)
+                    else:
+                        analytics = self.analytics.observe(sensor_id, level, reading_time)
+                readings[sensor_id] = (level, reading_time, analytics)
+            last_version = max(last_version, version)
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} journal record(s) from {self.journal.path}")
+            self._compact_needed = True
+
+        with self._write_lock:
+            version = max(self.snapshot.version + 1, last_version + 1, int(time.time() * 1000))
+            current = {}
+            for sensor_id, loaded in readings.items():
+                level, timestamp, analytics = loaded or (None, None, DischargeEstimator.EMPTY)
+                current[sensor_id] = Reading(level, timestamp, version, version, analytics)
+            self.snapshot = Snapshot(version, version, time.time(), MappingProxyType(current))
+            self._durable_version = version
+
+    def apply(self, readings, now=None):
+        """Застосовує пари (id, level) однією публікацією нового знімка.
+
+        Невідомі id пропускаються, для повторного id у пакеті лишається
+        останнє значення. Кожне значення оновлює час і аналітику сенсора
+        (level None - даних немає, оцінка скидається). Повертає StateUpdate;
+        якщо жодне значення не застосовано, snapshot - той самий знімок.
+        Запис у журнал стає в чергу; дочекатися його можна через wait_durable.
+        """
+        now = time.time() if now is None else now
+        with self._write_lock:
+            previous = self.snapshot
+            latest = {}
+            for sensor_id, level in readings:
+                if sensor_id in previous.readings:
+                    latest[sensor_id] = (level, now)
+            return self._publish(previous, latest, now)
+
+    def merge(self, readings, now=None):
+        """Застосовує трійки (id, level, timestamp) від інших екземплярів за правилом last-writer-wins.
+
+        Значення приймається, лише якщо воно новіше за поточне значення
+        сенсора; час із майбутнього (розбіжність годинників) обрізається до
+        now, щоб пір із годинником, що поспішає, не закріпив свого значення
+        назавжди. Повертає StateUpdate, як і apply.
+        """
+        now = time.time() if now is None else now
+        with self._write_lock:
+            previous = self.snapshot
+            latest = {}
+            for sensor_id, level, timestamp in readings:
+                reading = previous.readings.get(sensor_id)
+                if reading is None:
+                    continue
+                timestamp = min(timestamp, now)
+                newest = latest[sensor_id][1] if sensor_id in latest else reading.timestamp
+                if newest is None or timestamp > newest:
+                    latest[sensor_id] = (level, timestamp)
+            return self._publish(previous, latest, now)
+
+    def _publish(self, previous, latest, now):
+        """Публікує знімок із значеннями latest (id -> (level, timestamp)); викликається під _write_lock."""
+        if not latest:
+            return StateUpdate(previous, previous, [], [])
+        version = previous.version + 1
+        current = dict(previous.readings)
+        changed = []
+        for sensor_id, (level, timestamp) in latest.items():
+            old = current[sensor_id]
+            analytics = DischargeEstimator.EMPTY
+            if self.analytics is not None:
+                if level is None:
+                    self.analytics.forget(sensor_id)
+                else:
+                    analytics = self.analytics.observe(sensor_id, level, timestamp)
+            if level != old.level:
+                changed.append(sensor_id)
+            current[sensor_id] = Reading(level, timestamp, version if level != old.level else old.changed,
+                                         version, analytics)
+        snapshot = Snapshot(version, version if changed else previous.changed, now, MappingProxyType(current))
+        self.snapshot = snapshot
+        # Під тим самим блокуванням, тож рядки журналу йдуть у порядку версій;
+        # власний час значення пишемо лише тоді, коли він відрізняється від часу запису
+        line = encode_record(version, now, [[sensor_id, level] if timestamp == now else [sensor_id, level, timestamp]
+                                            for sensor_id, (level, timestamp) in latest.items()])
+        with self._journal_cond:
+            self._pending.append((version, line))
+            self._journal_cond.notify_all()
+        return StateUpdate(previous, snapshot, list(latest), changed)
+
+    def wait_durable(self, version, timeout=5.0):
+        """Чекає, поки стан версії version буде на диску (fsync). False - не встигли за timeout."""
+        deadline = time.monotonic() + timeout
+        with self._journal_cond:
+            while self._durable_version < version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (self._writer is None and not self._pending):
+                    return False
+                self._journal_cond.wait(remaining)
+        return True
+
+    def compact(self):
+        """Атомарно (тимчасовий файл + fsync + rename) записує знімок і очищає журнал.
+
+        Викликається з потоку журналу або після його зупинки, тож журнал
+        між записом знімка й очищенням ніхто не дописує; записи з версією,
+        не новішою за знімок, load однаково пропускає.
+        """
+        with self._compact_lock:
+            snapshot = self.snapshot
+            records = []
+            for sensor_id, reading in snapshot.readings.items():
+                if reading.level is None:
+                    continue
+                record = {"id": sensor_id, "level": reading.level}
+                if reading.timestamp is not None:
+                    record.update(timestamp=format_utc_timestamp(reading.timestamp), rate=reading.rate)
+                records.append(record)
+            payload = json.dumps({"version": snapshot.version, "readings": records},
+                                 separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            try:
+                with FLUSH_DURATION.time():
+                    run_blocking(self._replace_snapshot, payload)
+            except OSError as e:
+                # Журнал лишається як є: load дограє його поверх старого знімка
+                logger.error(f"Error writing state to {self.path}: {e}")
+                return False
+            FLUSH_BYTES.inc(len(payload))
+            self._compact_needed = False
+            self._last_compact = time.monotonic()
+            with self._journal_cond:
+                self._durable_version = max(self._durable_version, snapshot.version)
+                self._journal_cond.notify_all()
+            return True
+
+    def _replace_snapshot(self, payload):
+        # Лише файлові операції: виконується в потоці ОС (run_blocking), де green-блокування не можна брати
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        fsync_directory(self.path)
+        self.journal.reset()
+
+    def _compaction_due(self):
+        if self.journal.size >= self.compact_bytes:
+            return True
+        return ((self.journal.size or self._compact_needed)
+                and time.monotonic() - self._last_compact >= self.compact_interval)
+
+    def _write_loop(self):
+        while True:
+            with self._journal_cond:
+                if not self._pending and not self._stopping:
+                    self._journal_cond.wait(min(self.compact_interval, 1.0))
+                batch, self._pending = self._pending, []
+                stopping = self._stopping
+            if batch:
+                # Усі рядки, що накопичилися за час попереднього fsync, - одним fsync
+                try:
+                    with JOURNAL_SYNC_DURATION.time():
+                        written = run_blocking(self.journal.append, [line for _, line in batch])
+                except OSError as e:
+                    logger.error(f"Error appending to {self.journal.path}: {e}")
+                    with self._journal_cond:
+                        self._pending[:0] = batch
+                    if stopping:
+                        return
+                    time.sleep(1)
+                    continue
+                JOURNAL_BYTES.inc(written)
+                JOURNAL_BATCH_SIZE.observe(len(batch))
+                with self._journal_cond:
+                    self._durable_version = max(self._durable_version, batch[-1][0])
+                    self._journal_cond.notify_all()
+            if stopping:
+                return
+            if self._compaction_due():
+                self.compact()
+
+    def start(self):
+        """Відкриває журнал і запускає фоновий потік запису."""
+        if self._writer is None:
+            self.journal.open()
+            self._writer = threading.Thread(target=self._write_loop, name='state-journal', daemon=True)
+            self._writer.start()
+
+    def healthy(self):
+        """True, поки фоновий потік запису журналу працює (без нього POST не дочекаються fsync)."""
+        return self._writer is not None and self._writer.is_alive()
+
+    def stop(self, timeout=10.0):
+        """Дописує журнал, зупиняє фоновий потік і компактизує стан у файл знімка."""
+        with self._journal_cond:
+            self._stopping = True
+            self._journal_cond.notify_all()
+        if self._writer is not None:
+            self._writer.join(timeout=timeout)
+            if self._writer.is_alive():
+                # Потік ще пише пакет: компактизація скинула б журнал під ним, а закриття
+                # файлу загубило б пакет. Журнал лишається, load дограє його при старті.
+                logger.error(f"State journal writer did not stop in {timeout:g} s, skipping compaction")
+                return
+        if self.journal.size or self._compact_needed:
+            self.compact()
+        self.journal.close()
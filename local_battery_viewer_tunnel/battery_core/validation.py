@@ -0,0 +1,94 @@
+"""Валідація вхідних даних: рівні заряду, тіла пакетних запитів, параметри часу."""
+import json
+import math
+from datetime import datetime, timezone
+
+# Значення, що означають «даних немає» там, де це дозволено (battery_soc_page)
+MISSING_LEVELS = (None, '', 'N/A')
+
+def parse_level(value, allow_missing=False):
+    """Рівень заряду 0..100 з числа чи рядка, інакше ValueError.
+
+    Ціле значення повертається як int (55.0 -> 55), дробове - як float, тож
+    обидва аддони зберігають і віддають рівні однаково. З allow_missing
+    None, '' та 'N/A' означають відсутність даних і повертаються як None.
+    """
+    if allow_missing and value in MISSING_LEVELS:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Level must be a number, got {value!r}")
+    try:
+        level = float(value)
+    except (TypeError, ValueError):
+        expected = "a number or 'N/A'" if allow_missing else "a number"
+        raise ValueError(f"Level must be {expected}, got {value!r}")
+    if math.isnan(level) or not 0 <= level <= 100:
+        raise ValueError(f"Level must be between 0 and 100, got {value!r}")
+    return int(level) if level.is_integer() else level
+
+def read_json_items(request):
+    """Тіло запиту: NDJSON - список об'єктів (рядок, що не розібрався, стає ValueError),
+    інакше - розібраний JSON (None, якщо це не JSON)."""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError("Invalid JSON line"))
+        return items
+    return request.get_json(silent=True)
+
+def read_batch_readings(request):
+    """Пари (id, значення) з тіла пакетного запиту - однаково в обох аддонах.
+
+    Тіло - JSON-масив записів {id, level} (або {id, soc}), {"readings": [...]}
+    з таким масивом, NDJSON-потік записів чи словник {id: level}; {} і
+    порожній масив - порожній пакет. id і значення не перевіряються: це
+    робить аддон. Некоректний запис стає екземпляром ValueError на своєму
+    місці, тіло іншого формату - ValueError.
+    """
+    payload = read_json_items(request)
+    if isinstance(payload, dict):
+        if not isinstance(payload.get('readings'), list):
+            return list(payload.items())
+        payload = payload['readings']
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of readings, {\"readings\": [...]}, an {id: level} object "
+                         "or an NDJSON stream")
+    readings = []
+    for item in payload:
+        if isinstance(item, dict) and 'id' in item:
+            readings.append((item['id'], item['level'] if 'level' in item else item.get('soc')))
+        elif isinstance(item, ValueError):
+            readings.append(item)
+        else:
+            readings.append(ValueError("Reading must be a JSON object with 'id' and 'level'"))
+    return readings
+
+def batch_status(results):
+    """Статус пакетної відповіді: 200 - усе прийнято, 207 - частково, 400 - нічого.
+
+    Придушений фільтром запис вважається прийнятим: він коректний, просто не змінює стан.
+    Порожній пакет нічого не змінює і теж отримує 200.
+    """
+    accepted = sum(1 for r in results if r['status'] != 'error')
+    if accepted == len(results):
+        return "ok", 200
+    if accepted:
+        return "partial", 207
+    return "error", 400
+
+def parse_time_arg(value, default):
+    """Розбирає час із параметра запиту: epoch-секунди або ISO 8601 (UTC)."""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
@@ -0,0 +1,40 @@
+# Конфігурація gunicorn для production-режиму аддона (замість dev-сервера Werkzeug)
+import json
+import os
+
+OPTIONS_FILE = '/data/options.json'
+
+def _option(name, default):
+    """Повертає опцію аддона з options.json, змінної оточення або типове значення."""
+    try:
+        with open(OPTIONS_FILE) as f:
+            value = json.load(f).get(name)
+    except (OSError, ValueError):
+        value = None
+    if value is None:
+        value = os.environ.get(name.upper(), default)
+    return value
+
+# pid master-процесу: воркер рахує від його запуску етапи холодного старту (див. /ready)
+os.environ['STARTUP_PID'] = str(os.getpid())
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8099')}"
+
+# Стан батарей живе в пам'яті процесу, тому воркер рівно один.
+# Паралельність забезпечують green-потоки eventlet: кожне SSE-з'єднання
+# коштує лише green-потік, а не системний потік.
+workers = 1
+worker_class = 'eventlet'
+# Скільки одночасних з'єднань (включно з відкритими SSE-потоками) тримає воркер
+worker_connections = int(_option('worker_connections', 1000))
+
+# Для async-воркера timeout - це лише heartbeat, довгі SSE-запити його не зачіпають
+timeout = 60
+# Менше, ніж супервізор чекає бекенд при зупинці (BACKEND_STOP_TIMEOUT = 8 с)
+graceful_timeout = 6
+# Довше за keepalive cloudflared, щоб тунель перевикористовував з'єднання
+keepalive = 75
+
+accesslog = None
+# log_level аддона; gunicorn не знає рівня fatal, найближчий - critical
+loglevel = {'fatal': 'critical'}.get(_option('log_level', 'info'), _option('log_level', 'info'))
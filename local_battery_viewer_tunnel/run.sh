@@ -4,42 +4,44 @@ echo "Starting HA Battery Monitor Addon with Cloudflare Tunnel..."
 
 # Шляхи
 export DATA_FILE=/share/battery_data.json
-export CONFIG_FILE=/etc/cloudflared/config.yml
+# Шаблон конфігу з образу лишається незмінним, робочий конфіг пишемо поруч із creds
+export CONFIG_TEMPLATE=/etc/cloudflared/config.yml
+export CONFIG_FILE=/tmp/cloudflared.yml
 # Шлях до файлу облікових даних, який користувач повинен покласти у /share
 export SHARED_CREDS_FILE=/share/tunnel_creds.json 
 
-# ----------------------------------------------------------------
-# 1. Запуск Flask-сервера
-# ----------------------------------------------------------------
-echo "Starting Flask server on port 8099 in background..."
-python3 /app/app.py &
+# Сервер метрик cloudflared: його /ready - перевірка здоров'я тунелю
+export TUNNEL_METRICS=127.0.0.1:8098
 
-# ЗБЕРЕЖЕННЯ PID: Це критично для коректної роботи 'wait' і 'kill'.
-FLASK_PID=$!
+BACKEND="gunicorn --config /app/gunicorn.conf.py --chdir /app app:app"
+BACKEND_HEALTH=http://127.0.0.1:8099/healthz
 
 # ----------------------------------------------------------------
-# 2. Налаштування та запуск Cloudflare Tunnel
+# 1. Локальний режим: без тунелю дашборд лишається доступним у LAN
 # ----------------------------------------------------------------
+run_local() {
+    echo "Access the web interface via http://<HA_IP>:8099."
+    exec python3 /app/battery_core/supervisor.py --backend "$BACKEND" --backend-health "$BACKEND_HEALTH"
+}
 
 # Перевірка наявності необхідних змінних
 if [ -z "$CLOUDFLARED_TUNNEL_ID" ] || [ -z "$TUNNEL_DOMAIN" ]; then
-    echo "WARNING: Cloudflare Tunnel secrets (ID and DOMAIN) are not set."
-    echo "Skipping tunnel startup. Access the web interface via http://<HA_IP>:8099."
-    # Якщо тунель не запускається, чекаємо Flask і виходимо
-    wait $FLASK_PID 
-    exit $?
+    echo "WARNING: Cloudflare Tunnel secrets (ID and DOMAIN) are not set. Skipping tunnel startup."
+    run_local
 fi
 
 export TUNNEL_ID=$CLOUDFLARED_TUNNEL_ID 
 
 # Перевірка наявності файлу облікових даних
 if [ ! -f "$SHARED_CREDS_FILE" ]; then
-    echo "ERROR: Cloudflare credentials file not found at $SHARED_CREDS_FILE."
+    echo "ERROR: Cloudflare credentials file not found at $SHARED_CREDS_FILE. Skipping tunnel startup."
     echo "Будь ласка, розмістіть файл creds.json у папці /share/ та перейменуйте його на tunnel_creds.json."
-    kill $FLASK_PID
-    exit 1
+    run_local
 fi
 
+# ----------------------------------------------------------------
+# 2. Налаштування Cloudflare Tunnel
+# ----------------------------------------------------------------
 echo "Tunnel ID: $TUNNEL_ID"
 echo "Tunnel Domain: $TUNNEL_DOMAIN"
 
@@ -47,11 +49,23 @@ echo "Tunnel Domain: $TUNNEL_DOMAIN"
 mkdir -p /etc/cloudflared/
 cp "$SHARED_CREDS_FILE" /etc/cloudflared/creds.json 
 
-# 2. Заміна плейсхолдерів у конфігураційному файлі cloudflared.yml
-sed -i "s/\${TUNNEL_ID}/$TUNNEL_ID/" $CONFIG_FILE
-sed -i "s/\${TUNNEL_DOMAIN}/$TUNNEL_DOMAIN/" $CONFIG_FILE
+# 2. Підстановка плейсхолдерів шаблону засобами bash (без sed і без зміни
+# файлу в образі, тож повторний старт контейнера бачить той самий шаблон)
+config=$(<"$CONFIG_TEMPLATE")
+config=${config//'${TUNNEL_ID}'/$TUNNEL_ID}
+config=${config//'${TUNNEL_DOMAIN}'/$TUNNEL_DOMAIN}
+printf '%s\n' "$config" > "$CONFIG_FILE"
 
-echo "Starting Cloudflared Tunnel..."
-
-# Запускаємо cloudflared як головний процес
-exec cloudflared tunnel run --config $CONFIG_FILE
+# ----------------------------------------------------------------
+# 3. Запуск під супервізором
+# ----------------------------------------------------------------
+# Супервізор - головний процес: перезапускає gunicorn, якщо /healthz не
+# відповідає, і cloudflared, якщо тунель не готовий; падіння тунелю не
+# зупиняє локальний дашборд. Версія cloudflared зафіксована в образі,
+# тож самооновлення вимкнене. --grace-period: при зупинці аддона cloudflared
+# чекає незавершені запити 2 с замість типових 30 (див. TUNNEL_STOP_TIMEOUT).
+echo "Starting gunicorn and Cloudflared Tunnel under supervisor..."
+exec python3 /app/battery_core/supervisor.py \
+    --backend "$BACKEND" --backend-health "$BACKEND_HEALTH" \
+    --tunnel "cloudflared tunnel --no-autoupdate --grace-period 2s --metrics $TUNNEL_METRICS run --config $CONFIG_FILE" \
+    --tunnel-health "http://$TUNNEL_METRICS/ready"
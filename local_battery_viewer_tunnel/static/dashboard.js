@@ -0,0 +1,234 @@
+// Налаштування сторінка передає JSON-блоком, тож сам скрипт не залежить від сервера
+// і кешується браузером назавжди (ім'я файлу містить хеш вмісту).
+const CONFIG = JSON.parse(document.getElementById('dashboard-config').textContent);
+// Реєстр сенсорів: [{id, name, group}], групи - у порядку оголошення
+const SENSORS = CONFIG.sensors;
+const GROUPS = CONFIG.groups;
+const PAGE_SIZE = CONFIG.pageSize;
+const API_URL = CONFIG.apiUrl;
+const EVENTS_URL = CONFIG.eventsUrl;
+// Пороги кольору індикатора (рівень <= порогу), ті самі, що й у сервера
+const THRESHOLDS = CONFIG.thresholds;
+const POLL_INTERVAL = 5000;
+// Компактний формат /data і /events: батарея - рядок [id, level, epoch, rate,
+// time_to_empty, time_to_full, anomalies] без порожнього хвоста, назви - з реєстру
+const COLUMNAR = 'application/vnd.battery.columnar+json';
+// Остання відома версія стану: далі запитуємо лише зміни після неї
+let stateVersion = null;
+const grid = document.getElementById('battery-grid');
+const tabs = document.getElementById('group-tabs');
+const pager = document.getElementById('pager');
+
+// Останні відомі записи, щоб перемикання сторінок не чекало на мережу
+const latest = {};
+let currentGroup = GROUPS[0];
+let currentPage = 0;
+
+function groupSensors() {
+    return SENSORS.filter(sensor => sensor.group === currentGroup);
+}
+
+function groupQuery() {
+    return GROUPS.length > 1 ? `group=${encodeURIComponent(currentGroup)}` : '';
+}
+
+// У DOM лише індикатори поточної сторінки поточної групи
+function buildGrid() {
+    const sensors = groupSensors();
+    const pages = Math.max(1, Math.ceil(sensors.length / PAGE_SIZE));
+    currentPage = Math.min(currentPage, pages - 1);
+    grid.innerHTML = '';
+    sensors.slice(currentPage * PAGE_SIZE, (currentPage + 1) * PAGE_SIZE).forEach(({ id, name }) => {
+        const unit = document.createElement('div');
+        unit.className = 'indicator-unit';
+        unit.innerHTML = `
+            <h2 class="system-title"></h2>
+            <div class="battery-container" id="container-${id}">
+                <div class="battery-level" id="level-${id}">--%</div>
+            </div>
+            <div class="timestamp-text" id="time-${id}">Останнє оновлення: Н/Д</div>
+            <div class="forecast-text" id="forecast-${id}"></div>
+        `;
+        unit.querySelector('.system-title').textContent = name;
+        grid.appendChild(unit);
+        if (latest[id]) renderBattery(latest[id]);
+    });
+    buildNavigation(pages);
+}
+
+function buildNavigation(pages) {
+    tabs.innerHTML = '';
+    if (GROUPS.length > 1) {
+        GROUPS.forEach(group => {
+            const tab = document.createElement('button');
+            tab.className = 'tab' + (group === currentGroup ? ' active' : '');
+            tab.textContent = group;
+            tab.onclick = () => selectGroup(group);
+            tabs.appendChild(tab);
+        });
+    }
+    pager.innerHTML = '';
+    if (pages > 1) {
+        const prev = document.createElement('button');
+        prev.textContent = '‹';
+        prev.disabled = currentPage === 0;
+        prev.onclick = () => { currentPage--; buildGrid(); };
+        const label = document.createElement('span');
+        label.textContent = `${currentPage + 1} / ${pages}`;
+        const next = document.createElement('button');
+        next.textContent = '›';
+        next.disabled = currentPage === pages - 1;
+        next.onclick = () => { currentPage++; buildGrid(); };
+        pager.append(prev, label, next);
+    }
+}
+
+function selectGroup(group) {
+    currentGroup = group;
+    currentPage = 0;
+    // Нова група - новий набір батарей: спочатку повний стан групи
+    stateVersion = null;
+    buildGrid();
+    connectEvents();
+}
+
+function formatTimestamp(isoString) {
+    if (!isoString) return 'Н/Д';
+    try {
+        const date = new Date(isoString);
+        return date.toLocaleDateString('uk-UA') 
+            + ' ' 
+            + date.toLocaleTimeString('uk-UA');
+    } catch (e) {
+        return 'Невірний формат часу';
+    }
+}
+
+const ANOMALY_LABELS = {
+    sudden_drop: 'Різке падіння',
+    sudden_rise: 'Різке зростання',
+    fast_drain: 'Швидкий розряд',
+};
+
+function formatDuration(seconds) {
+    const minutes = Math.round(seconds / 60);
+    if (minutes < 60) return `${minutes} хв`;
+    const hours = Math.floor(minutes / 60);
+    if (hours >= 48) return `${Math.round(hours / 24)} дн`;
+    return `${hours} год ${minutes % 60} хв`;
+}
+
+// Прогноз і аномалії рахує сервер інкрементально з кожного оновлення
+function formatForecast({ rate, time_to_empty, time_to_full, anomalies }) {
+    const parts = [];
+    if (time_to_empty !== null && time_to_empty !== undefined) {
+        parts.push(`≈ ${formatDuration(time_to_empty)} до розряду (${rate}%/год)`);
+    } else if (time_to_full !== null && time_to_full !== undefined) {
+        parts.push(`≈ ${formatDuration(time_to_full)} до повного заряду (+${rate}%/год)`);
+    }
+    (anomalies || []).forEach(flag => parts.push(`⚠ ${ANOMALY_LABELS[flag] || flag}`));
+    return parts.join(' · ');
+}
+
+// Рядок колонкового формату -> запис у вигляді JSON-відповіді /data
+function decodeRow([id, level, epoch, rate = null, time_to_empty = null, time_to_full = null, anomalies = []]) {
+    const timestamp = epoch === null ? null : new Date(epoch * 1000).toISOString();
+    return { id, level, timestamp, rate, time_to_empty, time_to_full, anomalies };
+}
+
+function renderBattery(data) {
+    const { id, level, timestamp } = data; 
+    latest[id] = data;
+    const levelEl = document.getElementById(`level-${id}`);
+    const timeEl = document.getElementById(`time-${id}`);
+    const forecastEl = document.getElementById(`forecast-${id}`);
+
+    if (levelEl) {
+        levelEl.textContent = `${level}%`;
+        timeEl.textContent = `Оновлено: ${formatTimestamp(timestamp)}`;
+        forecastEl.textContent = formatForecast(data);
+        forecastEl.classList.toggle('anomaly', (data.anomalies || []).length > 0);
+
+        // Кольорова індикація
+        levelEl.classList.remove('color-success', 'color-warning', 'color-danger');
+        if (level <= THRESHOLDS.critical) {
+            levelEl.classList.add('color-danger'); 
+        } else if (level <= THRESHOLDS.warning) {
+            levelEl.classList.add('color-warning'); 
+        } else {
+            levelEl.classList.add('color-success'); 
+        }
+    }
+}
+
+async function updateBatteryStatus() {
+    try {
+        const params = [groupQuery(), stateVersion === null ? '' : `since=${stateVersion}`].filter(Boolean);
+        const response = await fetch(params.length ? `${API_URL}?${params.join('&')}` : API_URL,
+                                     { headers: { Accept: COLUMNAR } });
+        if (!response.ok) {
+            throw new Error(`Помилка HTTP! Статус: ${response.status}`);
+        }
+        const { rows } = await response.json();
+        stateVersion = response.headers.get('X-State-Version') || stateVersion;
+
+        rows.map(decodeRow).forEach(renderBattery);
+
+    } catch (error) {
+        console.error('Помилка при отриманні даних:', error);
+        // Після помилки наступний запит має повернути повний стан
+        stateVersion = null;
+        // Оновлення всіх статусів у разі помилки
+        for (const { id } of groupSensors()) {
+            const levelEl = document.getElementById(`level-${id}`);
+            const timeEl = document.getElementById(`time-${id}`);
+            if (levelEl) {
+                levelEl.textContent = 'Пом.';
+                levelEl.classList.remove('color-success', 'color-warning');
+                levelEl.classList.add('color-danger'); 
+            }
+            if (timeEl) {
+                 timeEl.textContent = 'Помилка мережі';
+            }
+        }
+    }
+}
+
+// Опитування /data лишається запасним варіантом, коли push-канал недоступний
+let pollTimer = null;
+function startPolling() {
+    if (pollTimer) return;
+    updateBatteryStatus();
+    pollTimer = setInterval(updateBatteryStatus, POLL_INTERVAL);
+}
+function stopPolling() {
+    if (!pollTimer) return;
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+// Сервер надсилає лише змінені батареї поточної групи одразу після POST
+let source = null;
+function connectEvents() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    if (source) source.close();
+    const params = [groupQuery(), 'format=columnar'].filter(Boolean);
+    source = new EventSource(`${EVENTS_URL}?${params.join('&')}`);
+    source.onopen = () => {
+        stopPolling();
+        // Повний стан один раз після (пере)підключення, далі - лише зміни
+        updateBatteryStatus();
+    };
+    source.onmessage = (event) => {
+        JSON.parse(event.data).map(decodeRow).forEach(renderBattery);
+    };
+    source.onerror = () => {
+        startPolling();
+    };
+}
+
+buildGrid();
+connectEvents();
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Копіює спільний пакет battery_core у теки аддонів.
+
+Supervisor збирає образ кожного аддона лише з його теки, тож battery_core
+з кореня репозиторію має лежати поруч з app.py кожного аддона. Правки
+вносяться тільки в корені, після чого:
+
+    python3 scripts/sync_core.py          # оновити копії
+    python3 scripts/sync_core.py --check  # лише перевірити (код 1, якщо копії застаріли)
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE = os.path.join(ROOT, 'battery_core')
+ADDONS = ('local_battery_viewer_tunnel', 'battery_soc_page')
+IGNORE = shutil.ignore_patterns('__pycache__', '*.pyc')
+
+def core_files(directory):
+    """Відносні шляхи .py-файлів пакета."""
+    files = set()
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for name in names:
+            if name.endswith('.py'):
+                files.add(os.path.relpath(os.path.join(root, name), directory))
+    return files
+
+def is_stale(target):
+    if not os.path.isdir(target):
+        return True
+    source_files = core_files(CORE)
+    if source_files != core_files(target):
+        return True
+    _, mismatch, errors = filecmp.cmpfiles(CORE, target, sorted(source_files), shallow=False)
+    return bool(mismatch or errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='не копіювати, лише перевірити копії')
+    args = parser.parse_args()
+
+    stale = []
+    for addon in ADDONS:
+        target = os.path.join(ROOT, addon, 'battery_core')
+        if not is_stale(target):
+            continue
+        stale.append(addon)
+        if not args.check:
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(CORE, target, ignore=IGNORE)
+            print(f"updated {addon}/battery_core")
+    if args.check and stale:
+        print(f"battery_core is out of date in: {', '.join(stale)}; run scripts/sync_core.py", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Спільні фікстури: застосунки аддонів, імпортовані з тимчасовими даними."""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_addon(addon, module_name, env):
+    """Імпортує app.py аддона як module_name зі змінними середовища env.
+
+    Кожен app.py реєструє колектори в глобальному REGISTRY Prometheus, тож
+    імпортувати його можна лише раз за сесію - звідси фікстури scope='session'.
+    """
+    addon_dir = os.path.join(REPO_ROOT, addon)
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in env.items():
+            mp.setenv(name, str(value))
+        mp.syspath_prepend(addon_dir)
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(addon_dir, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope='session')
+def soc_app(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('soc')
+    module = import_addon('battery_soc_page', 'battery_soc_app', {
+        'DATA_FILE': workdir / 'data.json',
+        'HISTORY_FILE': workdir / 'history.db',
+        'OPTIONS_FILE': workdir / 'options.json',
+        'SENSORS_FILE': workdir / 'sensors.json',
+        'SUPERVISOR_STATUS_FILE': workdir / 'supervisor.json',
+    })
+    yield module
+    module.history.stop()
+    module.state.stop()
@@ -0,0 +1,18 @@
+"""AlertDispatcher: черга доставки алертів."""
+from prometheus_client import REGISTRY
+
+from battery_core import AlertDispatcher
+
+def dropped_alerts():
+    return REGISTRY.get_sample_value('battery_alert_deliveries_total', {'target': 'queue', 'result': 'dropped'}) or 0
+
+def test_submit_without_targets_does_not_queue():
+    dispatcher = AlertDispatcher([], 'battery', 'Battery', maxsize=10)
+    dispatcher.start()
+    dropped = dropped_alerts()
+
+    dispatcher.submit([{"sensor": "1", "state": "firing"}] * 20)
+
+    assert dispatcher.depth() == 0
+    assert dropped_alerts() == dropped
+    dispatcher.stop()
@@ -0,0 +1,76 @@
+"""DischargeEstimator: EWMA швидкості, прогноз розряду/заряду, прапорці аномалій."""
+import math
+
+import pytest
+
+from battery_core import DischargeEstimator, SensorState
+
+T0 = 1_700_000_000.0
+
+def test_first_reading_has_no_rate():
+    estimator = DischargeEstimator()
+    assert estimator.observe('a', 80, T0) == DischargeEstimator.EMPTY
+
+def test_rate_is_time_weighted_ewma():
+    estimator = DischargeEstimator(tau=900.0)
+    estimator.observe('a', 80, T0)
+
+    # Миттєва швидкість -40 %/год за проміжок tau важить 1 - e^-1
+    expected = (1 - math.exp(-1)) * -40
+    assert estimator.observe('a', 70, T0 + 900)['rate'] == pytest.approx(expected, abs=0.01)
+    # Короткий проміжок зрушує оцінку менше, ніж довгий, за тієї ж миттєвої швидкості
+    short, long = DischargeEstimator(tau=900.0), DischargeEstimator(tau=900.0)
+    for estimator in (short, long):
+        estimator.seed('a', 80, T0, rate=-10.0)
+    assert short.observe('a', 79, T0 + 90)['rate'] > long.observe('a', 70, T0 + 900)['rate']
+
+def test_time_to_empty_and_full():
+    estimator = DischargeEstimator(idle_rate=0.5)
+
+    assert estimator.summary(50, -10.0, [])['time_to_empty'] == 5 * 3600
+    assert estimator.summary(80, 5.0, [])['time_to_full'] == 4 * 3600
+    # У спокої і на повному заряді прогнозу немає
+    idle = estimator.summary(50, 0.3, [])
+    assert idle['time_to_empty'] is None and idle['time_to_full'] is None
+    assert estimator.summary(100, 5.0, [])['time_to_full'] is None
+
+@pytest.mark.parametrize('level, anomaly', [(65, 'sudden_drop'), (95, 'sudden_rise')])
+def test_soc_jump_is_flagged(level, anomaly):
+    estimator = DischargeEstimator(sudden_change=10.0, sudden_window=600.0)
+    estimator.observe('a', 80, T0)
+
+    assert anomaly in estimator.observe('a', level, T0 + 60)['anomalies']
+    # Наступне значення без стрибка прапорець знімає
+    assert anomaly not in estimator.observe('a', level, T0 + 120)['anomalies']
+
+def test_stale_seed_does_not_flag_a_jump():
+    estimator = DischargeEstimator(tau=900.0, sudden_change=10.0, sudden_window=600.0)
+    # Після перезапуску: останнє збережене значення дві години тому
+    estimator.seed('a', 80, T0, rate=-4.0)
+
+    result = estimator.observe('a', 50, T0 + 7200)
+    # Різниця велика, але розтягнута на години - це не стрибок
+    assert 'sudden_drop' not in result['anomalies']
+    # За проміжок 8 tau оцінка майже повністю переходить на нову швидкість -15 %/год
+    assert result['rate'] == pytest.approx(-15.0, abs=0.01)
+
+def test_fast_drain_and_out_of_order_readings():
+    estimator = DischargeEstimator(tau=900.0, fast_rate=20.0)
+    estimator.seed('a', 80, T0, rate=-30.0)
+
+    assert 'fast_drain' in estimator.observe('a', 79, T0 + 60)['anomalies']
+    rate = estimator.observe('a', 78, T0 + 120)['rate']
+    # Значення з тим самим часом змінює рівень, але не швидкість
+    assert estimator.observe('a', 70, T0 + 120)['rate'] == rate
+
+def test_soc_jump_reaches_the_snapshot(tmp_path):
+    state = SensorState(str(tmp_path / 'data.json'), ['a'], analytics=DischargeEstimator())
+    state.load()
+    state.apply([('a', 80)], now=T0)
+    reading = state.apply([('a', 60)], now=T0 + 30).snapshot.readings['a']
+
+    assert 'sudden_drop' in reading.anomalies
+    assert reading.rate < 0 and reading.time_to_empty > 0
+    # N/A скидає оцінку: наступне значення знову перше
+    state.apply([('a', None)], now=T0 + 60)
+    assert state.apply([('a', 40)], now=T0 + 90).snapshot.readings['a'].rate is None
@@ -0,0 +1,19 @@
+"""gunicorn.conf.py обох аддонів: рівень логування з опції log_level."""
+import os
+import runpy
+
+import pytest
+
+from conftest import REPO_ROOT
+
+@pytest.mark.parametrize('addon', ['battery_soc_page', 'local_battery_viewer_tunnel'])
+@pytest.mark.parametrize('option, loglevel', [('fatal', 'critical'), ('warning', 'warning'), (None, 'info')])
+def test_loglevel_follows_log_level_option(addon, option, loglevel, monkeypatch):
+    # Без /data/options.json опція береться зі змінної середовища LOG_LEVEL
+    monkeypatch.delenv('LOG_LEVEL', raising=False)
+    # Конфіг записує STARTUP_PID у середовище; monkeypatch поверне його після тесту
+    monkeypatch.setenv('STARTUP_PID', str(os.getpid()))
+    if option is not None:
+        monkeypatch.setenv('LOG_LEVEL', option)
+    config = runpy.run_path(os.path.join(REPO_ROOT, addon, 'gunicorn.conf.py'))
+    assert config['loglevel'] == loglevel
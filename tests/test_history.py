@@ -0,0 +1,58 @@
+"""HistoryStore: сирі виміри й хвилинні/годинні корзини."""
+import threading
+import time
+
+import pytest
+
+from battery_core import HistoryStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.open()
+    yield store
+    store.stop()
+
+def rollups(conn, table):
+    return conn.execute(f'SELECT sensor, bucket, lo, hi, total, n, last FROM {table}').fetchall()
+
+def test_duplicate_samples_are_rolled_up_once(store):
+    conn = store._connect()
+    ts = 7200.5
+    store._write(conn, [('a', ts, 50.0)])
+    # Той самий вимір ще раз - і в іншому пакеті, і двічі в одному
+    store._write(conn, [('a', ts, 50.0), ('a', ts, 50.0)])
+
+    assert conn.execute('SELECT COUNT(*) FROM samples').fetchone()[0] == 1
+    assert rollups(conn, 'rollup_1m') == [('a', 7200, 50.0, 50.0, 50.0, 1, 50.0)]
+    assert rollups(conn, 'rollup_1h') == [('a', 7200, 50.0, 50.0, 50.0, 1, 50.0)]
+
+def test_distinct_samples_share_a_bucket(store):
+    conn = store._connect()
+    store._write(conn, [('a', 7200.0, 50.0), ('a', 7210.0, 40.0), ('b', 7210.0, 90.0)])
+
+    assert sorted(rollups(conn, 'rollup_1m')) == [('a', 7200, 40.0, 50.0, 90.0, 2, 40.0),
+                                                  ('b', 7200, 90.0, 90.0, 90.0, 1, 90.0)]
+
+def test_queries_share_one_read_connection(store, monkeypatch):
+    now = time.time()
+    store._write(store._connect(), [('a', now - 30, 50.0), ('a', now - 10, 40.0)])
+    connections = []
+    connect = store._connect
+    monkeypatch.setattr(store, '_connect', lambda: connections.append(connect()) or connections[-1])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.query('a', now - 600, now + 60, 60)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(connections) == 1
+    assert len(results) == 8 and all(points for _, _, points in results)
+
+def test_step_is_rounded_up_to_tier_resolution(store):
+    start = time.time() - 30 * 86400  # сирих даних за цей проміжок уже немає - хвилинний рівень
+    assert store.query('a', start, start + 86400, 90)[:2] == ('1m', 120)
+    assert store.query('a', start, start + 86400, 120)[:2] == ('1m', 120)
+    assert store.query('a', start, start + 86400, 30)[:2] == ('1m', 60)
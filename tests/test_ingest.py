@@ -0,0 +1,69 @@
+"""IngestFilter і RateLimiter: deadband, відкладені значення, поповнення token bucket."""
+import types
+
+import pytest
+
+from battery_core import IngestFilter, RateLimiter, ingest
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ingest, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+def test_reading_inside_deadband_is_dropped(clock):
+    ingest_filter = IngestFilter({'a': (2.0, 0)})
+
+    assert ingest_filter.admit([('a', 50.0)]) == [None]
+    assert ingest_filter.admit([('a', 51.5), ('a', 48.5)]) == ['deadband', 'deadband']
+    # Відлік іде від останнього прийнятого значення, а не від відкинутих
+    assert ingest_filter.admit([('a', 52.0)]) == [None]
+    assert ingest_filter.due() == []
+
+def test_deferred_reading_is_flushed_by_due(clock):
+    ingest_filter = IngestFilter({'a': (0, 10.0)})
+
+    assert ingest_filter.admit([('a', 50.0)]) == [None]
+    clock.now += 3
+    assert ingest_filter.admit([('a', 45.0), ('a', 40.0)]) == ['interval', 'interval']
+    assert ingest_filter.due() == []
+
+    clock.now += 7
+    # Лишається останнє відкладене значення, і лише один раз
+    assert ingest_filter.due() == [('a', 40.0)]
+    assert ingest_filter.due() == []
+    # Відкладене стало прийнятим: наступне значення знову чекає на інтервал
+    assert ingest_filter.admit([('a', 35.0)]) == ['interval']
+
+def test_return_inside_deadband_cancels_deferred_reading(clock):
+    ingest_filter = IngestFilter({'a': (2.0, 10.0)})
+
+    ingest_filter.admit([('a', 50.0)])
+    clock.now += 1
+    assert ingest_filter.admit([('a', 40.0)]) == ['interval']
+    assert ingest_filter.admit([('a', 50.5)]) == ['deadband']
+    clock.now += 10
+    assert ingest_filter.due() == []
+
+def test_rate_limiter_refills(clock):
+    limiter = RateLimiter(rate=2.0, burst=3)
+
+    assert [limiter.acquire('10.0.0.1') for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire('10.0.0.1') == pytest.approx(0.5)
+    # Корзини незалежні для кожного ключа
+    assert limiter.acquire('10.0.0.2') == 0
+
+    clock.now += 0.5
+    assert limiter.acquire('10.0.0.1') == 0
+    assert limiter.acquire('10.0.0.1') > 0
+    clock.now += 10
+    # Запас не перевищує burst, хоч би скільки минуло часу
+    assert [limiter.acquire('10.0.0.1') for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire('10.0.0.1') > 0
@@ -0,0 +1,39 @@
+"""GET /history аддона battery_soc_page поверх знімків стану."""
+import time
+
+def wait_for_points(client, query, timeout=10):
+    # Історію пише фоновий потік пакетами раз на commit_interval
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f'/history?{query}')
+        if response.status_code != 200 or response.get_json()['points'] or time.monotonic() > deadline:
+            return response
+        time.sleep(0.1)
+
+def test_history_returns_posted_readings(soc_app):
+    client = soc_app.app.test_client()
+    # Хвилинні корзини починаються з цілої хвилини
+    start = int(time.time()) // 60 * 60
+    response = client.post('/api/battery_soc', json={'1': 42})
+    assert response.status_code == 200
+
+    response = wait_for_points(client, f'id=1&from={start}&to={start + 120}&step=60')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['id'] == '1'
+    assert body['tier'] == '1m'
+    assert [point[1:] for point in body['points']] == [[42.0, 42.0, 42.0]]
+
+def test_history_rejects_bad_arguments(soc_app):
+    client = soc_app.app.test_client()
+    assert client.get('/history?id=unknown').status_code == 404
+    assert client.get('/history?id=1&from=yesterday').status_code == 400
+    assert client.get('/history?id=1&from=200&to=100').status_code == 400
+
+def test_history_step_must_be_a_positive_integer(soc_app):
+    client = soc_app.app.test_client()
+    for query in ('step=abc', 'step=', 'step=1.5', 'step=0', 'step=-60'):
+        response = client.get(f'/history?id=1&{query}')
+        assert response.status_code == 400, query
+        assert 'step' in response.get_json()['message']
+    assert client.get('/history?id=1&step=60').status_code == 200
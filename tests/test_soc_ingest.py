@@ -0,0 +1,45 @@
+"""POST /api/battery_soc аддона battery_soc_page: формати пакета, підтвердження після fsync власного запису."""
+
+def test_post_waits_for_its_own_version(soc_app, monkeypatch):
+    client = soc_app.app.test_client()
+    ingest_updates, wait_durable = soc_app.ingest_updates, soc_app.state.wait_durable
+    written, waited = [], []
+
+    def ingest_then_concurrent_write(readings):
+        reasons, update = ingest_updates(readings)
+        written.append(update.snapshot.version)
+        # Інший запис (HA, peer sync, інший POST) встигає між застосуванням і очікуванням
+        soc_app.apply_updates([('2', 10)])
+        return reasons, update
+
+    def record_wait(version, timeout=5.0):
+        waited.append(version)
+        return wait_durable(version, timeout)
+    monkeypatch.setattr(soc_app, 'ingest_updates', ingest_then_concurrent_write)
+    monkeypatch.setattr(soc_app.state, 'wait_durable', record_wait)
+
+    response = client.post('/api/battery_soc', json={'1': 77})
+    assert response.status_code == 200
+    assert waited == written
+    assert soc_app.state.snapshot.version > written[0]
+
+def test_batch_shapes_match_the_tunnel(soc_app):
+    client = soc_app.app.test_client()
+
+    response = client.post('/api/battery_soc', json={})
+    # Порожній пакет нічого не змінює, але це не помилка
+    assert response.status_code == 200
+    assert response.get_json()['applied'] == 0
+
+    response = client.post('/api/battery_soc', json={'readings': [{'id': '1', 'soc': 31}, {'id': 5, 'level': 32}]})
+    assert response.status_code == 200
+    assert [(r['id'], r['soc']) for r in response.get_json()['results']] == [('1', 31), ('5', 32)]
+
+    response = client.post('/api/battery_soc', data='{"id": "1", "level": 33}\n{"id": "nope", "soc": 1}\n',
+                           content_type='application/x-ndjson')
+    assert response.status_code == 207
+    assert [r['status'] for r in response.get_json()['results']] == ['updated', 'error']
+    assert soc_app.state.snapshot.readings['1'].level == 33
+
+    assert client.post('/api/battery_soc', json=[{'soc': 1}]).status_code == 400
+    assert client.post('/api/battery_soc', json=42).status_code == 400
@@ -0,0 +1,35 @@
+"""Socket.IO-повідомлення аддона battery_soc_page: колонковий формат і словники."""
+import time
+
+from battery_core import COLUMNAR_FIELDS
+
+def decode_rows(rows):
+    """({sn: SOC}, {sn: аналітика}) з рядків так, як їх відновлює decodeRows у dashboard.js."""
+    defaults = {"rate": None, "time_to_empty": None, "time_to_full": None, "anomalies": []}
+    values, analytics = {}, {}
+    for row in rows:
+        fields = {**defaults, **dict(zip(COLUMNAR_FIELDS, row))}
+        values[fields.pop('id')] = fields.pop('level')
+        fields.pop('timestamp')
+        analytics[row[0]] = fields
+    return values, analytics
+
+def test_columnar_snapshot_decodes_to_dict_snapshot(soc_app):
+    # Два значення з проміжком - у датчика з'являється аналітика (rate, прогноз)
+    soc_app.apply_updates([('3', 90), ('4', None)])
+    time.sleep(1.1)
+    soc_app.apply_updates([('3', 70)])
+
+    event, plain = soc_app.snapshot_since(None, None)
+    columnar_event, columnar = soc_app.snapshot_since(None, None, columnar=True)
+    assert event == columnar_event == 'soc_snapshot'
+    assert columnar['fields'] == COLUMNAR_FIELDS
+    assert plain['analytics']['3']['rate'] is not None
+    assert decode_rows(columnar['rows']) == (plain['data'], plain['analytics'])
+
+    # Дельта від версії клієнта - ті самі значення в обох форматах
+    base = plain['version'] - 1
+    _, delta = soc_app.snapshot_since(plain['epoch'], base)
+    _, columnar_delta = soc_app.snapshot_since(plain['epoch'], base, columnar=True)
+    assert delta['changes'] == {'3': 70}
+    assert decode_rows(columnar_delta['rows']) == (delta['changes'], delta['analytics'])
@@ -0,0 +1,118 @@
+"""SensorState: журнал, компактизація, зупинка й злиття значень пірів."""
+import json
+import threading
+
+from battery_core import SensorState, move_legacy_state
+from battery_core.journal import encode_record
+
+def test_stop_keeps_journal_while_writer_is_busy(tmp_path):
+    path = tmp_path / 'data.json'
+    state = SensorState(str(path), ['a'])
+    state.load()
+    state.start()
+    release = threading.Event()
+    append = state.journal.append
+
+    def stuck_append(lines):
+        release.wait()
+        return append(lines)
+    state.journal.append = stuck_append
+    state.apply([('a', 50)])
+
+    state.stop(timeout=0.2)
+    # Зависший запис не можна ні обрізати компактизацією, ні лишити без файлу
+    assert not path.exists()
+    assert state.journal._file is not None
+
+    release.set()
+    state._writer.join(timeout=5)
+    assert not state._writer.is_alive()
+    restored = SensorState(str(path), ['a'])
+    restored.load()
+    assert restored.snapshot.readings['a'].level == 50
+    state.journal.close()
+
+def test_stop_compacts_journal(tmp_path):
+    path = tmp_path / 'data.json'
+    state = SensorState(str(path), ['a'])
+    state.load()
+    state.start()
+    state.apply([('a', 50)])
+    state.stop()
+
+    assert json.loads(path.read_text(encoding='utf-8'))['readings'][0]['level'] == 50
+    assert (tmp_path / 'data.json.journal').stat().st_size == 0
+
+def test_move_legacy_state_moves_snapshot_and_journal(tmp_path):
+    legacy = tmp_path / 'app' / 'data.json'
+    legacy.parent.mkdir()
+    legacy.write_text('{"version": 1, "readings": [{"id": "a", "level": 40}]}', encoding='utf-8')
+    (tmp_path / 'app' / 'data.json.journal').write_bytes(encode_record(2, 1000.0, [['a', 50]]))
+    path = tmp_path / 'data' / 'data.json'
+
+    assert move_legacy_state(str(legacy), str(path))
+    assert not legacy.exists()
+    restored = SensorState(str(path), ['a'])
+    restored.load()
+    # Рівень із журналу, новіший за знімок: перенесено обидва файли
+    assert restored.snapshot.readings['a'].level == 50
+
+def test_move_legacy_state_moves_journal_without_snapshot(tmp_path):
+    legacy, path = tmp_path / 'old.json', tmp_path / 'new.json'
+    (tmp_path / 'old.json.journal').write_bytes(encode_record(2, 1000.0, [['a', 50]]))
+
+    assert move_legacy_state(str(legacy), str(path))
+    restored = SensorState(str(path), ['a'])
+    restored.load()
+    assert restored.snapshot.readings['a'].level == 50
+
+def test_move_legacy_state_keeps_existing_state(tmp_path):
+    legacy, path = tmp_path / 'old.json', tmp_path / 'new.json'
+    legacy.write_text('{"version": 1, "readings": []}', encoding='utf-8')
+    path.write_text('{"version": 2, "readings": []}', encoding='utf-8')
+
+    assert not move_legacy_state(str(legacy), str(path))
+    assert json.loads(path.read_text(encoding='utf-8'))['version'] == 2
+
+def test_merge_keeps_the_latest_writer(tmp_path):
+    state = SensorState(str(tmp_path / 'data.json'), ['a', 'b'])
+    state.load()
+    now = 1_700_000_000.0
+
+    update = state.merge([('a', 50, now - 20), ('a', 40, now - 10), ('a', 45, now - 15)], now=now)
+    # У пакеті перемагає найновіше значення, а не останнє за порядком
+    assert update.updated == ['a']
+    assert state.snapshot.readings['a'].level == 40
+    assert state.snapshot.readings['a'].timestamp == now - 10
+
+    stale = state.merge([('a', 30, now - 30), ('unknown', 10, now)], now=now)
+    # Старіше значення й невідомий сенсор нічого не змінюють і не публікують нову версію
+    assert stale.updated == [] and stale.snapshot is stale.previous
+    assert state.snapshot.readings['a'].level == 40
+
+    # Локальний запис має власний час і так само бере участь у порівнянні
+    state.apply([('b', 70)], now=now)
+    state.merge([('b', 60, now - 1)], now=now)
+    assert state.snapshot.readings['b'].level == 70
+
+def test_merge_tie_keeps_the_current_value(tmp_path):
+    state = SensorState(str(tmp_path / 'data.json'), ['a'])
+    state.load()
+    now = 1_700_000_000.0
+    state.merge([('a', 50, now - 10)], now=now)
+
+    # Рівний час не новіший: лишається те, що вже є, і в пакеті - перше з рівних
+    assert state.merge([('a', 60, now - 10)], now=now).updated == []
+    state.merge([('a', 70, now - 5), ('a', 80, now - 5)], now=now)
+    assert state.snapshot.readings['a'].level == 70
+
+def test_merge_clamps_future_timestamps(tmp_path):
+    state = SensorState(str(tmp_path / 'data.json'), ['a'])
+    state.load()
+    now = 1_700_000_000.0
+
+    # Пір із годинником, що поспішає на годину, не закріплює значення назавжди
+    state.merge([('a', 50, now + 3600)], now=now)
+    assert state.snapshot.readings['a'].timestamp == now
+    state.merge([('a', 40, now + 1)], now=now + 1)
+    assert state.snapshot.readings['a'].level == 40
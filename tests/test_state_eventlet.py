@@ -0,0 +1,90 @@
+"""Запис журналу, компактизація й запис історії не зупиняють цикл подій eventlet."""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import REPO_ROOT
+
+# monkey_patch змінює процес назавжди, тож сценарій іде в окремому інтерпретаторі
+SCRIPT = textwrap.dedent('''
+    import eventlet
+    eventlet.monkey_patch()
+    import json, os, sys, time
+    from eventlet.patcher import original
+    from battery_core import SensorState, journal
+
+    real_sleep, real_fsync = original('time').sleep, os.fsync
+    def slow_fsync(fd):
+        real_sleep(0.5)  # блокуючий C-виклик, як fsync на повільній SD-карті
+        real_fsync(fd)
+    journal.os.fsync = slow_fsync
+
+    state = SensorState(os.path.join(sys.argv[1], 'data.json'), ['a'])
+    state.load()
+    state.start()
+    ticks = []
+    def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            eventlet.sleep(0.01)
+    eventlet.spawn(ticker)
+    eventlet.sleep(0.05)
+    durable = state.wait_durable(state.apply([('a', 50)]).snapshot.version)
+    compacted = state.compact()
+    state.stop()
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    print(json.dumps({"durable": durable, "compacted": compacted, "max_gap": max(gaps)}))
+''')
+
+HISTORY_SCRIPT = textwrap.dedent('''
+    import eventlet
+    eventlet.monkey_patch()
+    import json, os, sys, time
+    from eventlet.patcher import original
+    from battery_core import HistoryStore
+
+    real_sleep, real_write = original('time').sleep, HistoryStore._write
+    def slow_write(self, conn, samples):
+        real_sleep(0.5)  # блокуючий C-виклик, як коміт SQLite на повільній SD-карті
+        real_write(self, conn, samples)
+    HistoryStore._write = slow_write
+
+    store = HistoryStore(os.path.join(sys.argv[1], 'history.db'), commit_interval=0.05)
+    store.open()
+    ticks = []
+    def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            eventlet.sleep(0.01)
+    eventlet.spawn(ticker)
+    eventlet.sleep(0.05)
+    now = time.time()
+    for i in range(100):
+        store.record('a', 50.0, now + i / 1000)
+    eventlet.sleep(0.8)
+    store.stop()
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    samples = store._connect().execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+    print(json.dumps({"samples": samples, "max_gap": max(gaps)}))
+''')
+
+def run_script(script, tmp_path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-c', script, str(tmp_path)], env=env, cwd=REPO_ROOT,
+                            capture_output=True, text=True, timeout=60, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def test_fsync_does_not_block_event_loop(tmp_path):
+    result = run_script(SCRIPT, tmp_path)
+    assert result['durable'] and result['compacted']
+    # Кожен fsync триває 0.5 с; якби він ішов у green-потоці, тікер стояв би стільки ж
+    assert result['max_gap'] < 0.25
+    with open(tmp_path / 'data.json', encoding='utf-8') as f:
+        assert json.load(f)['readings'][0]['level'] == 50
+
+def test_history_write_does_not_block_event_loop(tmp_path):
+    result = run_script(HISTORY_SCRIPT, tmp_path)
+    assert result['samples'] == 100
+    assert result['max_gap'] < 0.25
@@ -0,0 +1,52 @@
+"""Supervisor: зупинка всіх компонентів разом у межах спільного дедлайну."""
+import sys
+import time
+
+from battery_core.supervisor import Component, Supervisor
+
+# Процес ставить обробник SIGTERM і лише тоді створює файл ready
+CHILD = '''
+import signal, sys, time
+delay = float(sys.argv[2])
+if delay < 0:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+else:
+    signal.signal(signal.SIGTERM, lambda *_: (time.sleep(delay), sys.exit(0)))
+open(sys.argv[1], 'w').close()
+time.sleep(60)
+'''
+
+def start(tmp_path, name, exit_delay, stop_timeout):
+    """Компонент, що на SIGTERM завершується через exit_delay секунд (< 0 - ігнорує сигнал)."""
+    ready = tmp_path / f'{name}.ready'
+    component = Component(name, [sys.executable, '-c', CHILD, str(ready), str(exit_delay)],
+                          stop_timeout=stop_timeout)
+    component.start()
+    deadline = time.monotonic() + 10
+    while not ready.exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return component
+
+def shutdown(tmp_path, components):
+    """Зупиняє компоненти через Supervisor.shutdown. Повертає (секунди, коди завершення)."""
+    processes = [component.process for component in components]
+    started = time.monotonic()
+    Supervisor(components, str(tmp_path / 'status.json')).shutdown()
+    return time.monotonic() - started, [process.returncode for process in processes]
+
+def test_shutdown_stops_components_concurrently(tmp_path):
+    # Як gunicorn, що дописує журнал, і cloudflared, що закриває з'єднання
+    components = [start(tmp_path, 'backend', 1.0, 4.0), start(tmp_path, 'tunnel', 1.0, 4.0)]
+
+    elapsed, codes = shutdown(tmp_path, components)
+    # По черзі було б 2 с, разом - близько однієї
+    assert elapsed < 1.8
+    assert codes == [0, 0]
+
+def test_shutdown_kills_component_at_its_own_timeout(tmp_path):
+    components = [start(tmp_path, 'backend', 1.0, 4.0), start(tmp_path, 'tunnel', -1, 0.3)]
+
+    elapsed, codes = shutdown(tmp_path, components)
+    # Тунель убито за його stop_timeout, а бекенд тим часом завершився сам
+    assert elapsed < 1.8
+    assert codes[0] == 0 and codes[1] < 0
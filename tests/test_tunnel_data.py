@@ -0,0 +1,101 @@
+"""/data, /data/batch і /history аддона local_battery_viewer_tunnel: ?since=, колонковий формат, пакети, аргументи."""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from battery_core import COLUMNAR_MIMETYPE, parse_utc_timestamp
+from conftest import REPO_ROOT
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+from bench import AddonServer, http_request  # noqa: E402
+
+@pytest.fixture(scope='module')
+def tunnel_server():
+    # Окремий процес gunicorn: другий app.py в одному процесі з battery_soc_page
+    # повторно зареєстрував би ті самі колектори Prometheus
+    with AddonServer('local_battery_viewer_tunnel', '/ready') as server:
+        yield server
+
+def test_since_must_be_an_integer(tunnel_server):
+    for query in ('since=abc', 'since=', 'since=1.5'):
+        status, body, _ = http_request(tunnel_server.port, 'GET', f'/data?{query}')
+        assert status == 400, query
+        assert 'since' in json.loads(body)['error']
+
+def test_since_returns_only_newer_batteries(tunnel_server):
+    status, _, headers = http_request(tunnel_server.port, 'GET', '/data')
+    assert status == 200
+    version = headers['X-State-Version']
+    status, _, _ = http_request(tunnel_server.port, 'POST', '/data', json.dumps({'id': 1, 'level': 55}).encode(),
+                                {'Content-Type': 'application/json'})
+    assert status == 200
+
+    status, body, _ = http_request(tunnel_server.port, 'GET', f'/data?since={version}')
+    assert status == 200
+    assert [(battery['id'], battery['level']) for battery in json.loads(body)] == [(1, 55)]
+
+def post_batch(server, body, content_type='application/json'):
+    status, body, _ = http_request(server.port, 'POST', '/data/batch', body.encode(), {'Content-Type': content_type})
+    return status, json.loads(body)
+
+def test_batch_shapes_match_battery_soc_page(tunnel_server):
+    # Порожній пакет нічого не змінює, але це не помилка
+    for empty in ('{}', '[]', '{"readings": []}'):
+        status, body = post_batch(tunnel_server, empty)
+        assert (status, body['applied']) == (200, 0), empty
+
+    status, body = post_batch(tunnel_server, '{"readings": [{"id": 3, "level": 41}, {"id": "3", "soc": 42}]}')
+    assert status == 200 and body['applied'] == 2
+    status, body = post_batch(tunnel_server, '{"3": 43}')
+    assert status == 200 and body['results'][0]['level'] == 43
+    status, body = post_batch(tunnel_server, '{"id": 3, "level": 44}\nnot json\n', 'application/x-ndjson')
+    assert status == 207
+    assert [r['status'] for r in body['results']] == ['updated', 'error']
+    assert post_batch(tunnel_server, '42')[0] == 400
+
+def decode_columnar(body):
+    """Записи з колонкової відповіді так, як їх відновлює decodeRow у dashboard.js."""
+    payload = json.loads(body)
+    defaults = {"rate": None, "time_to_empty": None, "time_to_full": None, "anomalies": []}
+    return [{**defaults, **dict(zip(payload['fields'], row)), "name": payload['names'][str(row[0])]}
+            for row in payload['rows']]
+
+def test_columnar_payload_decodes_to_json_records(tunnel_server):
+    def post(level):
+        return http_request(tunnel_server.port, 'POST', '/data', json.dumps({'id': 2, 'level': level}).encode(),
+                            {'Content-Type': 'application/json'})
+    # Два значення з проміжком - у батареї з'являється аналітика (rate, прогноз)
+    assert post(80)[0] == 200
+    time.sleep(1.1)
+    assert post(60)[0] == 200
+
+    status, body, headers = http_request(tunnel_server.port, 'GET', '/data')
+    assert status == 200
+    records = json.loads(body)
+    status, body, columnar_headers = http_request(tunnel_server.port, 'GET', '/data',
+                                                  headers={'Accept': COLUMNAR_MIMETYPE})
+    assert status == 200
+    assert columnar_headers['Content-Type'].startswith(COLUMNAR_MIMETYPE)
+    assert columnar_headers['X-State-Version'] == headers['X-State-Version']
+    decoded = decode_columnar(body)
+
+    assert any(record['rate'] is not None for record in records)
+    assert [record['id'] for record in decoded] == [record['id'] for record in records]
+    for record, row in zip(records, decoded):
+        if record['timestamp'] is None:
+            assert row['timestamp'] is None
+        else:
+            # Колонковий формат передає epoch-секунди з точністю до мс замість ISO-мітки
+            assert row['timestamp'] == pytest.approx(parse_utc_timestamp(record['timestamp']), abs=1e-3)
+        assert {**row, "timestamp": None} == {**record, "timestamp": None}
+
+def test_history_step_must_be_a_positive_integer(tunnel_server):
+    for query in ('step=abc', 'step=', 'step=1.5', 'step=0', 'step=-60'):
+        status, body, _ = http_request(tunnel_server.port, 'GET', f'/history?id=1&{query}')
+        assert status == 400, query
+        assert 'step' in json.loads(body)['error']
+    status, _, _ = http_request(tunnel_server.port, 'GET', '/history?id=1&step=60')
+    assert status == 200